@@ -0,0 +1,570 @@
+"""
+In-process fake of the Discord REST API and gateway for benchmarks and load tests.
+
+Only the routes and gateway opcodes the bot actually uses are implemented. REST
+responses can be delayed by a configurable latency and carry Discord-style
+rate-limit headers; with ``enforce_rate_limits`` exhausted buckets answer 429.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+import yarl
+from aiohttp import web, WSMsgType
+
+DISCORD_EPOCH = 1420070400000
+API_PREFIX = "/api/v10"
+
+
+def _json_response(data: Any, status: int = 200, headers: Dict[str, str] = None) -> web.Response:
+    """JSON response with the bare content type discord.py expects."""
+    response = web.Response(text=json.dumps(data), status=status, headers=headers)
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+class FakeDiscord:
+    """A tiny Discord stand-in serving REST and gateway traffic on localhost."""
+
+    def __init__(self, latency_ms: float = 0.0, rate_limit: int = 50, rate_limit_window: float = 1.0,
+                 enforce_rate_limits: bool = False, host: str = "127.0.0.1"):
+        self.latency = latency_ms / 1000
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.enforce_rate_limits = enforce_rate_limits
+        self.host = host
+        self.port = None
+        self.logger = logging.getLogger(__name__)
+
+        self._ids = itertools.count(1)
+        self.bot_user = self._user("Auto Lock Thread")
+        self.application_id = self.bot_user["id"]
+
+        self.guilds: Dict[str, Dict[str, Any]] = {}
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self.messages: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+
+        # Request accounting
+        self.request_counts: Dict[str, int] = defaultdict(int)
+        self.rate_limited = 0
+        self.request_log: deque = deque(maxlen=10000)
+        self._buckets: Dict[str, List[float]] = {}
+        self._post_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+        # Gateway state
+        self.sockets: List[web.WebSocketResponse] = []
+        self.sequence = 0
+        self.sessions: Dict[str, int] = {}
+        self.identify_count = 0
+        self.resume_count = 0
+        self.ready = asyncio.Event()
+
+        self._runner: Optional[web.AppRunner] = None
+
+    # ------------------------------------------------------------------
+    # Snowflakes and payload builders
+    # ------------------------------------------------------------------
+
+    def snowflake(self) -> str:
+        """Generate a time-ordered Discord snowflake."""
+        return str(((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(self._ids) & 0x3FFFFF))
+
+    def _user(self, name: str) -> Dict[str, Any]:
+        return {
+            "id": self.snowflake(),
+            "username": name,
+            "global_name": name,
+            "discriminator": "0",
+            "avatar": None,
+            "bot": False,
+        }
+
+    @staticmethod
+    def _now_iso() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def add_guild(self, name: str, role_names: List[str] = None) -> Dict[str, Any]:
+        """Create a guild with an @everyone role plus the given named roles."""
+        guild_id = self.snowflake()
+        roles = [self._role(guild_id, "@everyone", 0)]
+        for position, role_name in enumerate(role_names or [], start=1):
+            roles.append(self._role(self.snowflake(), role_name, position))
+
+        guild = {
+            "id": guild_id,
+            "name": name,
+            "owner_id": self.bot_user["id"],
+            "roles": roles,
+            "channels": [],
+            "threads": [],
+            "members": [],
+            "member_count": 0,
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "large": False,
+            "unavailable": False,
+            "joined_at": self._now_iso(),
+        }
+        self.guilds[guild_id] = guild
+        self.add_member(guild, "Auto Lock Thread", roles=[], user=dict(self.bot_user, bot=True))
+        return guild
+
+    @staticmethod
+    def _role(role_id: str, name: str, position: int) -> Dict[str, Any]:
+        return {
+            "id": role_id,
+            "name": name,
+            "permissions": "0",
+            "position": position,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+            "flags": 0,
+        }
+
+    def role_id(self, guild: Dict[str, Any], name: str) -> str:
+        """Look up a role ID by name."""
+        return next(role["id"] for role in guild["roles"] if role["name"] == name)
+
+    def add_member(self, guild: Dict[str, Any], name: str, roles: List[str] = None,
+                   user: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Add a member holding the named roles."""
+        member = {
+            "user": user or self._user(name),
+            "roles": [self.role_id(guild, role) for role in roles or []],
+            "joined_at": self._now_iso(),
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+        guild["members"].append(member)
+        guild["member_count"] = len(guild["members"])
+        return member
+
+    def add_channel(self, guild: Dict[str, Any], name: str, channel_type: int = 15) -> Dict[str, Any]:
+        """Add a forum (type 15) or text (type 0) channel."""
+        channel = {
+            "id": self.snowflake(),
+            "guild_id": guild["id"],
+            "name": name,
+            "type": channel_type,
+            "position": len(guild["channels"]),
+            "permission_overwrites": [],
+            "parent_id": None,
+            "nsfw": False,
+            "flags": 0,
+            "available_tags": [],
+            "default_reaction_emoji": None,
+        }
+        guild["channels"].append(channel)
+        self.channels[channel["id"]] = channel
+        return channel
+
+    def make_thread(self, guild: Dict[str, Any], parent: Dict[str, Any], name: str,
+                    owner: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Create an open public thread payload (not yet announced on the gateway)."""
+        thread = {
+            "id": self.snowflake(),
+            "guild_id": guild["id"],
+            "parent_id": parent["id"],
+            "owner_id": (owner or guild["members"][0])["user"]["id"],
+            "name": name,
+            "type": 11,
+            "last_message_id": None,
+            "message_count": 0,
+            "member_count": 1,
+            "rate_limit_per_user": 0,
+            "flags": 0,
+            "applied_tags": [],
+            "thread_metadata": {
+                "archived": False,
+                "auto_archive_duration": 1440,
+                "archive_timestamp": self._now_iso(),
+                "locked": False,
+                "create_timestamp": self._now_iso(),
+            },
+        }
+        self.channels[thread["id"]] = thread
+        return thread
+
+    def add_thread(self, guild: Dict[str, Any], parent: Dict[str, Any], name: str) -> Dict[str, Any]:
+        """Create a thread that is part of the guild's initial GUILD_CREATE payload."""
+        thread = self.make_thread(guild, parent, name)
+        guild["threads"].append(thread)
+        return thread
+
+    async def create_thread(self, guild: Dict[str, Any], parent: Dict[str, Any], name: str) -> Dict[str, Any]:
+        """Create a thread and announce it with THREAD_CREATE."""
+        thread = self.make_thread(guild, parent, name)
+        guild["threads"].append(thread)
+        await self.dispatch("THREAD_CREATE", dict(thread, newly_created=True))
+        return thread
+
+    def make_message(self, channel_id: str, author: Dict[str, Any], content: str,
+                     guild_id: str = None, member: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build a MESSAGE_CREATE payload."""
+        message = {
+            "id": self.snowflake(),
+            "channel_id": channel_id,
+            "author": author,
+            "content": content,
+            "timestamp": self._now_iso(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+            "components": [],
+        }
+        if guild_id:
+            message["guild_id"] = guild_id
+        if member:
+            message["member"] = {key: value for key, value in member.items() if key != "user"}
+        return message
+
+    async def send_user_message(self, thread: Dict[str, Any], member: Dict[str, Any], content: str) -> Dict[str, Any]:
+        """Deliver a user-authored message into a thread over the gateway."""
+        message = self.make_message(thread["id"], member["user"], content, thread["guild_id"], member)
+        self.messages[thread["id"]][message["id"]] = message
+        await self.dispatch("MESSAGE_CREATE", message)
+        return message
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/gateway/"
+
+    async def start(self) -> None:
+        """Start serving on an ephemeral localhost port (the same one again on restart, like a stable resume URL)."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/gateway/", self._gateway)
+        app.router.add_get(API_PREFIX + "/users/@me", self._get_me)
+        app.router.add_get(API_PREFIX + "/oauth2/applications/@me", self._get_application)
+        app.router.add_put(API_PREFIX + "/applications/{application_id}/commands", self._put_commands)
+        app.router.add_get(API_PREFIX + "/gateway", self._get_gateway)
+        app.router.add_get(API_PREFIX + "/gateway/bot", self._get_gateway)
+        app.router.add_patch(API_PREFIX + "/channels/{channel_id}", self._patch_channel)
+        app.router.add_delete(API_PREFIX + "/channels/{channel_id}", self._delete_channel)
+        app.router.add_get(API_PREFIX + "/channels/{channel_id}/messages", self._get_messages)
+        app.router.add_post(API_PREFIX + "/channels/{channel_id}/messages", self._post_message)
+        app.router.add_post(API_PREFIX + "/channels/{channel_id}/messages/bulk-delete", self._bulk_delete)
+        app.router.add_patch(API_PREFIX + "/channels/{channel_id}/messages/{message_id}", self._patch_message)
+        app.router.add_delete(API_PREFIX + "/channels/{channel_id}/messages/{message_id}", self._delete_message)
+        app.router.add_get(API_PREFIX + "/channels/{channel_id}/threads/archived/public", self._archived_threads)
+        app.router.add_route("*", API_PREFIX + "/{tail:.*}", self._fallback)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port or 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Fake Discord listening on {self.host}:{self.port}")
+
+    def install(self) -> None:
+        """Point discord.py's REST and gateway URLs at this fake."""
+        discord.http.Route.BASE = self.api_base
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(self.gateway_url)
+
+    async def stop(self) -> None:
+        for ws in list(self.sockets):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    def on_message_posted(self, callback: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Register a callback for every message the bot posts."""
+        self._post_listeners.append(callback)
+
+    # ------------------------------------------------------------------
+    # REST
+    # ------------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        template = resource.canonical if resource is not None else request.path
+        major = request.match_info.get("channel_id") or request.match_info.get("application_id") or ""
+        bucket_key = f"{request.method} {template} {major}"
+        self.request_counts[f"{request.method} {template}"] += 1
+        self.request_log.append((time.perf_counter(), request.method, request.path))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        headers, limited = self._consume_bucket(bucket_key)
+        if limited:
+            self.rate_limited += 1
+            retry_after = float(headers["X-RateLimit-Reset-After"])
+            headers["Retry-After"] = str(retry_after)
+            return _json_response(
+                {"message": "You are being rate limited.", "retry_after": retry_after, "global": False},
+                status=429, headers=headers
+            )
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    def _consume_bucket(self, bucket_key: str):
+        now = time.time()
+        window = self._buckets.get(bucket_key)
+        if window is None or now >= window[0]:
+            window = [now + self.rate_limit_window, self.rate_limit]
+            self._buckets[bucket_key] = window
+
+        window[1] -= 1
+        limited = self.enforce_rate_limits and window[1] < 0
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(window[1], 0)),
+            "X-RateLimit-Reset": f"{window[0]:.3f}",
+            "X-RateLimit-Reset-After": f"{max(window[0] - now, 0):.3f}",
+            "X-RateLimit-Bucket": hashlib.md5(bucket_key.rsplit(" ", 1)[0].encode()).hexdigest(),
+        }
+        return headers, limited
+
+    async def _get_me(self, request):
+        return _json_response(dict(self.bot_user, bot=True, verified=True, flags=0, mfa_enabled=False))
+
+    async def _get_application(self, request):
+        return _json_response({
+            "id": self.application_id,
+            "name": self.bot_user["username"],
+            "icon": None,
+            "description": "",
+            "rpc_origins": [],
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "owner": self.bot_user,
+            "verify_key": "0" * 64,
+            "team": None,
+            "flags": 0,
+            "summary": "",
+            "interactions_endpoint_url": None,
+        })
+
+    async def _put_commands(self, request):
+        return _json_response([])
+
+    async def _get_gateway(self, request):
+        return _json_response({"url": self.gateway_url, "shards": 1})
+
+    async def _patch_channel(self, request):
+        channel = self.channels.get(request.match_info["channel_id"])
+        if channel is None:
+            return self._not_found("Unknown Channel", 10003)
+
+        payload = await request.json()
+        if "thread_metadata" in channel:
+            for key in ("locked", "archived", "auto_archive_duration"):
+                if key in payload:
+                    channel["thread_metadata"][key] = payload[key]
+        if "name" in payload:
+            channel["name"] = payload["name"]
+
+        await self.dispatch("THREAD_UPDATE" if "thread_metadata" in channel else "CHANNEL_UPDATE", channel)
+        return _json_response(channel)
+
+    async def _delete_channel(self, request):
+        channel = self.channels.pop(request.match_info["channel_id"], None)
+        if channel is None:
+            return self._not_found("Unknown Channel", 10003)
+
+        self.messages.pop(channel["id"], None)
+        guild = self.guilds.get(channel.get("guild_id"))
+        if guild and "thread_metadata" in channel:
+            guild["threads"] = [thread for thread in guild["threads"] if thread["id"] != channel["id"]]
+            await self.dispatch("THREAD_DELETE", {
+                "id": channel["id"], "guild_id": channel["guild_id"],
+                "parent_id": channel["parent_id"], "type": channel["type"],
+            })
+        return _json_response(channel)
+
+    async def _get_messages(self, request):
+        channel_messages = self.messages.get(request.match_info["channel_id"], {})
+        limit = int(request.query.get("limit", 50))
+        before = request.query.get("before")
+        after = request.query.get("after")
+
+        ids = sorted(channel_messages, key=int, reverse=True)
+        if before:
+            ids = [message_id for message_id in ids if int(message_id) < int(before)]
+        if after:
+            # Like Discord: the messages right after ``after``, still newest first
+            ids = sorted((message_id for message_id in ids if int(message_id) > int(after)), key=int)[:limit]
+            ids.reverse()
+        return _json_response([channel_messages[message_id] for message_id in ids[:limit]])
+
+    async def _post_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return self._not_found("Unknown Channel", 10003)
+
+        if request.content_type.startswith("multipart/"):
+            form = await request.post()
+            payload = json.loads(form.get("payload_json", "{}"))
+        else:
+            payload = await request.json()
+
+        message = self.make_message(channel_id, dict(self.bot_user, bot=True), payload.get("content") or "",
+                                    self.channels[channel_id].get("guild_id"))
+        message["embeds"] = payload.get("embeds") or []
+        message["components"] = payload.get("components") or []
+        self.messages[channel_id][message["id"]] = message
+
+        for callback in self._post_listeners:
+            callback(channel_id, message)
+        return _json_response(message)
+
+    async def _patch_message(self, request):
+        message = self.messages.get(request.match_info["channel_id"], {}).get(request.match_info["message_id"])
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+
+        payload = await request.json()
+        for key in ("content", "embeds", "components"):
+            if key in payload and payload[key] is not None:
+                message[key] = payload[key]
+        message["edited_timestamp"] = self._now_iso()
+        return _json_response(message)
+
+    async def _delete_message(self, request):
+        message = self.messages.get(request.match_info["channel_id"], {}).pop(request.match_info["message_id"], None)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        return web.Response(status=204)
+
+    async def _bulk_delete(self, request):
+        payload = await request.json()
+        channel_messages = self.messages.get(request.match_info["channel_id"], {})
+        for message_id in payload.get("messages", []):
+            channel_messages.pop(str(message_id), None)
+        return web.Response(status=204)
+
+    async def _archived_threads(self, request):
+        parent_id = request.match_info["channel_id"]
+        limit = int(request.query.get("limit", 50))
+        before = request.query.get("before")
+
+        threads = [
+            channel for channel in self.channels.values()
+            if channel.get("parent_id") == parent_id and channel.get("thread_metadata", {}).get("archived")
+        ]
+        threads.sort(key=lambda thread: thread["thread_metadata"]["archive_timestamp"], reverse=True)
+        if before:
+            threads = [thread for thread in threads if thread["thread_metadata"]["archive_timestamp"] < before]
+        page = threads[:limit]
+        return _json_response({"threads": page, "members": [], "has_more": len(threads) > limit})
+
+    async def _fallback(self, request):
+        self.logger.debug(f"Unhandled fake route {request.method} {request.path}")
+        return _json_response({})
+
+    @staticmethod
+    def _not_found(message: str, code: int):
+        return _json_response({"message": message, "code": code}, status=404)
+
+    # ------------------------------------------------------------------
+    # Gateway
+    # ------------------------------------------------------------------
+
+    async def dispatch(self, event: str, data: Dict[str, Any]) -> None:
+        """Send a DISPATCH event to every connected gateway session."""
+        self.sequence += 1
+        frame = json.dumps({"op": 0, "t": event, "s": self.sequence, "d": data})
+        for ws in list(self.sockets):
+            if not ws.closed:
+                await ws.send_str(frame)
+
+    async def _gateway(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": 41250}})
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                frame = json.loads(msg.data)
+                op = frame.get("op")
+                if op == 1:
+                    await ws.send_json({"op": 11})
+                elif op == 2:
+                    await self._identify(ws)
+                elif op == 6:
+                    await self._resume(ws, frame["d"])
+                elif op == 8:
+                    await self._request_members(ws, frame["d"])
+        finally:
+            self.sockets.remove(ws)
+        return ws
+
+    async def _send_dispatch(self, ws, event: str, data: Dict[str, Any]) -> None:
+        self.sequence += 1
+        await ws.send_json({"op": 0, "t": event, "s": self.sequence, "d": data})
+
+    async def _identify(self, ws) -> None:
+        self.identify_count += 1
+        session_id = hashlib.md5(self.snowflake().encode()).hexdigest()
+        self.sessions[session_id] = self.sequence
+        await self._send_dispatch(ws, "READY", {
+            "v": 10,
+            "user": dict(self.bot_user, bot=True),
+            "guilds": [{"id": guild_id, "unavailable": True} for guild_id in self.guilds],
+            "session_id": session_id,
+            "resume_gateway_url": self.gateway_url,
+            "application": {"id": self.application_id, "flags": 0},
+        })
+        for guild in self.guilds.values():
+            await self._send_dispatch(ws, "GUILD_CREATE", self._guild_payload(guild))
+        self.ready.set()
+
+    async def _resume(self, ws, data: Dict[str, Any]) -> None:
+        if data.get("session_id") not in self.sessions:
+            await ws.send_json({"op": 9, "d": False})
+            return
+        self.resume_count += 1
+        await self._send_dispatch(ws, "RESUMED", {})
+        self.ready.set()
+
+    async def _request_members(self, ws, data: Dict[str, Any]) -> None:
+        guild = self.guilds.get(str(data.get("guild_id")))
+        members = guild["members"] if guild else []
+        await self._send_dispatch(ws, "GUILD_MEMBERS_CHUNK", {
+            "guild_id": data.get("guild_id"),
+            "members": members,
+            "chunk_index": 0,
+            "chunk_count": 1,
+            "nonce": data.get("nonce"),
+        })
+
+    @staticmethod
+    def _guild_payload(guild: Dict[str, Any]) -> Dict[str, Any]:
+        return dict(guild, threads=[thread for thread in guild["threads"]
+                                    if not thread["thread_metadata"]["archived"]])
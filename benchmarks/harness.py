@@ -0,0 +1,125 @@
+"""
+Runs a real ThreadLockBot against the in-process fake Discord.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_discord import FakeDiscord
+
+BENCH_TOKEN = "bench-token"
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BotHarness:
+    """Boots the bot in a scratch directory wired to a FakeDiscord instance."""
+
+    def __init__(self, fake: FakeDiscord, config_overrides: Dict[str, Any] = None,
+                 log_level: str = "WARNING", keep_workdir: bool = False):
+        self.fake = fake
+        self.config_overrides = config_overrides or {}
+        self.log_level = log_level
+        self.keep_workdir = keep_workdir
+        self.logger = logging.getLogger(__name__)
+
+        self.bot = None
+        self.workdir: Optional[str] = None
+        self._previous_cwd: Optional[str] = None
+        self._bot_task: Optional[asyncio.Task] = None
+
+        # Seeded worlds; the attributes below mirror the first one for convenience
+        self.worlds: List[Dict[str, Any]] = []
+        self.guild: Dict[str, Any] = {}
+        self.forum: Dict[str, Any] = {}
+        self.auto_delete_forum: Dict[str, Any] = {}
+        self.moderators: List[Dict[str, Any]] = []
+        self.members: List[Dict[str, Any]] = []
+
+    def seed(self, moderators: int = 5, members: int = 50, guild_name: str = "Bench Guild",
+             moderator_names: List[str] = None) -> Dict[str, Any]:
+        """Create a guild with a normal and an auto-delete forum, moderators and regular members."""
+        guild = self.fake.add_guild(guild_name, role_names=["Moderator", "Member"])
+        names = moderator_names or [f"moderator{index}" for index in range(moderators)]
+        world = {
+            "guild": guild,
+            "forum": self.fake.add_channel(guild, "reports"),
+            "auto_delete_forum": self.fake.add_channel(guild, "applications"),
+            "moderators": [self.fake.add_member(guild, name, roles=["Moderator"]) for name in names],
+            "members": [self.fake.add_member(guild, f"member{index}", roles=["Member"]) for index in range(members)],
+        }
+        self.worlds.append(world)
+
+        if len(self.worlds) == 1:
+            self.guild = world["guild"]
+            self.forum = world["forum"]
+            self.auto_delete_forum = world["auto_delete_forum"]
+            self.moderators = world["moderators"]
+            self.members = world["members"]
+        return world
+
+    def _write_config(self) -> None:
+        # Start from the repository config so benchmarks see realistic settings
+        with open(os.path.join(REPO_ROOT, "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        config["authorized_roles"] = ["Moderator"]
+        config["auto_delete_channels"] = [int(world["auto_delete_forum"]["id"]) for world in self.worlds]
+        config.update(self.config_overrides)
+        with open("config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4)
+
+    def _configure_logging(self) -> None:
+        os.makedirs("logs", exist_ok=True)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        handler = logging.FileHandler("logs/bot.log", encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, self.log_level.upper(), logging.WARNING))
+        logging.getLogger("discord").setLevel(logging.WARNING)
+
+    async def __aenter__(self):
+        self._previous_cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp(prefix="threadlock-bench-")
+        os.chdir(self.workdir)
+        self._write_config()
+        self._configure_logging()
+
+        await self.fake.start()
+        self.fake.install()
+
+        from bot import ThreadLockBot
+
+        self.bot = ThreadLockBot()
+        self._bot_task = asyncio.create_task(self.bot.start(BENCH_TOKEN))
+        ready = asyncio.create_task(self.bot.wait_until_ready())
+        done, _ = await asyncio.wait({ready, self._bot_task}, timeout=30, return_when=asyncio.FIRST_COMPLETED)
+        if ready not in done:
+            ready.cancel()
+            if self._bot_task.done():
+                self._bot_task.result()
+            raise RuntimeError("Bot did not become ready against the fake Discord")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self.bot and not self.bot.is_closed():
+                await self.bot.close()
+            if self._bot_task:
+                try:
+                    await asyncio.wait_for(self._bot_task, timeout=10)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    pass
+            await self.fake.stop()
+        finally:
+            os.chdir(self._previous_cwd)
+            if self.keep_workdir:
+                self.logger.info(f"Harness workdir kept at {self.workdir}")
+            else:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+        return False
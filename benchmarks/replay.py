@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Replay load generator built from the bot's own action logs.
+
+Turns ``logs/thread_actions.log`` (and the thread_actions lines in
+``logs/bot.log`` and its rotated archives) into a traffic model of lock bursts, auto-deletes and repeat
+locks, then replays it against the bot wired to the fake Discord at increasing
+speeds to find where it saturates.
+
+    python -m benchmarks.replay --build-model benchmarks/traffic_model.json
+    python -m benchmarks.replay --speeds 1,10,50,100 --guilds 20 --step-duration 15
+"""
+
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import statistics
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.harness import BotHarness, REPO_ROOT
+from benchmarks.run_benchmarks import percentile
+from utils.notices import notices
+
+ACTION_LOG_LINE = re.compile(
+    r"^(?P<ts>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) UTC \| \[(?P<action>[A-Z_]+)\] "
+    r"Thread '(?P<thread>.*)' by (?P<moderator>\S+) in (?P<guild>.+?)(?: - (?P<info>.*))?$"
+)
+BOT_LOG_LINE = re.compile(
+    r"^(?P<ts>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) - thread_actions - INFO - \[(?P<action>[A-Z_]+)\] "
+    r"Thread '(?P<thread>.*)' by (?P<moderator>\S+) in (?P<guild>.+?)(?: - (?P<info>.*))?$"
+)
+
+# Event kinds replayed against the bot
+LOCK = "lock"
+AUTO_DELETE_LOCK = "auto_delete_lock"
+REPEAT_LOCK = "repeat_lock"
+
+
+def parse_logs(paths: List[str]) -> List[Dict[str, Any]]:
+    """Read thread actions from the given log files, de-duplicated and in time order."""
+    seen = set()
+    actions = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        # Rotated bot.log archives are gzipped
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = ACTION_LOG_LINE.match(line.rstrip("\n")) or BOT_LOG_LINE.match(line.rstrip("\n"))
+                if not match:
+                    continue
+                key = (match["ts"], match["action"], match["thread"], match["moderator"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                actions.append({
+                    "time": datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S").timestamp(),
+                    "action": match["action"],
+                    "thread": match["thread"],
+                    "moderator": match["moderator"],
+                    "guild": match["guild"],
+                })
+    actions.sort(key=lambda action: action["time"])
+    return actions
+
+
+def build_model(actions: List[Dict[str, Any]], burst_gap: float = 60.0,
+                auto_delete_window: float = 15.0) -> Dict[str, Any]:
+    """Classify locks and group them into bursts separated by more than ``burst_gap`` seconds."""
+    locks = [action for action in actions if action["action"] == "LOCK"]
+    auto_deletes = [action for action in actions if action["action"] == "AUTO_DELETE"]
+
+    events = []
+    locked_before = set()
+    for lock in locks:
+        key = (lock["guild"], lock["thread"])
+        followed_by_delete = next(
+            (delete for delete in auto_deletes
+             if delete["guild"] == lock["guild"] and delete["thread"] == lock["thread"]
+             and 0 <= delete["time"] - lock["time"] <= auto_delete_window),
+            None
+        )
+        if followed_by_delete:
+            kind = AUTO_DELETE_LOCK
+        elif key in locked_before:
+            kind = REPEAT_LOCK
+        else:
+            kind = LOCK
+        locked_before.add(key)
+        events.append({"time": lock["time"], "kind": kind, "moderator": lock["moderator"]})
+
+    bursts: List[Dict[str, Any]] = []
+    for event in events:
+        if not bursts or event["time"] - bursts[-1]["end"] > burst_gap:
+            bursts.append({"start": event["time"], "end": event["time"], "events": []})
+        burst = bursts[-1]
+        burst["end"] = event["time"]
+        burst["events"].append({"dt": event["time"] - burst["start"], "kind": event["kind"],
+                                "moderator": event["moderator"]})
+
+    first = bursts[0]["start"] if bursts else 0.0
+    intra_gaps = [
+        later["dt"] - earlier["dt"]
+        for burst in bursts for earlier, later in zip(burst["events"], burst["events"][1:])
+    ]
+    delete_delays = [
+        delete["time"] - lock["time"]
+        for lock in locks for delete in auto_deletes
+        if delete["thread"] == lock["thread"] and 0 <= delete["time"] - lock["time"] <= auto_delete_window
+    ]
+    kinds = defaultdict(int)
+    for event in events:
+        kinds[event["kind"]] += 1
+
+    return {
+        "generated_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+        "burst_gap": burst_gap,
+        "total_locks": len(events),
+        "span_seconds": (events[-1]["time"] - first) if events else 0.0,
+        "moderators": sorted({event["moderator"] for event in events}),
+        "stats": {
+            "kinds": dict(kinds),
+            "bursts": len(bursts),
+            "burst_size_mean": statistics.fmean(len(burst["events"]) for burst in bursts) if bursts else 0.0,
+            "burst_size_max": max((len(burst["events"]) for burst in bursts), default=0),
+            "intra_burst_gap_p50": percentile(intra_gaps, 50),
+            "intra_burst_gap_min": min(intra_gaps, default=0.0),
+            "auto_delete_delay_p50": percentile(delete_delays, 50),
+        },
+        "bursts": [{"offset": burst["start"] - first, "events": burst["events"]} for burst in bursts],
+    }
+
+
+def build_schedule(model: Dict[str, Any], max_idle: float) -> Tuple[List[Tuple[float, str, str]], float]:
+    """Flatten the model into (log-time offset, kind, moderator) with idle gaps clipped to ``max_idle``."""
+    schedule = []
+    clock = 0.0
+    previous_end = None
+    for burst in model["bursts"]:
+        if previous_end is not None:
+            clock += min(burst["offset"] - previous_end, max_idle)
+        for event in burst["events"]:
+            schedule.append((clock + event["dt"], event["kind"], event["moderator"]))
+        clock += burst["events"][-1]["dt"]
+        previous_end = burst["offset"] + burst["events"][-1]["dt"]
+    return schedule, clock + max_idle
+
+
+class ReplayRunner:
+    """Drives the traffic model against the bot and measures latency and backlog."""
+
+    def __init__(self, harness: BotHarness, model: Dict[str, Any], max_idle: float, seed: int):
+        self.harness = harness
+        self.fake = harness.fake
+        self.schedule, self.cycle_length = build_schedule(model, max_idle)
+        self.random = random.Random(seed)
+
+        self.pending: Dict[str, deque] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.sent = 0
+        self.completed = 0
+        self.locked_threads: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.suppressed: Dict[str, int] = defaultdict(int)
+        self.fake.on_message_posted(self._on_post)
+        # Repeat notices are folded into an earlier message or shed under load, so post nothing
+        notices.on_suppressed(self._on_notice_suppressed)
+
+    def _complete(self, channel_id: str) -> None:
+        waiting = self.pending.get(channel_id)
+        if waiting:
+            sent_at = waiting.popleft()
+            self.latencies.append((time.perf_counter() - sent_at) * 1000)
+            self.completed += 1
+
+    def _on_post(self, channel_id: str, message: Dict[str, Any]) -> None:
+        self._complete(channel_id)
+
+    def _on_notice_suppressed(self, channel_id: int, outcome: str) -> None:
+        self.suppressed[outcome] += 1
+        self._complete(str(channel_id))
+
+    def _moderator(self, world: Dict[str, Any], name: str) -> Dict[str, Any]:
+        for moderator in world["moderators"]:
+            if moderator["user"]["username"] == name:
+                return moderator
+        return self.random.choice(world["moderators"])
+
+    async def _fire(self, world: Dict[str, Any], kind: str, moderator_name: str) -> None:
+        moderator = self._moderator(world, moderator_name)
+        guild_id = world["guild"]["id"]
+
+        if kind == REPEAT_LOCK and self.locked_threads[guild_id]:
+            thread = self.random.choice(self.locked_threads[guild_id])
+        else:
+            parent = world["auto_delete_forum"] if kind == AUTO_DELETE_LOCK else world["forum"]
+            thread = await self.fake.create_thread(world["guild"], parent, f"replay-{self.sent}")
+            if kind != AUTO_DELETE_LOCK:
+                self.locked_threads[guild_id].append(thread)
+
+        self.pending[thread["id"]].append(time.perf_counter())
+        self.sent += 1
+        await self.fake.send_user_message(thread, moderator, "lock")
+
+    async def run_step(self, speed: float, duration: float) -> Dict[str, Any]:
+        """Replay every guild's copy of the schedule at ``speed`` for ``duration`` wall seconds."""
+        sent_before, completed_before = self.sent, self.completed
+        self.latencies = []
+        self.suppressed.clear()
+        backlog_samples: List[Tuple[float, int]] = []
+
+        # Each guild replays the same model from a random phase so bursts do not align perfectly
+        queue = []
+        for world in self.harness.worlds:
+            phase = self.random.uniform(0, self.cycle_length)
+            for offset, kind, moderator in self.schedule:
+                queue.append(((offset + phase) % self.cycle_length, world, kind, moderator))
+        queue.sort(key=lambda item: item[0])
+
+        started = time.perf_counter()
+        last_sample = 0.0
+        cycle = 0
+        index = 0
+        tasks = set()
+        while True:
+            elapsed = time.perf_counter() - started
+            if elapsed >= duration:
+                break
+            if elapsed - last_sample >= 0.25:
+                backlog_samples.append((elapsed, self.sent - self.completed))
+                last_sample = elapsed
+
+            if not queue:
+                await asyncio.sleep(0.05)
+                continue
+            offset, world, kind, moderator = queue[index]
+            due = (cycle * self.cycle_length + offset) / speed
+            if due > elapsed:
+                await asyncio.sleep(min(due - elapsed, 0.05))
+                continue
+
+            task = asyncio.create_task(self._fire(world, kind, moderator))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+            if index == len(queue):
+                index = 0
+                cycle += 1
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        offered = self.sent - sent_before
+        achieved = self.completed - completed_before
+        # Ignore the ramp-up: in-flight requests naturally climb to rate x latency first
+        slope = _slope(backlog_samples[len(backlog_samples) // 2:])
+
+        return {
+            "speed": speed,
+            "offered_per_sec": round(offered / duration, 2),
+            "completed_per_sec": round(achieved / duration, 2),
+            "latency_p50_ms": round(percentile(self.latencies, 50), 2),
+            "latency_p99_ms": round(percentile(self.latencies, 99), 2),
+            "backlog_end": self.sent - self.completed,
+            "backlog_growth_per_sec": round(slope, 3),
+            # Completions without a new message: folded repeat notices and shed notices
+            "notices_suppressed": dict(self.suppressed),
+        }
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait for outstanding requests so the next step starts from an empty backlog."""
+        deadline = time.perf_counter() + timeout
+        while self.sent > self.completed and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        # Forget anything that never completed so it does not skew the next step
+        self.pending.clear()
+        self.completed = self.sent
+
+
+def _slope(samples: List[Tuple[float, int]]) -> float:
+    """Least-squares slope of backlog over time."""
+    if len(samples) < 2:
+        return 0.0
+    xs = [sample[0] for sample in samples]
+    ys = [sample[1] for sample in samples]
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def is_saturated(step: Dict[str, Any], latency_slo_ms: float) -> Optional[str]:
+    """Explain why a step counts as saturated, or return None."""
+    if step["offered_per_sec"] and step["completed_per_sec"] < 0.9 * step["offered_per_sec"]:
+        return "throughput below 90% of offered load"
+    if step["latency_p99_ms"] > latency_slo_ms:
+        return f"p99 latency above {latency_slo_ms:g}ms"
+    if step["backlog_growth_per_sec"] > max(0.5, 0.05 * step["offered_per_sec"]):
+        return "backlog keeps growing"
+    return None
+
+
+async def run_replay(args, model: Dict[str, Any]) -> Dict[str, Any]:
+    fake = FakeDiscord(latency_ms=args.latency_ms, rate_limit=args.rate_limit,
+                       enforce_rate_limits=args.enforce_rate_limits)
+    harness = BotHarness(fake, log_level=args.log_level)
+    for index in range(args.guilds):
+        harness.seed(moderators=0, members=5, guild_name=f"Replay Guild {index}",
+                     moderator_names=model["moderators"] or ["moderator0"])
+
+    steps = []
+    saturation = None
+    async with harness:
+        runner = ReplayRunner(harness, model, args.max_idle, args.seed)
+        for speed in args.speeds:
+            step = await runner.run_step(speed, args.step_duration)
+            reason = is_saturated(step, args.latency_slo_ms)
+            step["saturated"] = reason
+            steps.append(step)
+            print(
+                f"  {speed:>6g}x  offered {step['offered_per_sec']:>8}/s  completed {step['completed_per_sec']:>8}/s  "
+                f"p50 {step['latency_p50_ms']:>8}ms  p99 {step['latency_p99_ms']:>8}ms  "
+                f"backlog {step['backlog_end']:>5} ({step['backlog_growth_per_sec']:+}/s)"
+                + (f"  ⚠️ {reason}" if reason else "")
+            )
+            if reason and saturation is None:
+                saturation = {"speed": speed, "offered_per_sec": step["offered_per_sec"], "reason": reason}
+                if not args.keep_going:
+                    break
+            await runner.drain()
+
+    return {"guilds": args.guilds, "latency_ms": args.latency_ms, "steps": steps, "saturation": saturation}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay real lock traffic against the bot')
+    parser.add_argument('--logs', nargs='*',
+                        default=[os.path.join(REPO_ROOT, 'logs', 'thread_actions.log'),
+                                 os.path.join(REPO_ROOT, 'logs', 'bot.log')]
+                                + sorted(glob.glob(os.path.join(REPO_ROOT, 'logs', 'bot.log.*.gz'))),
+                        help='Log files to build the traffic model from')
+    parser.add_argument('--model', default=None, help='Use a previously built traffic model JSON')
+    parser.add_argument('--build-model', metavar='PATH', default=None,
+                        help='Write the traffic model to PATH and exit')
+    parser.add_argument('--burst-gap', type=float, default=60.0,
+                        help='Seconds of silence that separate bursts (default: 60)')
+    parser.add_argument('--max-idle', type=float, default=30.0,
+                        help='Clip idle gaps between bursts to this many log seconds (default: 30)')
+    parser.add_argument('--speeds', default='1,2,5,10,20,50,100',
+                        help='Comma-separated replay speeds (default: 1,2,5,10,20,50,100)')
+    parser.add_argument('--guilds', type=int, default=10,
+                        help='Independent guilds replaying the model concurrently (default: 10)')
+    parser.add_argument('--step-duration', type=float, default=20.0,
+                        help='Wall seconds spent at each speed (default: 20)')
+    parser.add_argument('--latency-ms', type=float, default=50.0,
+                        help='Simulated REST latency (default: 50)')
+    parser.add_argument('--rate-limit', type=int, default=50)
+    parser.add_argument('--enforce-rate-limits', action='store_true')
+    parser.add_argument('--latency-slo-ms', type=float, default=1000.0,
+                        help='p99 lock latency considered saturated (default: 1000)')
+    parser.add_argument('--keep-going', action='store_true', help='Run every speed even after saturating')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='Write the replay report to this JSON file')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+    args.speeds = [float(speed) for speed in args.speeds.split(',')]
+
+    if args.model:
+        with open(args.model, 'r', encoding='utf-8') as f:
+            model = json.load(f)
+    else:
+        model = build_model(parse_logs(args.logs), burst_gap=args.burst_gap)
+
+    print(f"📈 Traffic model: {model['total_locks']} locks in {model['stats']['bursts']} burst(s), "
+          f"kinds {model['stats']['kinds']}")
+    if args.build_model:
+        with open(args.build_model, 'w', encoding='utf-8') as f:
+            json.dump(model, f, indent=4, ensure_ascii=False)
+        print(f"💾 Model written to {args.build_model}")
+        return
+    if not model["bursts"]:
+        print("❌ No lock events found in the logs")
+        return
+
+    print(f"🔁 Replaying across {args.guilds} guild(s) with {args.latency_ms:g}ms REST latency")
+    report = asyncio.run(run_replay(args, model))
+
+    if report["saturation"]:
+        print(f"\n🔥 Saturated at {report['saturation']['speed']:g}x "
+              f"(~{report['saturation']['offered_per_sec']} locks/s): {report['saturation']['reason']}")
+    else:
+        print("\n✅ No saturation within the tested speeds")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"model": {key: value for key, value in model.items() if key != "bursts"}, **report},
+                      f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
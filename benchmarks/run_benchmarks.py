@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Discord Thread Lock Bot.
+
+Runs ThreadLockBot.on_message, PermissionHandler.has_lock_permission and
+ThreadHandler.handle_lock_request against the in-process fake Discord, writes
+the results as JSON and compares them with a stored baseline.
+
+    python -m benchmarks.run_benchmarks --latency-ms 20
+    python -m benchmarks.run_benchmarks --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List
+
+import discord
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.harness import BotHarness, REPO_ROOT
+
+BASELINE_DIR = os.path.join(REPO_ROOT, "benchmarks", "baselines")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    """A single benchmark result; ``better`` is "higher" or "lower"."""
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def handler_calls(name: str) -> int:
+    """How many times a timed handler has completed so far."""
+    from utils.performance import performance_monitor
+
+    for entry in performance_monitor.summary(limit=1000)["top_handlers"]:
+        if entry["name"] == name:
+            return entry["calls"]
+    return 0
+
+
+async def wait_for_handler_calls(name: str, target: int, timeout: float = 120.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while handler_calls(name) < target:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{name} completed {handler_calls(name)}/{target} calls before timing out")
+        await asyncio.sleep(0.005)
+
+
+async def bench_permission_check(harness: BotHarness, iterations: int) -> Dict[str, Any]:
+    """Time has_lock_permission for a mix of authorized and unauthorized members."""
+    guild = harness.bot.get_guild(int(harness.guild["id"]))
+    people = [guild.get_member(int(member["user"]["id"])) for member in harness.moderators + harness.members]
+    check = harness.bot.permission_handler.has_lock_permission
+
+    durations = []
+    started = time.perf_counter()
+    for index in range(iterations):
+        member = people[index % len(people)]
+        call_started = time.perf_counter_ns()
+        check(member, guild)
+        durations.append((time.perf_counter_ns() - call_started) / 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "permission_checks_per_sec": metric(iterations / elapsed, "ops/s", "higher"),
+        "permission_check_p50_us": metric(percentile(durations, 50), "us", "lower"),
+        "permission_check_p99_us": metric(percentile(durations, 99), "us", "lower"),
+    }
+
+
+async def bench_on_message(harness: BotHarness, messages: int) -> Dict[str, Any]:
+    """Push ordinary chat messages through on_message as fast as the gateway delivers them."""
+    fake = harness.fake
+    threads = [await fake.create_thread(harness.guild, harness.forum, f"chat-{index}") for index in range(20)]
+    await asyncio.sleep(0.1)
+
+    baseline_calls = handler_calls("on_message")
+    started = time.perf_counter()
+    for index in range(messages):
+        member = harness.members[index % len(harness.members)]
+        await fake.send_user_message(threads[index % len(threads)], member, f"just chatting {index}")
+    await wait_for_handler_calls("on_message", baseline_calls + messages)
+    elapsed = time.perf_counter() - started
+
+    return {"messages_per_sec": metric(messages / elapsed, "msg/s", "higher")}
+
+
+async def bench_allocations(harness: BotHarness, messages: int) -> Dict[str, Any]:
+    """Memory allocated and retained per handled message, measured with tracemalloc."""
+    fake = harness.fake
+    thread = await fake.create_thread(harness.guild, harness.forum, "allocations")
+    await asyncio.sleep(0.1)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+
+        baseline_calls = handler_calls("on_message")
+        for index in range(messages):
+            await fake.send_user_message(thread, harness.members[index % len(harness.members)], f"alloc {index}")
+        await wait_for_handler_calls("on_message", baseline_calls + messages)
+
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    retained_blocks = sum(stat.count_diff for stat in diff)
+    retained_bytes = sum(stat.size_diff for stat in diff)
+
+    return {
+        "retained_blocks_per_msg": metric(retained_blocks / messages, "blocks", "lower"),
+        "retained_kib_per_msg": metric(retained_bytes / 1024 / messages, "KiB", "lower"),
+        "peak_kib_per_msg": metric(max(peak - start_current, 0) / 1024 / messages, "KiB", "lower"),
+    }
+
+
+async def bench_lock_latency(harness: BotHarness, locks: int, concurrency: int) -> Dict[str, Any]:
+    """Time from the 'lock' message leaving the gateway to the confirmation arriving at the REST API."""
+    fake = harness.fake
+    loop = asyncio.get_running_loop()
+    waiting: Dict[str, asyncio.Future] = {}
+
+    def on_post(channel_id: str, message: Dict[str, Any]) -> None:
+        future = waiting.pop(channel_id, None)
+        if future and not future.done():
+            future.set_result(time.perf_counter())
+
+    fake.on_message_posted(on_post)
+
+    async def lock_one(index: int) -> float:
+        thread = await fake.create_thread(harness.guild, harness.forum, f"lock-{index}")
+        waiting[thread["id"]] = loop.create_future()
+        future = waiting[thread["id"]]
+        sent = time.perf_counter()
+        await fake.send_user_message(thread, harness.moderators[index % len(harness.moderators)], "lock")
+        confirmed = await asyncio.wait_for(future, timeout=30)
+        return (confirmed - sent) * 1000
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for batch_start in range(0, locks, concurrency):
+        batch = range(batch_start, min(batch_start + concurrency, locks))
+        latencies.extend(await asyncio.gather(*(lock_one(index) for index in batch)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "locks_per_sec": metric(locks / elapsed, "locks/s", "higher"),
+        "lock_latency_p50_ms": metric(percentile(latencies, 50), "ms", "lower"),
+        "lock_latency_p99_ms": metric(percentile(latencies, 99), "ms", "lower"),
+        "lock_latency_mean_ms": metric(statistics.fmean(latencies), "ms", "lower"),
+    }
+
+
+async def run_suite(args) -> Dict[str, Any]:
+    fake = FakeDiscord(
+        latency_ms=args.latency_ms,
+        rate_limit=args.rate_limit,
+        enforce_rate_limits=args.enforce_rate_limits
+    )
+    harness = BotHarness(fake, log_level=args.log_level)
+    harness.seed(moderators=5, members=50)
+
+    scale = 0.1 if args.quick else 1.0
+    metrics: Dict[str, Any] = {}
+    async with harness:
+        metrics.update(await bench_permission_check(harness, int(50000 * scale)))
+        metrics.update(await bench_on_message(harness, int(2000 * scale)))
+        metrics.update(await bench_allocations(harness, int(500 * scale)))
+        metrics.update(await bench_lock_latency(harness, int(200 * scale), args.concurrency))
+        rest_calls = dict(fake.request_counts)
+        rate_limited = fake.rate_limited
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+            "python": platform.python_version(),
+            "discord_py": discord.__version__,
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "concurrency": args.concurrency,
+            "quick": args.quick,
+            "rest_calls": rest_calls,
+            "rate_limited_responses": rate_limited,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond the tolerance."""
+    regressions = []
+    for name, current in results["metrics"].items():
+        previous = baseline.get("metrics", {}).get(name)
+        if not previous or not previous["value"]:
+            continue
+
+        change = (current["value"] - previous["value"]) / previous["value"]
+        worse = -change if current["better"] == "higher" else change
+        if worse > tolerance:
+            regressions.append(
+                f"{name}: {previous['value']} -> {current['value']} {current['unit']} ({worse:+.0%} worse)"
+            )
+    return regressions
+
+
+def print_results(results: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    print(f"\n📊 Benchmark results (latency {results['meta']['latency_ms']}ms)")
+    for name, current in results["metrics"].items():
+        line = f"  {name:<28} {current['value']:>12} {current['unit']}"
+        previous = (baseline or {}).get("metrics", {}).get(name)
+        if previous and previous["value"]:
+            line += f"   (baseline {previous['value']}, {(current['value'] - previous['value']) / previous['value']:+.1%})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thread Lock Bot benchmark suite')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Simulated REST latency per request (default: 0)')
+    parser.add_argument('--rate-limit', type=int, default=50,
+                        help='Requests per bucket per second advertised by the fake (default: 50)')
+    parser.add_argument('--enforce-rate-limits', action='store_true',
+                        help='Answer 429 when a bucket is exhausted')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Concurrent lock requests in the latency benchmark (default: 10)')
+    parser.add_argument('--quick', action='store_true', help='Run a tenth of the iterations')
+    parser.add_argument('--baseline', default=None,
+                        help='Baseline file (default: benchmarks/baselines/latency_<N>ms.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative regression before failing (default: 0.25)')
+    parser.add_argument('--output', default=None, help='Also write results to this JSON file')
+    parser.add_argument('--log-level', default='WARNING', help='Bot log level during the run')
+    args = parser.parse_args()
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"latency_{args.latency_ms:g}ms.json")
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = asyncio.run(run_suite(args))
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"\n💾 Baseline saved to {baseline_path}")
+        return
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+    else:
+        print(f"\nℹ️  No baseline at {baseline_path}; run with --save-baseline to create one")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,31 @@ Main Discord bot class for thread auto-lock functionality.
 
 import discord
 from discord.ext import commands
+import asyncio
+import signal
+import time
 import logging
 import json
 from config import Config
 from handlers.thread_handler import ThreadHandler
 from handlers.permission_handler import PermissionHandler
+from handlers.history_handler import HistoryHandler
+from handlers.purge_handler import PurgeHandler
+from utils.performance import performance_monitor, timed_handler
+from utils.tracing import tracer
+from utils.action_store import action_store
+from utils.moderator_stats import moderator_stats
+from utils.snapshot import load_snapshot, save_snapshot
+from utils import gateway_session
+from utils.thread_archive import ThreadArchiver
+from utils.warmup import GuildWarmup
+from utils.health import THRESHOLDS, health
+from utils.event_stream import event_stream
+from utils.http_metrics import http_metrics
+from utils.policy_admin import policy_admin
+from utils.guild_scheduler import guild_scheduler
+from utils.load_shedding import load_shedder
+from utils.notices import notices
 
 class ThreadLockBot(commands.Bot):
     """Discord bot for auto-locking threads based on role permissions."""
@@ -20,23 +40,134 @@ class ThreadLockBot(commands.Bot):
         intents.guilds = True
         intents.members = True
         
+        # The presence is sent with IDENTIFY, so reconnects keep it without another update
         super().__init__(
             command_prefix='!',
             intents=intents,
-            help_command=None
+            help_command=None,
+            http_trace=http_metrics.trace_config(),
+            activity=discord.Activity(
+                type=discord.ActivityType.watching,
+                name="for 'lock' and 'lna' commands"
+            )
         )
         
         self.logger = logging.getLogger(__name__)
         self.config = Config()
+        
+        # Per-route latency, retries and rate-limit buckets for every REST call
+        http_metrics.install(self.http)
         self.thread_handler = ThreadHandler(self)
         self.permission_handler = PermissionHandler(self.config)
+        self.history_handler = HistoryHandler(self)
+        self.purge_handler = PurgeHandler(self)
+        self.warmup = GuildWarmup(self, batch_size=self.config.get_setting("warmup_batch_size", 200))
+        self.archiver = None
+        if self.config.get_setting("thread_archive_enabled", False):
+            self.archiver = ThreadArchiver(
+                base_dir=self.config.get_setting("thread_archive_dir", "data/archives"),
+                max_bytes_per_guild=int(self.config.get_setting("thread_archive_max_mb_per_guild", 100) * 1024 * 1024),
+                concurrency=self.config.get_setting("thread_archive_concurrency", 2)
+            )
+        
+        # Shutdown state: in-flight lock work is tracked so close() can drain it
+        self.accepting = True
+        self._tasks = set()
+        self._restore_state = None
+        self._shutdown_task = None
+        
+        # Gateway session saved by the previous process, resumed on the first connection
+        self.resume_supported = gateway_session.install()
+        self.saved_gateway_session = None
+        self._warm_resume = False
+        
+        # Configure loop lag sampling and slow handler detection
+        performance_monitor.configure(
+            slow_threshold_ms=self.config.get_setting("slow_callback_threshold_ms"),
+            sample_interval_ms=self.config.get_setting("loop_lag_sample_interval_ms")
+        )
+        tracer.configure(capacity=self.config.get_setting("trace_buffer_size"))
+        guild_scheduler.configure(
+            max_concurrent=self.config.get_setting("scheduler_max_concurrent", 64),
+            per_guild=self.config.get_setting("scheduler_guild_concurrency", 8)
+        )
+        load_shedder.configure(
+            max_lag_ms=self.config.get_setting("load_shed_lag_ms", 500),
+            max_queue_depth=self.config.get_setting("load_shed_queue_depth", 200),
+            deferred_max=self.config.get_setting("load_shed_deferred_max", 500)
+        )
+        notices.configure(
+            ttl=self.config.get_setting("notice_ttl", 5),
+            sweep_interval=self.config.get_setting("notice_sweep_interval", 1)
+        )
+        health.configure(
+            interval=self.config.get_setting("health_publish_interval"),
+            limits={field: self.config.get_setting(key) for field, key in THRESHOLDS.items()}
+        )
+        action_store.configure(
+            db_path=self.config.get_setting("action_db_path"),
+            flush_interval=self.config.get_setting("action_flush_interval")
+        )
         
     async def setup_hook(self):
         """Called when the bot is starting up."""
         self.logger.info("Bot is setting up...")
         
+        # Shut down gracefully on SIGTERM/SIGINT (not supported on Windows event loops)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._request_shutdown, sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+        
+        # Resume the previous process's gateway session, seeding the guild cache it left behind
+        session = None
+        if self.resume_supported:
+            try:
+                session = await asyncio.to_thread(
+                    gateway_session.load_session,
+                    self.config.get_setting("gateway_session_path", "data/gateway_session.json"),
+                    self.user.id,
+                    self.config.get_setting("gateway_resume_max_age", 120)
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to load gateway session: {e}")
+        if session and gateway_session.seed_cache(self, session["guilds"]):
+            self.saved_gateway_session = session
+            self._warm_resume = True
+        
+        # Work left over by the previous process is resumed once guilds are cached
+        self._restore_state = await asyncio.to_thread(
+            load_snapshot, self.config.get_setting("snapshot_path", "data/snapshot.json")
+        )
+        
+        # Start event loop lag monitoring and publish health snapshots for /health
+        performance_monitor.start()
+        health.start(self.health_snapshot)
+        event_stream.start(self.config.get_setting("dashboard_counter_interval", 5))
+        load_shedder.start()
+        notices.start()
+        
+        # Serve guild settings to the admin API; its batches are recompiled here on the loop
+        policy_admin.attach(
+            self.config,
+            lambda guild_ids: loop.call_soon_threadsafe(self._recompile_guilds, guild_ids),
+            max_batch=self.config.get_setting("policy_api_max_batch", 1000)
+        )
+        
+        # Prepare the action store off the loop, seed counters, then start the batched writer
+        try:
+            await asyncio.to_thread(action_store.prepare)
+            moderator_stats.load(await asyncio.to_thread(action_store.load_counts, moderator_stats.oldest_day))
+        except Exception as e:
+            self.logger.error(f"Failed to prepare action store: {e}")
+        action_store.start()
+        
         # Add the thread handler cog
         await self.add_cog(self.thread_handler)
+        await self.add_cog(self.history_handler)
+        await self.add_cog(self.purge_handler)
         
         # Sync slash commands
         try:
@@ -45,27 +176,60 @@ class ThreadLockBot(commands.Bot):
         except Exception as e:
             self.logger.error(f"Failed to sync commands: {e}")
     
+    async def on_resumed(self):
+        """A resumed session from the previous process counts as becoming ready."""
+        if self._warm_resume:
+            self._warm_resume = False
+            self.logger.info(f"Resumed gateway session with {len(self.guilds)} cached guild(s)")
+            gateway_session.mark_ready(self)
+            self.dispatch('ready')
+    
     async def on_ready(self):
         """Called when the bot is ready."""
+        # A full IDENTIFY replaced the cached guilds, so there is nothing left to resume
+        self._warm_resume = False
         self.logger.info(f'{self.user} has connected to Discord!')
         self.logger.info(f'Bot is in {len(self.guilds)} guild(s)')
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for guild in self.guilds:
+                self.logger.debug(f'Guild: {guild.name} (ID: {guild.id})')
         
-        # Log guild information for configuration
-        for guild in self.guilds:
-            self.logger.info(f'Guild: {guild.name} (ID: {guild.id})')
+        # Warm guilds in the background; on reconnects only new guilds need it
+        self.warmup.start(self.guilds)
         
-        # Set bot status
-        await self.change_presence(
-            activity=discord.Activity(
-                type=discord.ActivityType.watching,
-                name="for 'lock' and 'lna' commands"
-            )
-        )
+        # Resume pending deletions and confirmation buttons from before the restart
+        if self._restore_state:
+            state, self._restore_state = self._restore_state, None
+            await self.thread_handler.restore(state)
+    
+    async def on_guild_join(self, guild):
+        self.warmup.warm_guild(guild)
+    
+    async def on_guild_remove(self, guild):
+        self.warmup.forget(guild.id)
+    
+    async def on_guild_role_create(self, role):
+        self.warmup.invalidate(role.guild)
+    
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self.warmup.invalidate(after.guild)
+    
+    async def on_guild_role_delete(self, role):
+        self.warmup.invalidate(role.guild)
     
+    def _recompile_guilds(self, guild_ids):
+        """Recompile the policies of guilds whose settings the admin API replaced."""
+        for guild_id in guild_ids:
+            guild = self.get_guild(guild_id)
+            if guild is not None:
+                self.warmup.warm_guild(guild)
+    
+    @timed_handler("on_message")
     async def on_message(self, message):
         """Handle incoming messages for lock/lna commands."""
-        # Ignore messages from bots
-        if message.author.bot:
+        # Ignore messages from bots, and everything once shutdown has begun
+        if message.author.bot or not self.accepting:
             return
         
         # Check if message is in a thread
@@ -73,23 +237,177 @@ class ThreadLockBot(commands.Bot):
             await self.process_commands(message)
             return
         
-        # Check for lock commands
-        content = message.content.lower().strip()
-        if content in ['lock', 'lna']:
-            # Check if user has permission
-            if not self.permission_handler.has_lock_permission(message.author, message.guild):
-                await message.channel.send(
-                    "❌ You don't have permission to lock threads.",
-                    delete_after=5
-                )
-                return
+        async with tracer.trace(
+            "lock",
+            guild_id=message.guild.id,
+            thread_id=message.channel.id,
+            moderator=message.author.name
+        ) as trace:
+            # Check for lock commands
+            async with trace.span("trigger_match"):
+                content = message.content.lower().strip()
+                is_lock_command = content in ['lock', 'lna']
             
-            # Handle thread locking
-            await self.thread_handler.handle_lock_request(message)
+            if not is_lock_command:
+                # Only lock attempts are worth keeping in the trace buffer
+                trace.discard()
+            else:
+                # Check if user has permission (warming the guild first if the background pass hasn't yet)
+                async with trace.span("permission_check"):
+                    if not self.warmup.is_warm(message.guild.id):
+                        self.warmup.warm_guild(message.guild)
+                    decision = self.permission_handler.check_lock(message.author, message.channel)
+                
+                if not decision.allowed:
+                    trace.annotate(outcome="denied", reason=decision.reason)
+                    if decision.reason == "too_new":
+                        notice = f"❌ Threads can only be locked once they are {decision.min_thread_age / 60:g} minutes old."
+                    else:
+                        notice = "❌ You don't have permission to lock threads."
+                    await notices.post(message.channel, message.author.id, notice, shed_kind="denied_notice")
+                    return
+                
+                # Handle thread locking
+                self.track_task(asyncio.current_task())
+                await self.thread_handler.handle_lock_request(message, decision)
         
         # Process other commands
         await self.process_commands(message)
     
+    def health_snapshot(self) -> dict:
+        """Cheap, loop-side view of the bot's state for the health publisher."""
+        now = time.monotonic()
+        ws = self.ws
+        connected = ws is not None and ws.open and self.is_ready() and not self.is_closed()
+        latency = self.latency
+        
+        def age(timestamp):
+            return round(now - timestamp, 3) if timestamp else None
+        
+        shards = getattr(self, "shards", None)
+        if shards:
+            shard_states = {
+                str(shard_id): {"connected": not shard.is_closed(), "latency_ms": round(shard.latency * 1000, 1)}
+                for shard_id, shard in shards.items()
+            }
+        else:
+            shard_states = {
+                str(getattr(ws, "shard_id", None) or 0): {
+                    "connected": connected,
+                    "latency_ms": round(latency * 1000, 1) if latency != float("inf") else None
+                }
+            }
+        
+        return {
+            "gateway_connected": connected,
+            "gateway_latency_ms": round(latency * 1000, 1) if latency != float("inf") else None,
+            "heartbeat_age_s": age(getattr(ws, "last_received", 0)),
+            "last_event_age_s": age(getattr(ws, "last_event", 0)),
+            "loop_lag_ms": round(performance_monitor.current_lag * 1000, 2),
+            "guilds": len(self.guilds),
+            "warmup": self.warmup.progress(),
+            "pending_deletes": len(self.thread_handler.pending_deletes),
+            "confirmations": len(self.thread_handler.confirmations),
+            "in_flight": len(self._tasks),
+            "guild_queue": guild_scheduler.queued_total(),
+            "shedding": load_shedder.under_pressure,
+            "notices": notices.stats()["active"],
+            "action_queue": action_store.stats()["queued"],
+            "accepting": self.accepting,
+            "shards": shard_states,
+        }
+    
+    def track_task(self, task: asyncio.Task) -> None:
+        """Keep a task doing lock work so shutdown can drain it."""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def _request_shutdown(self, sig) -> None:
+        if self._shutdown_task is None:
+            self.logger.info(f"Received {signal.Signals(sig).name}, shutting down")
+            self._shutdown_task = asyncio.create_task(self.close())
+        else:
+            # A second signal skips the drain
+            self.logger.warning("Shutdown already in progress; closing without waiting")
+            self.accepting = False
+            asyncio.create_task(super().close())
+    
+    async def drain(self) -> None:
+        """Finish in-flight lock work within the deadline and snapshot whatever is left."""
+        timeout = self.config.get_setting("shutdown_drain_timeout", 10)
+        deadline = time.time() + timeout
+        
+        # Auto-deletes due after the deadline are snapshotted rather than waited for,
+        # and bulk purges checkpoint once their in-flight deletions finish
+        self.thread_handler.cancel_pending_deletes(after=deadline)
+        self.purge_handler.stop_all("Interrupted by a bot restart.")
+        
+        pending = {task for task in self._tasks if task is not asyncio.current_task() and not task.done()}
+        if pending:
+            self.logger.info(f"Draining {len(pending)} in-flight lock request(s) (up to {timeout}s)")
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        if pending:
+            self.logger.warning(f"Cancelling {len(pending)} lock request(s) still running at the deadline")
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=1)
+        
+        # Clear the remaining notices while the HTTP session is still open
+        notices.stop()
+        try:
+            await notices.flush()
+        except Exception as e:
+            self.logger.error(f"Failed to clear notices: {e}")
+        
+        state = self.thread_handler.snapshot()
+        if any(state.values()):
+            path = self.config.get_setting("snapshot_path", "data/snapshot.json")
+            try:
+                await asyncio.to_thread(save_snapshot, path, state)
+                self.logger.info(
+                    f"Saved {len(state['pending_deletes'])} pending deletion(s) and "
+                    f"{len(state['confirmations'])} confirmation(s) to {path}"
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to write shutdown snapshot: {e}")
+    
+    async def close(self):
+        """Stop taking triggers, drain lock work, then shut down and flush the stores."""
+        if self.accepting:
+            self.accepting = False
+            try:
+                await self.drain()
+            except Exception as e:
+                self.logger.error(f"Error while draining: {e}")
+        
+        # Keep the gateway session resumable so the next process can skip IDENTIFY
+        resumable = self.is_ready() and isinstance(self.ws, gateway_session.ResumingWebSocket)
+        if resumable:
+            self.ws.keep_session = True
+        await super().close()
+        if resumable:
+            path = self.config.get_setting("gateway_session_path", "data/gateway_session.json")
+            try:
+                if await asyncio.to_thread(gateway_session.save_session, path, self.ws, self.user.id, self.guilds):
+                    self.logger.info(f"Saved gateway session at sequence {self.ws.sequence} to {path}")
+            except Exception as e:
+                self.logger.error(f"Failed to save gateway session: {e}")
+        if self.resume_supported:
+            gateway_session.uninstall()
+        health.stop()
+        event_stream.stop()
+        policy_admin.detach()
+        load_shedder.stop()
+        await asyncio.to_thread(action_store.close)
+        self.config.guilds.close()
+        
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+    
     async def on_command_error(self, ctx, error):
         """Handle command errors."""
         if isinstance(error, commands.CommandNotFound):
@@ -5,7 +5,13 @@ Configuration management for the Discord Thread Lock Bot.
 import json
 import logging
 import os
-from typing import Dict, List, Any
+import shutil
+from typing import Any, Dict, Iterable, List, Optional
+from utils.guild_config_store import GuildConfigStore
+from utils.lock_policy import CompiledPolicy, compile_policy
+
+# Sections of config.json that moved into the per-guild store
+LEGACY_GUILD_SECTIONS = ("guild_specific", "guild_specific_settings", "authorized_role_ids")
 
 class Config:
     """Handles bot configuration loading and management."""
@@ -14,6 +20,12 @@ class Config:
         self.config_file = config_file
         self.logger = logging.getLogger(__name__)
         self.config_data = self.load_config()
+        self.guilds = GuildConfigStore(
+            db_path=self.config_data.get("guild_config_db_path", "data/guild_configs.db"),
+            cache_size=self.config_data.get("guild_config_cache_size", 1024)
+        )
+        self.migrate_guild_sections()
+        self.seed_guilds()
 
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file."""
@@ -47,10 +59,95 @@ class Config:
             "embed_color": 0xFF5733,
             "delete_confirmation_timeout": 60,
             "auto_delete_channels": [],
-            "guild_specific": {},
-            "authorized_role_ids": {}
+            "slow_callback_threshold_ms": 250,
+            "loop_lag_sample_interval_ms": 500,
+            "trace_buffer_size": 256,
+            "action_db_path": "data/actions.db",
+            "action_flush_interval": 1.0,
+            "guild_config_db_path": "data/guild_configs.db",
+            "guild_config_cache_size": 1024,
+            "guild_config_seed_path": "data/guild_seed.json",
+            "shutdown_drain_timeout": 10,
+            "snapshot_path": "data/snapshot.json",
+            "gateway_session_path": "data/gateway_session.json",
+            "gateway_resume_max_age": 120,
+            "warmup_batch_size": 200,
+            "health_publish_interval": 0.25,
+            "health_max_snapshot_age_s": 5,
+            "health_max_gateway_latency_ms": 5000,
+            "health_max_heartbeat_age_s": 90,
+            "health_max_event_age_s": 0,
+            "health_max_loop_lag_ms": 2000,
+            "health_max_action_queue": 10000,
+            "dashboard_counter_interval": 5,
+            "purge_concurrency": 3,
+            "purge_delete_interval": 0.2,
+            "purge_progress_interval": 5,
+            "purge_checkpoint_dir": "data/purges",
+            "thread_archive_enabled": False,
+            "thread_archive_dir": "data/archives",
+            "thread_archive_max_mb_per_guild": 100,
+            "thread_archive_concurrency": 2,
+            "policy_api_max_batch": 1000,
+            "scheduler_max_concurrent": 64,
+            "scheduler_guild_concurrency": 8,
+            "load_shed_lag_ms": 500,
+            "load_shed_queue_depth": 200,
+            "load_shed_deferred_max": 500,
+            "notice_ttl": 5,
+            "notice_sweep_interval": 1
         }
 
+    def migrate_guild_sections(self) -> int:
+        """Move guild_specific and authorized_role_ids out of config.json into the per-guild store."""
+        if not any(self.config_data.get(section) for section in LEGACY_GUILD_SECTIONS):
+            return 0
+
+        records: Dict[str, Dict[str, Any]] = {}
+        for section in ("guild_specific", "guild_specific_settings"):
+            for guild_id, settings in self.config_data.get(section, {}).items():
+                if str(guild_id).isdigit() and isinstance(settings, dict):
+                    records.setdefault(str(guild_id), {}).update(settings)
+        for guild_id, role_ids in self.config_data.get("authorized_role_ids", {}).items():
+            if str(guild_id).isdigit():
+                records.setdefault(str(guild_id), {})["authorized_role_ids"] = list(role_ids)
+
+        try:
+            self.guilds.import_records(records)
+        except Exception as e:
+            self.logger.error(f"Error migrating guild settings, keeping them in {self.config_file}: {e}")
+            return 0
+
+        # Keep a copy of the pre-migration file, then drop the moved sections
+        if os.path.exists(self.config_file):
+            shutil.copyfile(self.config_file, f"{self.config_file}.bak")
+        for section in LEGACY_GUILD_SECTIONS:
+            self.config_data.pop(section, None)
+        self.save_config()
+        self.logger.info(f"Migrated settings for {len(records)} guild(s) to {self.guilds.db_path}")
+        return len(records)
+
+    def seed_guilds(self) -> int:
+        """Import the shipped guild settings into an empty per-guild store."""
+        seed_path = self.config_data.get("guild_config_seed_path")
+        if not seed_path or not os.path.exists(seed_path):
+            return 0
+        try:
+            if not self.guilds.is_empty():
+                return 0
+            with open(seed_path, 'r', encoding='utf-8') as f:
+                seed = json.load(f)
+            records = {
+                str(guild_id): settings for guild_id, settings in seed.items()
+                if str(guild_id).isdigit() and isinstance(settings, dict)
+            }
+            self.guilds.import_records(records)
+        except Exception as e:
+            self.logger.error(f"Error seeding guild settings from {seed_path}: {e}")
+            return 0
+        self.logger.info(f"Seeded settings for {len(records)} guild(s) from {seed_path}")
+        return len(records)
+
     def save_config(self) -> bool:
         """Save current configuration to file."""
         try:
@@ -64,28 +161,27 @@ class Config:
 
     def get_authorized_roles(self, guild_id: int = None) -> List[str]:
         """Get list of authorized role names."""
-        if guild_id and str(guild_id) in self.config_data.get("guild_specific", {}):
-            return self.config_data["guild_specific"][str(guild_id)].get("authorized_roles", 
-                                                                        self.config_data["authorized_roles"])
+        if guild_id:
+            return self.guilds.get(guild_id).get("authorized_roles", self.config_data["authorized_roles"])
         return self.config_data.get("authorized_roles", [])
 
+    def get_authorized_role_ids(self, guild_id: int) -> List[int]:
+        """Get the role IDs authorized in a guild."""
+        return self.guilds.get(guild_id).get("authorized_role_ids", [])
+
     def add_authorized_role(self, role_name: str, guild_id: int = None) -> bool:
         """Add a role to authorized roles list."""
         if guild_id:
             # Guild-specific configuration
-            if "guild_specific" not in self.config_data:
-                self.config_data["guild_specific"] = {}
-            if str(guild_id) not in self.config_data["guild_specific"]:
-                self.config_data["guild_specific"][str(guild_id)] = {"authorized_roles": []}
-
-            roles = self.config_data["guild_specific"][str(guild_id)]["authorized_roles"]
+            roles = list(self.guilds.get(guild_id).get("authorized_roles", []))
             if role_name not in roles:
                 roles.append(role_name)
-                return self.save_config()
+                return self.update_guild_settings(guild_id, authorized_roles=roles)
         else:
             # Global configuration
             if role_name not in self.config_data["authorized_roles"]:
                 self.config_data["authorized_roles"].append(role_name)
+                self.guilds.invalidate_compiled()
                 return self.save_config()
         return False
 
@@ -93,16 +189,15 @@ class Config:
         """Remove a role from authorized roles list."""
         if guild_id:
             # Guild-specific configuration
-            if ("guild_specific" in self.config_data and 
-                str(guild_id) in self.config_data["guild_specific"]):
-                roles = self.config_data["guild_specific"][str(guild_id)]["authorized_roles"]
-                if role_name in roles:
-                    roles.remove(role_name)
-                    return self.save_config()
+            roles = list(self.guilds.get(guild_id).get("authorized_roles", []))
+            if role_name in roles:
+                roles.remove(role_name)
+                return self.update_guild_settings(guild_id, authorized_roles=roles)
         else:
             # Global configuration
             if role_name in self.config_data["authorized_roles"]:
                 self.config_data["authorized_roles"].remove(role_name)
+                self.guilds.invalidate_compiled()
                 return self.save_config()
         return False
 
@@ -112,11 +207,37 @@ class Config:
 
     def get_guild_setting(self, guild_id: int, key: str, default=None):
         """Get a guild-specific setting."""
-        guild_settings = self.config_data.get("guild_specific_settings", {})
-        guild_data = guild_settings.get(str(guild_id), {})
-        return guild_data.get(key, default)
+        return self.guilds.get(guild_id).get(key, default)
 
     def get_guild_settings(self, guild_id: int):
         """Get all guild-specific settings."""
-        guild_settings = self.config_data.get("guild_specific_settings", {})
-        return guild_settings.get(str(guild_id), {})
\ No newline at end of file
+        return self.guilds.get(guild_id)
+
+    def get_lock_policy(self, guild_id: int, roles: Optional[Iterable] = None) -> CompiledPolicy:
+        """The guild's lock rules compiled into a decision table (cached with the guild's settings).
+
+        Passing the guild's ``roles`` resolves role names to IDs when the table is compiled.
+        """
+        if roles is None:
+            return self.guilds.get_compiled(guild_id, self._compile_lock_policy)
+        return self.guilds.get_compiled(
+            guild_id, lambda settings: self._compile_lock_policy(settings, {role.name: role.id for role in roles})
+        )
+
+    def _compile_lock_policy(self, settings: Dict[str, Any],
+                             role_ids: Optional[Dict[str, int]] = None) -> CompiledPolicy:
+        return compile_policy(
+            settings,
+            authorized_roles=self.config_data.get("authorized_roles", []),
+            auto_delete_channels=self.config_data.get("auto_delete_channels", []),
+            role_ids=role_ids
+        )
+
+    def update_guild_settings(self, guild_id: int, **changes) -> bool:
+        """Change settings for one guild, writing only that guild's record."""
+        try:
+            self.guilds.update(guild_id, **changes)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving settings for guild {guild_id}: {e}")
+            return False
@@ -0,0 +1,240 @@
+"""
+Moderation history commands: per-moderator statistics and lock history search.
+"""
+
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import shlex
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from utils.action_store import action_store
+from utils.moderator_stats import SECONDS_PER_DAY, moderator_stats, parse_period
+from utils.performance import timed_handler
+
+ACTION_LABELS = {
+    "LOCK": "🔒 Locked",
+    "UNLOCK": "🔓 Unlocked",
+    "DELETE": "🗑️ Deleted",
+    "AUTO_DELETE": "⏱️ Auto-deleted",
+}
+
+HISTORY_PAGE_SIZE = 10
+MIN_TERM_LENGTH = 3
+
+
+def parse_time_filter(value: str) -> Optional[float]:
+    """Turn a period ('week', '14d') into its start time, or a YYYY-MM-DD date into midnight UTC."""
+    days = parse_period(value)
+    if days is not None:
+        return time.time() - days * SECONDS_PER_DAY
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_history_query(query: str) -> Dict[str, Any]:
+    """Split a search into terms and ``since:``/``until:``/``action:`` filters.
+
+    Raises ValueError with a user-facing message for malformed filters.
+    """
+    try:
+        tokens = shlex.split(query)
+    except ValueError:
+        tokens = query.split()
+
+    search: Dict[str, Any] = {"terms": [], "since": None, "until": None, "actions": []}
+    for token in tokens:
+        key, _, value = token.partition(":")
+        key = key.lower()
+        if value and key in ("since", "until"):
+            parsed = parse_time_filter(value)
+            if parsed is None:
+                raise ValueError(f"Invalid `{key}:` value `{value}`. Use `week`, `14d` or a date like `2024-05-01`.")
+            search[key] = parsed
+        elif value and key == "action":
+            search["actions"].append(value.upper())
+        elif len(token) < MIN_TERM_LENGTH:
+            raise ValueError(f"Search terms must be at least {MIN_TERM_LENGTH} characters long.")
+        else:
+            search["terms"].append(token)
+    return search
+
+
+class LockHistoryView(discord.ui.View):
+    """Previous/next buttons for paging through lock history results."""
+
+    def __init__(self, handler: "HistoryHandler", ctx: commands.Context, search: Dict[str, Any],
+                 rows: List[sqlite3.Row]):
+        super().__init__(timeout=300)
+        self.handler = handler
+        self.ctx = ctx
+        self.search = search
+        self.rows = rows
+        # before_id that produced each page, newest page first
+        self.page_starts: List[Optional[int]] = [None]
+        self.message: Optional[discord.Message] = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = len(self.page_starts) == 1
+        self.next_page.disabled = len(self.rows) <= HISTORY_PAGE_SIZE
+
+    async def _show(self, interaction: discord.Interaction, before_id: Optional[int]):
+        if interaction.user.id != self.ctx.author.id:
+            await interaction.response.send_message(
+                "❌ Only the moderator who ran this search can change pages.",
+                ephemeral=True
+            )
+            return False
+
+        self.rows = await self.handler.fetch_history(self.ctx.guild, self.search, before_id)
+        self._update_buttons()
+        embed = self.handler.history_embed(self.search, self.rows, len(self.page_starts))
+        await interaction.response.edit_message(embed=embed, view=self)
+        return True
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.secondary, emoji="◀️")
+    @timed_handler("LockHistoryView.previous_page")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Go back to the previous (newer) page."""
+        removed = self.page_starts.pop()
+        if not await self._show(interaction, self.page_starts[-1]):
+            self.page_starts.append(removed)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.secondary, emoji="▶️")
+    @timed_handler("LockHistoryView.next_page")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Go to the next (older) page."""
+        self.page_starts.append(self.rows[HISTORY_PAGE_SIZE - 1]["id"])
+        if not await self._show(interaction, self.page_starts[-1]):
+            self.page_starts.pop()
+
+    async def on_timeout(self):
+        """Disable paging once the view expires."""
+        for item in self.children:
+            item.disabled = True
+
+        try:
+            await self.message.edit(view=self)
+        except:
+            pass  # Message might have been deleted
+
+class HistoryHandler(commands.Cog):
+    """Answers questions about past moderation actions."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _format_actions(actions: dict) -> str:
+        """Render per-action counts in a stable order."""
+        ordered = [action for action in ACTION_LABELS if action in actions]
+        ordered += sorted(action for action in actions if action not in ACTION_LABELS)
+        return "\n".join(f"{ACTION_LABELS.get(action, action)}: **{actions[action]}**" for action in ordered)
+
+    @commands.command(name="lockstats")
+    @commands.has_permissions(manage_threads=True)
+    async def lock_stats(self, ctx, user: Optional[discord.Member] = None, period: str = "week"):
+        """Show how many threads moderators locked or deleted over a period."""
+        days = parse_period(period)
+        if days is None:
+            await ctx.send("❌ Invalid period. Use `today`, `week`, `month`, `year` or a number of days like `14d`.")
+            return
+
+        period_label = "today" if days == 1 else f"the last {days} days"
+
+        if user:
+            actions = moderator_stats.moderator_totals(ctx.guild.id, user.id, days)
+            embed = discord.Embed(
+                title=f"📊 Lock Stats for {user.display_name}",
+                description=self._format_actions(actions) if actions else f"No actions {period_label}.",
+                color=0x3498DB
+            )
+            embed.set_footer(text=f"Period: {period_label} (UTC days)")
+            await ctx.send(embed=embed)
+            return
+
+        totals = moderator_stats.guild_totals(ctx.guild.id, days)
+        embed = discord.Embed(
+            title="📊 Lock Stats",
+            description=None if totals else f"No actions {period_label}.",
+            color=0x3498DB
+        )
+
+        # Busiest moderators first, by total actions
+        ranked = sorted(totals.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        for moderator_id, actions in ranked[:10]:
+            member = ctx.guild.get_member(moderator_id)
+            name = member.display_name if member else moderator_stats.names.get(moderator_id, str(moderator_id))
+            embed.add_field(name=name, value=self._format_actions(actions), inline=True)
+
+        if len(ranked) > 10:
+            embed.set_footer(text=f"Period: {period_label} (UTC days) • showing top 10 of {len(ranked)} moderators")
+        else:
+            embed.set_footer(text=f"Period: {period_label} (UTC days)")
+        await ctx.send(embed=embed)
+
+    async def fetch_history(self, guild: discord.Guild, search: Dict[str, Any],
+                            before_id: Optional[int] = None) -> List[sqlite3.Row]:
+        """One page of results plus one extra row to tell whether an older page exists."""
+        return await asyncio.to_thread(
+            action_store.search,
+            guild.id,
+            guild.name,
+            terms=search["terms"],
+            since=search["since"],
+            until=search["until"],
+            actions=search["actions"],
+            before_id=before_id,
+            limit=HISTORY_PAGE_SIZE + 1
+        )
+
+    def history_embed(self, search: Dict[str, Any], rows: List[sqlite3.Row], page: int) -> discord.Embed:
+        """Render one page of lock history."""
+        title = "🔎 Lock History"
+        if search["terms"]:
+            title += f": {' '.join(search['terms'])}"[:240]
+        embed = discord.Embed(
+            title=title,
+            description=None if rows else "No matching actions found.",
+            color=0x3498DB
+        )
+
+        for row in rows[:HISTORY_PAGE_SIZE]:
+            value = f"<t:{int(row['ts'])}:f> by **{row['moderator'] or 'unknown'}**"
+            if row["info"]:
+                value += f"\n{row['info']}"
+            embed.add_field(
+                name=f"{ACTION_LABELS.get(row['action'], row['action'])}: {row['thread_name'] or 'unknown'}"[:256],
+                value=value[:1024],
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {page} • newest first")
+        return embed
+
+    @commands.command(name="lockhistory")
+    @commands.has_permissions(manage_threads=True)
+    async def lock_history(self, ctx, *, query: str = ""):
+        """Search past lock, unlock and delete actions by thread name, moderator or details."""
+        try:
+            search = parse_history_query(query)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}")
+            return
+
+        try:
+            rows = await self.fetch_history(ctx.guild, search)
+        except sqlite3.Error as e:
+            self.logger.error(f"Lock history search failed: {e}")
+            await ctx.send("❌ Lock history is not available right now.")
+            return
+
+        view = LockHistoryView(self, ctx, search, rows)
+        view.message = await ctx.send(embed=self.history_embed(search, rows, 1), view=view)
@@ -4,7 +4,8 @@ Permission handling for thread lock operations.
 
 import discord
 import logging
-from typing import List
+from typing import List, Set
+from utils.lock_policy import CompiledPolicy, LockDecision
 
 class PermissionHandler:
     """Handles permission checking for thread lock operations."""
@@ -13,37 +14,36 @@ class PermissionHandler:
         self.config = config
         self.logger = logging.getLogger(__name__)
     
-    def has_lock_permission(self, user: discord.Member, guild: discord.Guild) -> bool:
-        """Check if a user has permission to lock threads."""
-        # Check if user is administrator
-        if user.guild_permissions.administrator:
-            return True
-        
-        # Check if user has manage_threads permission
-        if user.guild_permissions.manage_threads:
-            return True
-        
-        # Check if user has any of the authorized roles
-        authorized_roles = self.config.get_authorized_roles(guild.id)
-        user_roles = [role.name for role in user.roles]
+    def has_lock_permission(self, user: discord.Member, guild: discord.Guild, channel_id: int = None) -> bool:
+        """Check if a user has permission to lock threads (in ``channel_id`` when given)."""
+        staff = user.guild_permissions.administrator or user.guild_permissions.manage_threads
+        policy = self.config.get_lock_policy(guild.id, guild.roles)
+        decision = policy.evaluate(self.role_keys(user, policy), channel_id, staff=staff)
         
-        for role_name in authorized_roles:
-            if role_name in user_roles:
-                self.logger.debug(f"User {user.name} has authorized role: {role_name}")
-                return True
-        
-        # Check for role IDs if configured
-        authorized_role_ids = self.config.get_setting("authorized_role_ids", {})
-        guild_role_ids = authorized_role_ids.get(str(guild.id), [])
-        user_role_ids = [role.id for role in user.roles]
-        
-        for role_id in guild_role_ids:
-            if role_id in user_role_ids:
-                self.logger.debug(f"User {user.name} has authorized role ID: {role_id}")
-                return True
+        if not decision.allowed:
+            self.logger.debug(f"User {user.name} does not have lock permissions")
+        return decision.allowed
+    
+    def check_lock(self, user: discord.Member, thread: discord.Thread) -> LockDecision:
+        """Evaluate the guild's lock rules for a lock request in a thread."""
+        staff = user.guild_permissions.administrator or user.guild_permissions.manage_threads
+        created_at = thread.created_at or discord.utils.snowflake_time(thread.id)
+        thread_age = (discord.utils.utcnow() - created_at).total_seconds()
         
-        self.logger.debug(f"User {user.name} does not have lock permissions")
-        return False
+        policy = self.config.get_lock_policy(thread.guild.id, thread.guild.roles)
+        decision = policy.evaluate(
+            self.role_keys(user, policy), thread.parent_id, staff=staff, thread_age=thread_age
+        )
+        if not decision.allowed:
+            self.logger.debug(f"Lock by {user.name} in '{thread.name}' refused: {decision.reason}")
+        return decision
+    
+    @staticmethod
+    def role_keys(user: discord.Member, policy: CompiledPolicy) -> Set:
+        """The member's roles as the policy matches them: IDs, plus names if they weren't resolved."""
+        if policy.by_id:
+            return {role.id for role in user.roles}
+        return {key for role in user.roles for key in (role.id, role.name)}
     
     def get_user_roles(self, user: discord.Member) -> List[str]:
         """Get list of role names for a user."""
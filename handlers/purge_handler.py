@@ -0,0 +1,354 @@
+"""
+Bulk purge of locked threads with bounded concurrency, progress reports and checkpoints.
+"""
+
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+from utils.guild_scheduler import guild_scheduler
+from utils.load_shedding import load_shedder
+from utils.http_metrics import http_metrics
+from utils.logger import log_thread_action
+from utils.moderator_stats import SECONDS_PER_DAY, parse_period
+from utils.snapshot import load_snapshot, save_snapshot
+from utils.thread_archive import ArchiveFailed
+
+# Route whose 429s slow the purge down
+DELETE_ROUTE = "DELETE /channels/{channel_id}"
+
+# Checkpoints older than this are not resumed
+CHECKPOINT_MAX_AGE = 7 * SECONDS_PER_DAY
+
+# Resumed listings start just after the cursor, so threads archived at the same instant are listed again
+CURSOR_OVERLAP = timedelta(milliseconds=1)
+
+
+def last_activity(thread: discord.Thread) -> float:
+    """Time of the thread's last message, or of its creation when it has none."""
+    if thread.last_message_id:
+        return discord.utils.snowflake_time(thread.last_message_id).timestamp()
+    created_at = thread.created_at or discord.utils.snowflake_time(thread.id)
+    return created_at.timestamp()
+
+
+class PurgeJob:
+    """State of one purge; what ``checkpoint()`` returns is enough to resume it."""
+
+    def __init__(self, guild_id: int, channel_id: int, moderator_id: int, cutoff: Optional[float],
+                 older_than: Optional[str], state: Dict[str, Any] = None):
+        state = state or {}
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.moderator_id = moderator_id
+        self.cutoff = state.get("cutoff", cutoff)
+        self.older_than = state.get("older_than", older_than)
+        self.phase = state.get("phase", "active")
+        # archive_timestamp up to which every archived thread has been handled
+        self.before: Optional[str] = state.get("before")
+        # Threads archived exactly at ``before`` that were already handled
+        self.before_ids: List[int] = state.get("before_ids", [])
+        self.scanned = state.get("scanned", 0)
+        self.deleted = state.get("deleted", 0)
+        self.failed = state.get("failed", 0)
+        self.started_at = state.get("started_at", time.time())
+        self.resumed = bool(state)
+
+        # Why the purge is stopping early, once asked to
+        self.stopping: Optional[str] = None
+        self.interval = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+            "moderator_id": self.moderator_id,
+            "cutoff": self.cutoff,
+            "older_than": self.older_than,
+            "phase": self.phase,
+            "before": self.before,
+            "before_ids": self.before_ids,
+            "scanned": self.scanned,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "started_at": self.started_at,
+        }
+
+
+class PurgeHandler(commands.Cog):
+    """Deletes locked threads in bulk."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.logger = logging.getLogger(__name__)
+        self.jobs: Dict[int, PurgeJob] = {}
+
+    def _setting(self, key: str, default):
+        return self.bot.config.get_setting(key, default)
+
+    def _checkpoint_path(self, channel_id: int) -> str:
+        return os.path.join(self._setting("purge_checkpoint_dir", "data/purges"), f"{channel_id}.json")
+
+    async def _save_checkpoint(self, job: PurgeJob) -> None:
+        try:
+            await asyncio.to_thread(save_snapshot, self._checkpoint_path(job.channel_id), job.checkpoint())
+        except OSError as e:
+            self.logger.error(f"Failed to write purge checkpoint: {e}")
+
+    def _progress_embed(self, job: PurgeJob, channel, done: bool = False, error: str = None) -> discord.Embed:
+        if error:
+            title, color = "⚠️ Purge Stopped", 0xE67E22
+        elif done:
+            title, color = "✅ Purge Complete", 0x00FF00
+        else:
+            title, color = "🧹 Purging Locked Threads", 0x3498DB
+
+        elapsed = max(time.time() - job.started_at, 0.001)
+        embed = discord.Embed(title=title, color=color)
+        embed.add_field(name="Channel", value=channel.mention, inline=True)
+        embed.add_field(name="Older than", value=job.older_than or "any age", inline=True)
+        embed.add_field(name="Scanned", value=str(job.scanned), inline=True)
+        embed.add_field(name="Deleted", value=str(job.deleted), inline=True)
+        embed.add_field(name="Failed", value=str(job.failed), inline=True)
+        embed.add_field(name="Rate", value=f"{job.deleted / elapsed:.1f}/s", inline=True)
+        if error:
+            embed.description = f"{error}\nRun the command again to resume."
+        elif not done:
+            embed.set_footer(text=f"Scanning {job.phase} threads")
+        return embed
+
+    def _matches(self, job: PurgeJob, thread: discord.Thread) -> bool:
+        if not thread.locked or thread.parent_id != job.channel_id:
+            return False
+        # Threads waiting on a scheduled auto-delete are left to it
+        if thread.id in self.bot.thread_handler.pending_deletes:
+            return False
+        return job.cutoff is None or last_activity(thread) < job.cutoff
+
+    async def _delete(self, job: PurgeJob, thread: discord.Thread, moderator: discord.Member) -> None:
+        try:
+            # Archived first when archiving is enabled, as for any other deletion
+            archived = await self.bot.thread_handler.archive_before_delete(thread)
+
+            # Deleting needs only Manage Threads, so the thread is not unlocked first
+            async with guild_scheduler.slot(job.guild_id):
+                await thread.delete()
+            job.deleted += 1
+            log_thread_action(
+                action="DELETE",
+                thread_name=thread.name,
+                moderator=moderator.name,
+                guild_name=thread.guild.name,
+                additional_info="Bulk purge of locked threads" + (f"; {archived}" if archived else ""),
+                guild_id=thread.guild.id,
+                thread_id=thread.id,
+                moderator_id=moderator.id
+            )
+        except ArchiveFailed:
+            job.failed += 1
+            self.logger.warning(f"Purge kept thread '{thread.name}' because it could not be archived")
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            job.failed += 1
+            self.logger.warning(f"Purge could not delete thread '{thread.name}': {e}")
+        except Exception as e:
+            job.failed += 1
+            self.logger.error(f"Error purging thread '{thread.name}': {e}")
+
+    async def _run(self, job: PurgeJob, channel, moderator: discord.Member, status: discord.Message) -> None:
+        concurrency = max(1, self._setting("purge_concurrency", 3))
+        base_interval = self._setting("purge_delete_interval", 0.2)
+        progress_interval = self._setting("purge_progress_interval", 5)
+        job.interval = base_interval
+
+        # Bounded queue: paging stays only a little ahead of the deleting workers
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        completed = set()
+        order = deque()
+        next_sequence = 0
+
+        async def worker():
+            while True:
+                sequence, thread = await queue.get()
+                try:
+                    rate_limited = self._rate_limited()
+                    await self._delete(job, thread, moderator)
+                    # Back off while Discord answers with 429s, recover slowly once it stops
+                    if self._rate_limited() > rate_limited:
+                        job.interval = min(5.0, max(job.interval * 2, 0.5))
+                    else:
+                        job.interval = max(base_interval, job.interval * 0.9)
+                    await asyncio.sleep(job.interval)
+                finally:
+                    completed.add(sequence)
+                    queue.task_done()
+
+        def advance_cursor():
+            # Move the checkpoint past every archived thread handled without gaps
+            while order and order[0][0] in completed:
+                sequence, archived_at, thread_id = order.popleft()
+                completed.discard(sequence)
+                if archived_at:
+                    if archived_at != job.before:
+                        job.before = archived_at
+                        job.before_ids = []
+                    job.before_ids.append(thread_id)
+
+        last_report = time.monotonic()
+
+        async def report_progress():
+            nonlocal last_report
+            if time.monotonic() - last_report < progress_interval:
+                return
+            last_report = time.monotonic()
+            await self._save_checkpoint(job)
+            # Interim progress is cosmetic; the final embed is always sent
+            if not load_shedder.should_shed("progress_embed"):
+                try:
+                    await status.edit(embed=self._progress_embed(job, channel))
+                except discord.HTTPException:
+                    pass
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        error = None
+        cancelled = False
+        try:
+            if job.phase == "active":
+                for thread in list(channel.threads):
+                    if job.stopping:
+                        break
+                    job.scanned += 1
+                    if self._matches(job, thread):
+                        order.append((next_sequence, None, thread.id))
+                        await queue.put((next_sequence, thread))
+                        next_sequence += 1
+                    await report_progress()
+                await queue.join()
+                advance_cursor()
+                if not job.stopping:
+                    job.phase = "archived"
+                    await self._save_checkpoint(job)
+
+            if job.phase == "archived":
+                before = datetime.fromisoformat(job.before) + CURSOR_OVERLAP if job.before else None
+                handled = set(job.before_ids)
+                async for thread in channel.archived_threads(limit=None, before=before):
+                    if job.stopping:
+                        break
+                    if thread.id in handled:
+                        continue
+                    job.scanned += 1
+                    archived_at = thread.archive_timestamp.isoformat() if thread.archive_timestamp else None
+                    order.append((next_sequence, archived_at, thread.id))
+                    if self._matches(job, thread):
+                        await queue.put((next_sequence, thread))
+                    else:
+                        completed.add(next_sequence)
+                    next_sequence += 1
+                    advance_cursor()
+                    await report_progress()
+
+            await queue.join()
+            advance_cursor()
+            if job.stopping:
+                error = job.stopping
+        except asyncio.CancelledError:
+            error = "Interrupted by a bot restart."
+            cancelled = True
+            raise
+        except discord.HTTPException as e:
+            error = f"Discord error while listing threads: {e}"
+            self.logger.error(f"Purge in #{channel.name} failed: {e}")
+        finally:
+            for task in workers:
+                task.cancel()
+            self.jobs.pop(job.channel_id, None)
+
+            if cancelled:
+                # Shutdown cancels this task and may stop the loop before an await here
+                # resumes, so the checkpoint is written before the first await
+                try:
+                    save_snapshot(self._checkpoint_path(job.channel_id), job.checkpoint())
+                except OSError as e:
+                    self.logger.error(f"Failed to write purge checkpoint: {e}")
+            elif error:
+                await self._save_checkpoint(job)
+            else:
+                try:
+                    os.remove(self._checkpoint_path(job.channel_id))
+                except OSError:
+                    pass
+            self.logger.info(
+                f"Purge in #{channel.name}: scanned {job.scanned}, deleted {job.deleted}, failed {job.failed}"
+                + (f" ({error})" if error else "")
+            )
+            try:
+                await status.edit(embed=self._progress_embed(job, channel, done=not error, error=error))
+            except (discord.HTTPException, asyncio.CancelledError):
+                pass
+
+    def stop_all(self, reason: str) -> int:
+        """Ask every running purge to stop after its in-flight deletions; each saves a checkpoint."""
+        for job in self.jobs.values():
+            job.stopping = reason
+        return len(self.jobs)
+
+    @staticmethod
+    def _rate_limited() -> int:
+        stats = http_metrics.routes.get(DELETE_ROUTE)
+        return stats.rate_limited if stats else 0
+
+    @commands.command(name="purgelocked")
+    @commands.has_permissions(manage_threads=True)
+    async def purge_locked(self, ctx, channel: Union[discord.ForumChannel, discord.TextChannel],
+                           older_than: Optional[str] = None):
+        """Delete locked threads in a channel, optionally only those inactive for a period.
+
+        Running it again for a channel whose purge was interrupted resumes that purge;
+        ``stop`` as the second argument stops a running one.
+        """
+        running = self.jobs.get(channel.id)
+        if older_than and older_than.lower() == "stop":
+            if running:
+                running.stopping = f"Stopped by {ctx.author.display_name}."
+                await ctx.send(f"🛑 Stopping the purge in {channel.mention}; progress is saved.")
+            else:
+                await ctx.send(f"❌ No purge is running in {channel.mention}.")
+            return
+        if running:
+            await ctx.send(f"❌ A purge is already running in {channel.mention}.")
+            return
+
+        cutoff = None
+        if older_than:
+            days = parse_period(older_than)
+            if days is None:
+                await ctx.send("❌ Invalid age. Use `week`, `month`, `year` or a number of days like `30d`.")
+                return
+            cutoff = time.time() - days * SECONDS_PER_DAY
+
+        state = await asyncio.to_thread(load_snapshot, self._checkpoint_path(channel.id), CHECKPOINT_MAX_AGE)
+        if state and older_than and state.get("older_than") != older_than:
+            # A different age filter is a new purge
+            state = None
+        job = PurgeJob(ctx.guild.id, channel.id, ctx.author.id, cutoff, older_than, state)
+        self.jobs[channel.id] = job
+        try:
+            await self._save_checkpoint(job)
+            status = await ctx.send(embed=self._progress_embed(job, channel))
+            if job.resumed:
+                await ctx.send(f"↩️ Resuming the earlier purge ({job.deleted} already deleted).")
+        except BaseException:
+            # _run never started, so nothing else will release the channel
+            self.jobs.pop(channel.id, None)
+            raise
+        job.task = asyncio.current_task()
+        self.bot.track_task(job.task)
+        await self._run(job, channel, ctx.author, status)
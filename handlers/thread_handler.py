@@ -6,19 +6,34 @@ import discord
 from discord.ext import commands
 import logging
 import asyncio
+import contextvars
+import time
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+from utils.guild_scheduler import guild_scheduler
+from utils.load_shedding import load_shedder
+from utils.lock_policy import LockDecision
+from utils.notices import notices
 from utils.logger import log_thread_action
+from utils.performance import timed_handler
+from utils.thread_archive import ArchiveFailed
+from utils.tracing import current_trace, span, tracer
 
 class DeleteThreadView(discord.ui.View):
     """View for thread deletion confirmation."""
 
-    def __init__(self, thread: discord.Thread, moderator: discord.Member):
-        super().__init__(timeout=60)
+    def __init__(self, thread: discord.Thread, moderator: discord.Member, timeout: Optional[float] = 60,
+                 expires_at: Optional[float] = None):
+        # Restored views are registered as persistent (no timeout) and expired by ThreadHandler
+        super().__init__(timeout=timeout)
         self.thread = thread
         self.moderator = moderator
+        self.expires_at = expires_at or time.time() + (timeout or 0)
+        self.message: Optional[discord.Message] = None
         self.logger = logging.getLogger(__name__)
 
-    @discord.ui.button(label="Delete", style=discord.ButtonStyle.danger, emoji="🗑️")
+    @discord.ui.button(label="Delete", style=discord.ButtonStyle.danger, emoji="🗑️", custom_id="thread_lock:delete")
+    @timed_handler("DeleteThreadView.delete_thread")
     async def delete_thread(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle thread deletion."""
         # Check if the user clicking is the same as the one who locked it
@@ -38,22 +53,34 @@ class DeleteThreadView(discord.ui.View):
                 ephemeral=True
             )
 
-            # Unlock thread first if it's locked (required for deletion)
-            if self.thread.locked:
-                await self.thread.edit(locked=False)
-                await asyncio.sleep(0.5)
-
-            # Log the deletion
-            log_thread_action(
-                action="DELETE",
-                thread_name=thread_name,
-                moderator=self.moderator.name,
-                guild_name=guild_name
-            )
+            # Archive while the thread is still locked, so nothing is posted after the copy
+            archived = await interaction.client.thread_handler.archive_before_delete(self.thread)
+
+            async with guild_scheduler.slot(self.thread.guild.id):
+                # Unlock thread first if it's locked (required for deletion)
+                if self.thread.locked:
+                    await self.thread.edit(locked=False)
+                    await asyncio.sleep(0.5)
+
+                # Log the deletion
+                log_thread_action(
+                    action="DELETE",
+                    thread_name=thread_name,
+                    moderator=self.moderator.name,
+                    guild_name=guild_name,
+                    additional_info=archived,
+                    guild_id=self.thread.guild.id,
+                    thread_id=self.thread.id,
+                    moderator_id=self.moderator.id
+                )
 
-            # Delete the thread
-            await self.thread.delete()
+                # Delete the thread
+                await self.thread.delete()
 
+        except ArchiveFailed:
+            await interaction.followup.send(
+                "❌ The thread could not be archived, so it was not deleted. Try again later.", ephemeral=True
+            )
         except discord.NotFound:
             await interaction.followup.send("❌ Thread not found.", ephemeral=True)
         except discord.Forbidden:
@@ -62,7 +89,8 @@ class DeleteThreadView(discord.ui.View):
             self.logger.error(f"Error deleting thread: {e}")
             await interaction.followup.send("❌ An error occurred while deleting the thread.", ephemeral=True)
 
-    @discord.ui.button(label="Keep", style=discord.ButtonStyle.secondary, emoji="📌")
+    @discord.ui.button(label="Keep", style=discord.ButtonStyle.secondary, emoji="📌", custom_id="thread_lock:keep")
+    @timed_handler("DeleteThreadView.keep_thread")
     async def keep_thread(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle keeping the thread."""
         await interaction.response.send_message(
@@ -76,6 +104,7 @@ class DeleteThreadView(discord.ui.View):
 
         await interaction.edit_original_response(view=self)
 
+    @timed_handler("DeleteThreadView.on_timeout")
     async def on_timeout(self):
         """Handle view timeout."""
         # Disable all buttons
@@ -83,11 +112,17 @@ class DeleteThreadView(discord.ui.View):
             item.disabled = True
 
         try:
-            # Just disable the buttons without changing the message
-            await self.message.edit(view=self)
+            # Just disable the buttons without changing the message; cosmetic, so it waits out heavy load
+            await load_shedder.run_or_defer("timeout_edit", self._disable_buttons)
         except:
             pass  # Message might have been deleted
 
+    async def _disable_buttons(self) -> None:
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
+
 class ThreadHandler(commands.Cog):
     """Handles thread locking, unlocking, and deletion operations."""
 
@@ -95,102 +130,257 @@ class ThreadHandler(commands.Cog):
         self.bot = bot
         self.logger = logging.getLogger(__name__)
 
-    async def handle_lock_request(self, message: discord.Message):
-        """Handle a thread lock request."""
-        thread = message.channel
-
-        # Ensure we're working with a thread
-        if not isinstance(thread, discord.Thread):
-            return
+        # Work that outlives a handler call, kept so a shutdown can snapshot it
+        self.pending_deletes: Dict[int, Dict[str, Any]] = {}
+        self.confirmations: Dict[int, DeleteThreadView] = {}
+        self._delete_tasks: Dict[int, asyncio.Task] = {}
+
+    def _track_confirmation(self, view: DeleteThreadView) -> None:
+        for message_id in [message_id for message_id, other in self.confirmations.items() if other.is_finished()]:
+            del self.confirmations[message_id]
+        self.confirmations[view.message.id] = view
+
+    async def auto_delete_thread(self, thread: discord.Thread, moderator_name: str, moderator_id: int,
+                                 delay: float):
+        """Delete a locked thread after ``delay`` seconds.
+
+        A wait cancelled by shutdown leaves the thread in ``pending_deletes`` for the snapshot.
+        """
+        self.pending_deletes[thread.id] = {
+            "thread_id": thread.id,
+            "guild_id": thread.guild.id,
+            "moderator": moderator_name,
+            "moderator_id": moderator_id,
+            "delete_at": time.time() + delay
+        }
+        self._delete_tasks[thread.id] = asyncio.current_task()
+
+        # Wait, then delete the thread under a trace of its own
+        await asyncio.sleep(delay)
 
         try:
-            # Check if thread is already locked
-            if thread.locked:
-                await message.channel.send(
-                    "🔒 This thread is already locked.",
-                    delete_after=5
-                )
-                return
-
-            # Lock the thread
-            await thread.edit(locked=True)
-
-            # Log the action
+            async with tracer.trace("auto_delete", guild_id=thread.guild.id, thread_id=thread.id,
+                                    moderator=moderator_name):
+                await self._auto_delete(thread, moderator_name, moderator_id)
+        except ArchiveFailed:
+            self.logger.error(f"Kept thread '{thread.name}' because it could not be archived")
             log_thread_action(
-                action="LOCK",
+                action="AUTO_DELETE_FAILED",
                 thread_name=thread.name,
-                moderator=message.author.name,
-                guild_name=message.guild.name
+                moderator=moderator_name,
+                guild_name=thread.guild.name,
+                additional_info="Archive failed; the thread was kept",
+                guild_id=thread.guild.id,
+                thread_id=thread.id,
+                moderator_id=moderator_id
             )
+        except discord.NotFound:
+            self.logger.warning(f"Thread '{thread.name}' was already deleted")
+        except discord.Forbidden:
+            self.logger.error(f"No permission to delete thread '{thread.name}'")
+        except Exception as e:
+            self.logger.error(f"Error auto-deleting thread '{thread.name}': {e}")
+        self.pending_deletes.pop(thread.id, None)
+        self._delete_tasks.pop(thread.id, None)
 
-            # Check if thread is in auto-delete channel
-            auto_delete_channels = self.bot.config.get_setting("auto_delete_channels", [])
-            is_auto_delete_channel = False
+    async def _auto_delete(self, thread: discord.Thread, moderator_name: str, moderator_id: int) -> None:
+        archived = await self.archive_before_delete(thread)
 
-            # Check if parent channel (where thread was created) is in auto-delete list
-            if thread.parent_id in auto_delete_channels:
-                is_auto_delete_channel = True
+        # Log the auto-deletion
+        async with span("log_write", action="AUTO_DELETE"):
+            log_thread_action(
+                action="AUTO_DELETE",
+                thread_name=thread.name,
+                moderator=moderator_name,
+                guild_name=thread.guild.name,
+                additional_info="Auto-deleted from special channel" + (f"; {archived}" if archived else ""),
+                guild_id=thread.guild.id,
+                thread_id=thread.id,
+                moderator_id=moderator_id
+            )
 
-            if is_auto_delete_channel:
-                # Send message and auto-delete thread in 5 seconds
-                confirmation_msg = await message.channel.send(
-                    "This thread has been locked and will be deleted in 5 seconds"
-                )
+        # Unlock thread first, then delete
+        async with guild_scheduler.slot(thread.guild.id), span("auto_delete"):
+            await thread.edit(locked=False)
+            await asyncio.sleep(0.5)  # Small delay to ensure unlock is processed
+            await thread.delete()
+
+    async def archive_before_delete(self, thread: discord.Thread) -> Optional[str]:
+        """Archive the thread's messages if archiving is enabled; returns a note for the action log.
+
+        Raises ArchiveFailed when archiving is enabled but failed; the thread must then be kept.
+        """
+        if self.bot.archiver is None:
+            return None
+        path = await self.bot.archiver.archive(thread)
+        if path is None:
+            raise ArchiveFailed(thread.id)
+        return f"Archived to {path}"
+
+    def cancel_pending_deletes(self, after: float) -> int:
+        """Stop waiting on auto-deletes due after ``after``; they stay pending for the snapshot."""
+        cancelled = 0
+        for thread_id, entry in self.pending_deletes.items():
+            task = self._delete_tasks.get(thread_id)
+            if task and not task.done() and entry["delete_at"] > after:
+                task.cancel()
+                cancelled += 1
+        return cancelled
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Pending auto-deletes and live confirmation buttons, for a warm restart."""
+        return {
+            "pending_deletes": list(self.pending_deletes.values()),
+            "confirmations": [
+                {
+                    "message_id": message_id,
+                    "thread_id": view.thread.id,
+                    "guild_id": view.thread.guild.id,
+                    "moderator_id": view.moderator.id,
+                    "expires_at": view.expires_at
+                }
+                for message_id, view in self.confirmations.items()
+                if not view.is_finished() and view.expires_at > time.time()
+            ]
+        }
+
+    async def _resolve_thread(self, guild_id: int, thread_id: int) -> Optional[discord.Thread]:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
+        thread = guild.get_thread(thread_id)
+        if thread is None:
+            try:
+                thread = await guild.fetch_channel(thread_id)
+            except (discord.NotFound, discord.Forbidden):
+                return None
+        return thread if isinstance(thread, discord.Thread) else None
+
+    async def restore(self, state: Dict[str, Any]) -> None:
+        """Resume auto-deletes and re-attach confirmation buttons from a shutdown snapshot."""
+        restored = 0
+        for entry in state.get("pending_deletes", []):
+            thread = await self._resolve_thread(entry["guild_id"], entry["thread_id"])
+            if thread is None:
+                continue
+            self.bot.track_task(asyncio.create_task(self.auto_delete_thread(
+                thread, entry["moderator"], entry["moderator_id"], max(entry["delete_at"] - time.time(), 0)
+            )))
+            restored += 1
+
+        for entry in state.get("confirmations", []):
+            remaining = entry["expires_at"] - time.time()
+            thread = await self._resolve_thread(entry["guild_id"], entry["thread_id"]) if remaining > 0 else None
+            if thread is None:
+                continue
+            moderator = thread.guild.get_member(entry["moderator_id"])
+            if moderator is None:
+                try:
+                    moderator = await thread.guild.fetch_member(entry["moderator_id"])
+                except discord.HTTPException:
+                    continue
+            view = DeleteThreadView(thread, moderator, timeout=None, expires_at=entry["expires_at"])
+            view.message = thread.get_partial_message(entry["message_id"])
+            self.bot.add_view(view, message_id=entry["message_id"])
+            self._track_confirmation(view)
+            self.bot.track_task(asyncio.create_task(self._expire(view, remaining)))
+            restored += 1
+
+        if restored:
+            self.logger.info(f"Restored {restored} pending deletion(s) and confirmation(s) from snapshot")
+
+    async def _expire(self, view: DeleteThreadView, delay: float) -> None:
+        """Time out a restored (persistent) view when its original timeout would have."""
+        await asyncio.sleep(delay)
+        if not view.is_finished():
+            view.stop()
+            await view.on_timeout()
+
+    @timed_handler("ThreadHandler.handle_lock_request")
+    async def handle_lock_request(self, message: discord.Message, decision: LockDecision = None):
+        """Handle a thread lock request that passed the guild's lock rules."""
+        thread = message.channel
 
-                # Wait 5 seconds then delete the thread
-                await asyncio.sleep(5)
+        # Ensure we're working with a thread
+        if not isinstance(thread, discord.Thread):
+            return
 
-                try:
-                    # Log the auto-deletion
+        delete_after = None
+        try:
+            # Lock work waits its turn among this guild's requests
+            async with guild_scheduler.slot(message.guild.id):
+                # Check if thread is already locked
+                if thread.locked:
+                    trace = current_trace()
+                    if trace:
+                        trace.annotate(outcome="already_locked")
+                    await notices.post(message.channel, message.author.id, "🔒 This thread is already locked.",
+                                       shed_kind="already_locked_notice")
+                    return
+
+                # Lock the thread
+                async with span("thread_edit", locked=True):
+                    await thread.edit(locked=True)
+
+                # Log the action
+                async with span("log_write", action="LOCK"):
                     log_thread_action(
-                        action="AUTO_DELETE",
+                        action="LOCK",
                         thread_name=thread.name,
                         moderator=message.author.name,
                         guild_name=message.guild.name,
-                        additional_info="Auto-deleted from special channel"
+                        guild_id=message.guild.id,
+                        thread_id=thread.id,
+                        moderator_id=message.author.id
                     )
 
-                    # Unlock thread first, then delete
-                    await thread.edit(locked=False)
-                    await asyncio.sleep(0.5)  # Small delay to ensure unlock is processed
-                    await thread.delete()
-
-                except discord.NotFound:
-                    self.logger.warning(f"Thread '{thread.name}' was already deleted")
-                except discord.Forbidden:
-                    self.logger.error(f"No permission to delete thread '{thread.name}'")
-                except Exception as e:
-                    self.logger.error(f"Error auto-deleting thread '{thread.name}': {e}")
-            else:
-                # Normal lock behavior with deletion options
-                view = DeleteThreadView(thread, message.author)
+                # Check if the parent channel (where thread was created) auto-deletes locked threads
+                if decision is None:
+                    decision = self.bot.permission_handler.check_lock(message.author, thread)
+                auto_delete_after = decision.auto_delete_after
 
-                # Get custom lock message if available
-                current_guild_settings = self.bot.config.get_guild_settings(message.guild.id)
-                lock_message = current_guild_settings.get("custom_lock_message", "This Thread has been locked")
+                if auto_delete_after is not None:
+                    # Send message and auto-delete thread after the configured delay
+                    async with span("confirmation_send", auto_delete=True):
+                        confirmation_msg = await message.channel.send(
+                            f"This thread has been locked and will be deleted in {auto_delete_after:g} seconds"
+                        )
 
-                # Send simple confirmation message
-                confirmation_msg = await message.channel.send(
-                    lock_message,
-                    view=view
-                )
+                    delete_after = auto_delete_after
+                else:
+                    # Normal lock behavior with deletion options
+                    view = DeleteThreadView(thread, message.author)
 
-                # Store the message reference in the view for timeout handling
-                view.message = confirmation_msg
+                    # Get custom lock message if available
+                    current_guild_settings = self.bot.config.get_guild_settings(message.guild.id)
+                    lock_message = current_guild_settings.get("custom_lock_message", "This Thread has been locked")
 
-            self.logger.info(f"Thread '{thread.name}' locked by {message.author} in {message.guild.name}")
+                    # Send simple confirmation message
+                    async with span("confirmation_send", auto_delete=False):
+                        confirmation_msg = await message.channel.send(
+                            lock_message,
+                            view=view
+                        )
+
+                    # Store the message reference in the view for timeout handling
+                    view.message = confirmation_msg
+                    self._track_confirmation(view)
+
+                self.logger.info(f"Thread '{thread.name}' locked by {message.author} in {message.guild.name}")
 
         except discord.Forbidden:
-            await message.channel.send(
-                "❌ I don't have permission to lock this thread.",
-                delete_after=5
-            )
+            await notices.post(message.channel, message.author.id, "❌ I don't have permission to lock this thread.")
         except Exception as e:
             self.logger.error(f"Error locking thread: {e}")
-            await message.channel.send(
-                "❌ An error occurred while locking the thread.",
-                delete_after=5
-            )
+            await notices.post(message.channel, message.author.id, "❌ An error occurred while locking the thread.")
+
+        # The wait before an auto-delete holds no slot and is not part of the lock trace:
+        # it runs as its own task, outside this trace's context, and queues again when due
+        if delete_after is not None:
+            self.bot.track_task(asyncio.create_task(
+                self.auto_delete_thread(thread, message.author.name, message.author.id, delete_after),
+                context=contextvars.Context()
+            ))
 
     @commands.command(name="unlock")
     @commands.has_permissions(manage_threads=True)
@@ -215,7 +405,10 @@ class ThreadHandler(commands.Cog):
                 action="UNLOCK",
                 thread_name=thread.name,
                 moderator=ctx.author.name,
-                guild_name=ctx.guild.name
+                guild_name=ctx.guild.name,
+                guild_id=ctx.guild.id,
+                thread_id=thread.id,
+                moderator_id=ctx.author.id
             )
 
             # Create embed for unlock confirmation
@@ -241,7 +434,7 @@ class ThreadHandler(commands.Cog):
         """Configure thread lock settings."""
         if not action:
             # Show current configuration
-            authorized_roles = self.bot.config.get_authorized_roles(ctx.guild.id)
+            authorized_roles = await asyncio.to_thread(self.bot.config.get_authorized_roles, ctx.guild.id)
 
             embed = discord.Embed(
                 title="🔧 Thread Lock Configuration",
@@ -262,21 +455,22 @@ class ThreadHandler(commands.Cog):
             return
 
         if action.lower() == "add" and role_name:
-            success = self.bot.config.add_authorized_role(role_name, ctx.guild.id)
+            # The store commits to SQLite; keep that off the event loop
+            success = await asyncio.to_thread(self.bot.config.add_authorized_role, role_name, ctx.guild.id)
             if success:
                 await ctx.send(f"✅ Added '{role_name}' to authorized roles.")
             else:
                 await ctx.send(f"❌ '{role_name}' is already in authorized roles.")
 
         elif action.lower() == "remove" and role_name:
-            success = self.bot.config.remove_authorized_role(role_name, ctx.guild.id)
+            success = await asyncio.to_thread(self.bot.config.remove_authorized_role, role_name, ctx.guild.id)
             if success:
                 await ctx.send(f"✅ Removed '{role_name}' from authorized roles.")
             else:
                 await ctx.send(f"❌ '{role_name}' not found in authorized roles.")
 
         elif action.lower() == "list":
-            authorized_roles = self.bot.config.get_authorized_roles(ctx.guild.id)
+            authorized_roles = await asyncio.to_thread(self.bot.config.get_authorized_roles, ctx.guild.id)
             role_list = "\n".join(f"• {role}" for role in authorized_roles) if authorized_roles else "No authorized roles configured."
 
             embed = discord.Embed(
@@ -1,11 +1,26 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import threading
 import datetime
+import hmac
 import time
 import os
+from utils.performance import performance_monitor
+from utils.tracing import tracer
+from utils.health import health as bot_health
+from utils.event_stream import event_stream
+from utils.http_metrics import http_metrics
+from utils.guild_config_store import PreconditionFailed
+from utils.policy_admin import PolicyError, PolicyUnavailable, collection_etag, policy_admin
+from utils.guild_scheduler import guild_scheduler
+from utils.load_shedding import load_shedder
+from utils.notices import notices
 
 app = Flask(__name__)
 
+# Interface the web server listens on; set KEEP_ALIVE_HOST=127.0.0.1 to keep it local
+HOST = os.getenv('KEEP_ALIVE_HOST', '0.0.0.0')
+LOOPBACK = ('127.0.0.1', '::1', 'localhost')
+
 # Track bot activity and statistics
 bot_stats = {
     'start_time': datetime.datetime.now(),
@@ -15,43 +30,102 @@ bot_stats = {
     'external_pings': 0
 }
 
-@app.route('/')
-def home():
-    return """
+# Built once: live data arrives over /events, so the page itself never changes
+DASHBOARD_HTML = """
     <html>
     <head>
         <title>Discord Thread Lock Bot</title>
         <style>
             body { font-family: Arial; margin: 40px; background: #f0f0f0; }
-            .container { background: white; padding: 30px; border-radius: 10px; max-width: 600px; margin: auto; }
+            .container { background: white; padding: 30px; border-radius: 10px; max-width: 760px; margin: auto; }
             .status { color: #28a745; font-weight: bold; }
+            .status.down { color: #dc3545; }
             .info { margin: 10px 0; }
+            table { border-collapse: collapse; margin: 10px 0; }
+            td, th { padding: 4px 12px; text-align: left; border-bottom: 1px solid #ddd; }
+            #events { list-style: none; padding: 0; max-height: 400px; overflow-y: auto; font-size: 14px; }
+            #events li { padding: 4px 0; border-bottom: 1px solid #eee; }
+            .action { font-weight: bold; display: inline-block; min-width: 110px; }
         </style>
     </head>
     <body>
         <div class="container">
             <h1>🤖 Discord Thread Lock Bot</h1>
-            <p class="status">✅ Bot is running and active!</p>
+            <p id="stream-status" class="status">Connecting to live feed…</p>
             <div class="info">
-                <strong>Bot Name:</strong> Auto Lock Thread Bot<br>
-                <strong>Status:</strong> Online<br>
-                <strong>Last Ping:</strong> """ + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """<br>
                 <strong>Function:</strong> Auto-lock Discord threads with role-based permissions
             </div>
-            <h3>Features:</h3>
-            <ul>
-                <li>Thread locking with "lock" or "lna" commands</li>
-                <li>Delete/Keep buttons after locking</li>
-                <li>Auto-delete for specific channels</li>
-                <li>Role-based permission system</li>
-                <li>24/7 uptime with keep-alive</li>
-            </ul>
-            <p><a href="/status">Check API Status</a> | <a href="/ping">Ping Bot</a></p>
+            <h3>Actions</h3>
+            <table>
+                <thead><tr><th>Action</th><th>Last hour</th><th>Last 24h</th></tr></thead>
+                <tbody id="counters"></tbody>
+            </table>
+            <h3>Live Events</h3>
+            <ul id="events"></ul>
+            <p><a href="/status">Check API Status</a> | <a href="/ping">Ping Bot</a> | <a href="/health">Health</a></p>
         </div>
+        <script>
+            const token = new URLSearchParams(location.hash.slice(1)).get("token");
+            const source = new EventSource("/events" + (token ? "?token=" + encodeURIComponent(token) : ""));
+            const status = document.getElementById("stream-status");
+            const events = document.getElementById("events");
+
+            source.onopen = () => { status.textContent = "✅ Live"; status.className = "status"; };
+            source.onerror = () => {
+                status.className = "status down";
+                // A refused stream (401 without the admin token) closes instead of retrying
+                status.textContent = source.readyState === EventSource.CLOSED
+                    ? "🔒 The live feed needs the admin token: open this page as /#token=<ADMIN_TOKEN>"
+                    : "⚠️ Live feed disconnected, retrying…";
+            };
+
+            source.addEventListener("counters", (e) => {
+                const counters = JSON.parse(e.data).counters;
+                const actions = new Set([...Object.keys(counters["1h"] || {}), ...Object.keys(counters["24h"] || {})]);
+                const rows = [...actions].sort().map((action) =>
+                    `<tr><td>${action}</td><td>${counters["1h"][action] || 0}</td><td>${counters["24h"][action] || 0}</td></tr>`);
+                document.getElementById("counters").innerHTML = rows.join("") || "<tr><td colspan=3>No actions yet</td></tr>";
+            });
+
+            source.addEventListener("action", (e) => {
+                const entry = JSON.parse(e.data);
+                const item = document.createElement("li");
+                const when = new Date(entry.ts * 1000).toLocaleTimeString();
+                item.innerHTML = `${when} <span class="action"></span> <span class="text"></span>`;
+                item.querySelector(".action").textContent = entry.action;
+                item.querySelector(".text").textContent =
+                    `'${entry.thread_name}' by ${entry.moderator} in ${entry.guild_name}` + (entry.info ? ` - ${entry.info}` : "");
+                events.prepend(item);
+                while (events.children.length > 200) events.lastChild.remove();
+            });
+
+            source.addEventListener("gap", () => {
+                const item = document.createElement("li");
+                item.textContent = "… some events were skipped while disconnected";
+                events.prepend(item);
+            });
+        </script>
     </body>
     </html>
     """
 
+@app.route('/')
+def home():
+    return Response(DASHBOARD_HTML, mimetype='text/html', headers={'Cache-Control': 'public, max-age=300'})
+
+@app.route('/events')
+def events():
+    """Server-sent events: thread actions and rolling counters for the dashboard"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(
+        stream_with_context(event_stream.subscribe(last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/status')
 def status():
     return jsonify({
@@ -90,11 +164,10 @@ def ping():
 
 @app.route('/health')
 def health():
-    return jsonify({
-        "health": "ok",
-        "service": "discord_bot",
-        "status": "running"
-    })
+    """Deep health: 200 while the bot's snapshot is fresh and within limits, 503 otherwise"""
+    healthy, report = bot_health.evaluate()
+    report.update(service="discord_bot", status="running" if healthy else "degraded")
+    return jsonify(report), 200 if healthy else 503
 
 @app.route('/uptime')
 def uptime():
@@ -124,8 +197,132 @@ def uptime():
         }
     })
 
+def _token_matches(supplied, expected):
+    return hmac.compare_digest(supplied.encode('utf-8'), expected.encode('utf-8'))
+
+def is_admin_request():
+    """Check admin access: bearer ADMIN_TOKEN, or localhost when unset and the server listens only locally."""
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        # Behind a reverse proxy every request comes from localhost, so the address alone
+        # is only trusted when nothing but localhost can reach the server
+        return HOST in LOOPBACK and request.remote_addr in ('127.0.0.1', '::1')
+    if _token_matches(request.headers.get('Authorization', ''), f"Bearer {admin_token}"):
+        return True
+    # EventSource can't send headers, so only the event stream accepts ?token=
+    return request.endpoint == 'events' and _token_matches(request.args.get('token', ''), admin_token)
+
+@app.route('/admin/performance')
+def admin_performance():
+    """Loop lag and the slowest handlers and stall sites"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    limit = request.args.get('limit', 10, type=int)
+    summary = performance_monitor.summary(limit=limit)
+    summary["load_shedding"] = load_shedder.stats()
+    summary["notices"] = notices.stats()
+    return jsonify(summary)
+
+@app.route('/admin/http')
+def admin_http():
+    """Discord REST calls: per-route latency, retries, rate-limit buckets and connection reuse"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify(http_metrics.summary(limit=limit))
+
+@app.route('/admin/scheduler')
+def admin_scheduler():
+    """Per-guild queue depth and wait times of lock and delete work"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify(guild_scheduler.stats(limit=limit))
+
+@app.route('/admin/traces')
+def admin_traces():
+    """Recent lock pipeline traces from the ring buffer"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({"traces": tracer.recent(limit=limit, name=request.args.get('name'))})
+
+@app.route('/admin/traces/dump', methods=['POST'])
+def admin_traces_dump():
+    """Write the trace ring buffer to logs/"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    return jsonify({"dumped_to": tracer.dump()})
+
+@app.route('/admin/policies', methods=['GET', 'PUT'])
+def admin_policies():
+    """Read guild settings in bulk, or replace a batch of them in one write"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    
+    if request.method == 'GET':
+        ids = request.args.get('guild_ids')
+        try:
+            guilds = policy_admin.read([guild_id for guild_id in ids.split(',') if guild_id] if ids else None)
+        except PolicyUnavailable:
+            return jsonify({"error": "bot not running"}), 503
+        etag = collection_etag({guild_id: entry["etag"] for guild_id, entry in guilds.items()})
+        if request.if_none_match.contains_raw(etag):
+            return Response(status=304, headers={'ETag': etag})
+        response = jsonify({"guilds": guilds})
+        response.headers['ETag'] = etag
+        return response
+    
+    body = request.get_json(silent=True)
+    return _replace_policies(body.get('guilds') if isinstance(body, dict) else None)
+
+@app.route('/admin/guilds/<guild_id>/policy', methods=['GET', 'PUT'])
+def admin_guild_policy(guild_id):
+    """One guild's settings, with If-None-Match on reads and If-Match on writes"""
+    if not is_admin_request():
+        return jsonify({"error": "unauthorized"}), 401
+    if not guild_id.isdigit():
+        return jsonify({"error": "guild ID must be numeric"}), 400
+    
+    if request.method == 'GET':
+        try:
+            entry = policy_admin.read([guild_id])[guild_id]
+        except PolicyUnavailable:
+            return jsonify({"error": "bot not running"}), 503
+        if request.if_none_match.contains_raw(entry["etag"]):
+            return Response(status=304, headers={'ETag': entry["etag"]})
+        response = jsonify(entry["settings"])
+        response.headers['ETag'] = entry["etag"]
+        return response
+    
+    if_match = request.headers.get('If-Match')
+    return _replace_policies({guild_id: {"settings": request.get_json(silent=True), "etag": if_match}},
+                             single=guild_id)
+
+def _replace_policies(entries, single=None):
+    try:
+        etags = policy_admin.replace(entries)
+    except PolicyError as e:
+        return jsonify({"error": "invalid settings", "details": e.errors}), 400
+    except PreconditionFailed as e:
+        return jsonify({"error": "precondition failed", "current_etags": e.conflicts}), 412
+    except PolicyUnavailable:
+        return jsonify({"error": "bot not running"}), 503
+    
+    if single:
+        response = jsonify({"guild_id": single, "etag": etags[single]})
+        response.headers['ETag'] = etags[single]
+        return response
+    return jsonify({"written": len(etags), "etags": etags})
+
 def run():
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    # Threaded: every open dashboard holds a connection for its event stream
+    app.run(host=HOST, port=5000, debug=False, threaded=True)
 
 def keep_alive():
     t = threading.Thread(target=run)
@@ -1,140 +1,646 @@
 #!/usr/bin/env python3
 """
 External Monitor for Discord Thread Auto-Lock Bot
-Keeps the bot alive by making regular HTTP requests
+Keeps the bot instances alive by making regular HTTP requests
 """
-import time
-import requests
-import threading
+import asyncio
+import json
 import logging
-from datetime import datetime
+import math
+import random
+import shlex
+import signal
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+import aiohttp
+from aiohttp import web
+
+# Rolling windows reported by default, and the most samples kept per target
+DEFAULT_WINDOWS = "5m,1h,6h"
+MAX_SAMPLES = 4096
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """'90', '90s', '5m', '1h' or '7d' in seconds"""
+    text = text.strip().lower()
+    if text[-1:] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class SampleRing:
+    """Fixed-size ring of (time, latency, ok) samples in flat arrays; old samples are overwritten"""
+
+    __slots__ = ("capacity", "times", "latencies", "oks", "next", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.latencies = array("f", bytes(4 * capacity))
+        self.oks = array("b", bytes(capacity))
+        self.next = 0
+        self.count = 0
+
+    def add(self, timestamp, latency_ms, ok):
+        index = self.next
+        self.times[index] = timestamp
+        self.latencies[index] = latency_ms
+        self.oks[index] = 1 if ok else 0
+        self.next = (index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def oldest(self):
+        if not self.count:
+            return None
+        return self.times[(self.next - self.count) % self.capacity]
+
+    def stats(self, window, slo, now=None):
+        """Availability, latency percentiles and error-budget burn rate over the last ``window`` seconds"""
+        now = time.time() if now is None else now
+        since = now - window
+        total = failed = 0
+        latencies = []
+        for offset in range(self.count):
+            index = (self.next - 1 - offset) % self.capacity
+            if self.times[index] < since:
+                break
+            total += 1
+            if self.oks[index]:
+                latencies.append(self.latencies[index])
+            else:
+                failed += 1
+
+        latencies.sort()
+        error_rate = failed / total if total else 0.0
+        oldest = self.oldest()
+        return {
+            "samples": total,
+            "uptime_pct": round(100 * (1 - error_rate), 3) if total else None,
+            "p50_ms": round(percentile(latencies, 0.50), 1) if latencies else None,
+            "p95_ms": round(percentile(latencies, 0.95), 1) if latencies else None,
+            "p99_ms": round(percentile(latencies, 0.99), 1) if latencies else None,
+            # 1.0 spends the error budget exactly over the SLO period; above that it runs out early
+            "burn_rate": round(error_rate / (1 - slo), 2) if total and slo < 1 else None,
+            # Seconds of the window the ring actually covers (less when it wrapped)
+            "covered_s": round(min(window, now - oldest)) if oldest else 0,
+        }
+
+
+class TargetState:
+    """Check results for one bot instance"""
+
+    __slots__ = ("url", "up", "last_status", "last_latency", "last_error", "last_check",
+                 "checks", "failures", "consecutive_failures", "samples")
+
+    def __init__(self, url, capacity=MAX_SAMPLES):
+        self.url = url.rstrip("/")
+        self.samples = SampleRing(capacity)
+        self.up = None
+        self.last_status = None
+        self.last_latency = None
+        self.last_error = None
+        self.last_check = None
+        self.checks = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__ if slot != "samples"}
+
 
 class BotMonitor:
     """External monitoring system for Discord bot uptime"""
-    
-    def __init__(self, bot_url="http://localhost:5000", interval=300):
+
+    def __init__(self, bot_url="http://localhost:5000", interval=300, targets=None, timeout=10,
+                 jitter=0.1, max_connections=100, windows=DEFAULT_WINDOWS, slo=0.999, http_port=None,
+                 max_samples=MAX_SAMPLES, http_host="127.0.0.1"):
         """
         Initialize bot monitor
-        
+
         Args:
-            bot_url (str): URL of the bot's web interface
+            bot_url (str): URL of the bot's web interface (used when no targets are given)
             interval (int): Ping interval in seconds (default: 5 minutes)
+            targets (list): URLs of several bot instances to check concurrently
+            timeout (float): Per-check timeout in seconds
+            jitter (float): Fraction of the interval each schedule is randomly shifted by
+            max_connections (int): Size of the shared keep-alive connection pool
+            windows (str): Comma-separated rolling windows to report, e.g. "5m,1h,6h"
+            slo (float): Availability objective the error-budget burn rate is measured against
+            http_port (int): Serve the SLO report on this port (disabled when None)
+            max_samples (int): Upper bound on samples kept per target
+            http_host (str): Interface the SLO report listens on (local only by default)
         """
         self.bot_url = bot_url
         self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.max_connections = max_connections
+        self.windows = {label.strip(): parse_duration(label) for label in windows.split(",") if label.strip()}
+        self.slo = slo
+        self.http_port = http_port
+        self.http_host = http_host
+
+        # Enough samples to cover the longest window at the fastest jittered rate, capped
+        longest = max(self.windows.values(), default=0)
+        capacity = math.ceil(longest / max(0.001, interval * (1 - jitter))) + 1
+        self.capacity = max(2, min(max_samples, capacity))
+        self.targets = {url.rstrip("/"): TargetState(url, self.capacity) for url in (targets or [bot_url])}
         self.running = False
         self.monitor_thread = None
-        
+        self._loop = None
+        self._stop = None
+
         # Setup logging
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
         self.logger = logging.getLogger('BotMonitor')
-    
-    def ping_bot(self):
-        """Send a ping request to the bot"""
+
+    async def ping_bot(self, session, target):
+        """Send a ping request to one bot instance"""
+        start = time.perf_counter()
         try:
-            response = requests.get(f"{self.bot_url}/ping", timeout=10)
-            if response.status_code == 200:
-                self.logger.info(f"✅ Bot ping successful - Status: {response.status_code}")
-                return True
-            else:
-                self.logger.warning(f"⚠️ Bot ping returned status: {response.status_code}")
-                return False
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"❌ Bot ping failed: {e}")
+            async with session.get(f"{target.url}/ping") as response:
+                await response.read()
+                target.last_status = response.status
+                target.last_error = None
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            target.last_status = None
+            target.last_error = str(e) or type(e).__name__
             return False
-    
-    def get_bot_status(self):
+        finally:
+            target.last_latency = round((time.perf_counter() - start) * 1000, 1)
+
+    async def get_bot_status(self, session, target):
         """Get detailed bot status"""
         try:
-            response = requests.get(f"{self.bot_url}/status", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                self.logger.info(f"📊 Bot Status: {data.get('status', 'unknown')}")
-                return data
-            else:
-                self.logger.warning(f"Status check returned: {response.status_code}")
+            async with session.get(f"{target.url}/status") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    self.logger.info(f"📊 {target.url} status: {data.get('status', 'unknown')}")
+                    return data
+                self.logger.warning(f"Status check for {target.url} returned: {response.status}")
                 return None
-        except Exception as e:
-            self.logger.error(f"Status check failed: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.logger.error(f"Status check for {target.url} failed: {e}")
             return None
-    
-    def monitor_loop(self):
-        """Main monitoring loop"""
-        self.logger.info(f"🔍 Starting bot monitor - pinging every {self.interval} seconds")
-        
-        while self.running:
+
+    async def check_target(self, session, target):
+        """Ping one target, confirm failures with a status check and log state changes"""
+        success = await self.ping_bot(session, target)
+        target.checks += 1
+        target.last_check = time.time()
+        target.samples.add(target.last_check, target.last_latency, success)
+
+        if success:
+            if target.up is False:
+                self.logger.info(f"✅ {target.url} is back up after {target.consecutive_failures} failed check(s)")
+            else:
+                self.logger.debug(f"✅ {target.url} ping successful ({target.last_latency}ms)")
+            target.up = True
+            target.consecutive_failures = 0
+            return True
+
+        target.failures += 1
+        target.consecutive_failures += 1
+        if target.up is not False:
+            self.logger.warning(
+                f"⚠️ {target.url} ping failed ({target.last_error or target.last_status}), trying status check..."
+            )
+            if await self.get_bot_status(session, target) is None:
+                self.logger.error(f"❌ {target.url} appears to be down!")
+        target.up = False
+        return False
+
+    def _next_delay(self):
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _watch(self, session, target):
+        # Spread first checks over one interval so targets don't fire in lockstep
+        if await self._wait(random.uniform(0, self.interval)):
+            return
+        while True:
             try:
-                # Ping the bot
-                success = self.ping_bot()
-                
-                if not success:
-                    self.logger.warning("Bot ping failed, trying status check...")
-                    status = self.get_bot_status()
-                    if not status:
-                        self.logger.error("❌ Bot appears to be down!")
-                
-                # Wait for next ping
-                time.sleep(self.interval)
-                
-            except KeyboardInterrupt:
-                self.logger.info("Monitor stopped by user")
-                break
+                await self.check_target(session, target)
             except Exception as e:
-                self.logger.error(f"Monitor loop error: {e}")
-                time.sleep(60)  # Wait 1 minute on error
-    
+                self.logger.error(f"Monitor error for {target.url}: {e}")
+            if await self._wait(self._next_delay()):
+                return
+
+    async def _wait(self, delay):
+        """Sleep for ``delay`` seconds; True when the monitor was stopped meanwhile"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        """Check every target on its own jittered schedule over one pooled session"""
+        self._stop = asyncio.Event()
+        self.logger.info(
+            f"🔍 Starting bot monitor - checking {len(self.targets)} target(s) every {self.interval} seconds"
+        )
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=max(30, self.interval * 2))
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        runner = await self._start_http() if self.http_port else None
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                await asyncio.gather(*(self._watch(session, target) for target in self.targets.values()))
+        finally:
+            if runner:
+                await runner.cleanup()
+
+    def summary(self):
+        """Current state of every target"""
+        return {url: target.to_dict() for url, target in self.targets.items()}
+
+    def slo_report(self, target_url=None):
+        """Per-target rolling-window stats; every target, or only ``target_url``"""
+        now = time.time()
+        targets = self.targets.values() if target_url is None else [self.targets[target_url.rstrip("/")]]
+        return {
+            "slo": self.slo,
+            "samples_per_target": self.capacity,
+            "targets": {
+                target.url: {
+                    "up": target.up,
+                    "last_latency_ms": target.last_latency,
+                    "windows": {
+                        label: target.samples.stats(window, self.slo, now) for label, window in self.windows.items()
+                    },
+                }
+                for target in targets
+            },
+        }
+
+    async def _start_http(self):
+        async def handle_slo(request):
+            target_url = request.query.get("target")
+            if target_url and target_url.rstrip("/") not in self.targets:
+                return web.json_response({"error": f"unknown target {target_url}"}, status=404)
+            return web.json_response(self.slo_report(target_url))
+
+        async def handle_targets(request):
+            return web.json_response(self.summary())
+
+        app = web.Application()
+        app.router.add_get("/slo", handle_slo)
+        app.router.add_get("/targets", handle_targets)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, self.http_host, self.http_port).start()
+        self.logger.info(f"📈 SLO report available at http://{self.http_host}:{self.http_port}/slo")
+        return runner
+
     def start(self):
-        """Start the monitoring service"""
+        """Start the monitoring service in a background thread"""
         if self.running:
             self.logger.warning("Monitor is already running")
             return
-        
+
         self.running = True
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
+        self._loop = asyncio.new_event_loop()
+        self.monitor_thread = threading.Thread(target=self._loop.run_until_complete, args=(self.run(),),
+                                               daemon=True)
         self.monitor_thread.start()
         self.logger.info("🚀 Bot monitor started successfully")
-    
+
     def stop(self):
         """Stop the monitoring service"""
         if not self.running:
             return
-        
+
         self.running = False
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._stop.set)
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         self.logger.info("🛑 Bot monitor stopped")
-    
+
     def is_running(self):
         """Check if monitor is running"""
         return self.running
 
+
+class BotSupervisor:
+    """Runs the bot as a child process and restarts it when it crashes or stops being healthy"""
+
+    def __init__(self, command=None, health_url="http://localhost:5000", check_interval=5, timeout=3,
+                 failure_threshold=3, startup_grace=90, backoff_initial=1, backoff_max=60, stable_after=120,
+                 crash_loop_max=5, crash_loop_window=300, crash_loop_cooldown=600, stop_timeout=20):
+        """
+        Initialize bot supervisor
+
+        Args:
+            command (list): Command that starts the bot (default: this Python running main.py)
+            health_url (str): Base URL of the bot's web interface; /health is polled
+            check_interval (float): Seconds between health checks
+            timeout (float): Per-check timeout in seconds
+            failure_threshold (int): Consecutive failed checks before the bot is restarted
+            startup_grace (float): Seconds a new process gets to report healthy for the first time
+            backoff_initial (float): Restart delay after the first failure, doubled on each further one
+            backoff_max (float): Upper bound for the restart delay
+            stable_after (float): Healthy seconds after which the backoff starts over
+            crash_loop_max (int): Restarts within crash_loop_window that count as a crash loop
+            crash_loop_window (float): Window in seconds for crash loop detection
+            crash_loop_cooldown (float): Seconds to hold off restarting once in a crash loop
+            stop_timeout (float): Seconds a process gets to shut down (and drain) before it is killed
+        """
+        self.command = list(command or [sys.executable, "main.py"])
+        self.health_url = health_url.rstrip("/")
+        self.check_interval = check_interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.startup_grace = startup_grace
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.crash_loop_max = crash_loop_max
+        self.crash_loop_window = crash_loop_window
+        self.crash_loop_cooldown = crash_loop_cooldown
+        self.stop_timeout = stop_timeout
+
+        self.process = None
+        self.restarts = deque()
+        self.recoveries = deque(maxlen=100)
+        self.failures = 0
+        self.down_since = None
+        self._stop = None
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        self.logger = logging.getLogger('BotSupervisor')
+
+    async def _healthy(self, session):
+        try:
+            async with session.get(f"{self.health_url}/health") as response:
+                await response.read()
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _watch(self, session):
+        """Wait until the process exits or fails its health checks; returns the reason"""
+        started = time.monotonic()
+        ever_healthy = False
+        stable_since = None
+        failed_checks = 0
+        exit_wait = asyncio.create_task(self.process.wait())
+        try:
+            while True:
+                done, _ = await asyncio.wait({exit_wait}, timeout=self.check_interval)
+                if done:
+                    return f"exited with code {self.process.returncode}"
+                if self._stop.is_set():
+                    return None
+
+                now = time.monotonic()
+                if await self._healthy(session):
+                    failed_checks = 0
+                    if not ever_healthy or self.down_since is not None:
+                        self._recovered()
+                    ever_healthy = True
+                    stable_since = stable_since or now
+                    if self.failures and now - stable_since >= self.stable_after:
+                        self.logger.info(f"Stable for {self.stable_after:g}s, resetting restart backoff")
+                        self.failures = 0
+                    continue
+
+                stable_since = None
+                if not ever_healthy:
+                    if now - started > self.startup_grace:
+                        return f"not healthy within {self.startup_grace:g}s of starting"
+                    continue
+
+                failed_checks += 1
+                if failed_checks == 1:
+                    # Downtime is measured from the first failed check
+                    self.down_since = now
+                if failed_checks >= self.failure_threshold:
+                    return f"failed {failed_checks} health checks in a row"
+        finally:
+            exit_wait.cancel()
+
+    def _recovered(self):
+        if self.down_since is None:
+            self.logger.info("✅ Bot is healthy")
+            return
+        ttr = time.monotonic() - self.down_since
+        self.down_since = None
+        self.recoveries.append(ttr)
+        mttr = sum(self.recoveries) / len(self.recoveries)
+        self.logger.info(f"✅ Bot recovered in {ttr:.1f}s (MTTR {mttr:.1f}s over {len(self.recoveries)} recoveries)")
+
+    async def _terminate(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=self.stop_timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Bot did not stop within {self.stop_timeout:g}s, killing it")
+            self.process.kill()
+            await self.process.wait()
+
+    def _restart_delay(self):
+        """Exponential backoff, or the crash-loop cooldown when restarts come too fast"""
+        now = time.monotonic()
+        self.restarts.append(now)
+        while self.restarts and now - self.restarts[0] > self.crash_loop_window:
+            self.restarts.popleft()
+        if len(self.restarts) >= self.crash_loop_max:
+            self.logger.error(
+                f"🔁 Crash loop: {len(self.restarts)} restarts in {self.crash_loop_window:g}s, "
+                f"holding off for {self.crash_loop_cooldown:g}s"
+            )
+            self.restarts.clear()
+            return self.crash_loop_cooldown
+
+        self.failures += 1
+        return min(self.backoff_max, self.backoff_initial * 2 ** (self.failures - 1))
+
+    async def run(self):
+        """Start the bot and keep it running until stopped"""
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        self.logger.info(f"🛡️ Supervising: {' '.join(self.command)}")
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while not self._stop.is_set():
+                # Own session: a Ctrl+C meant for the supervisor reaches the bot only as our SIGTERM
+                self.process = await asyncio.create_subprocess_exec(*self.command, start_new_session=True)
+                self.logger.info(f"🚀 Bot started (pid {self.process.pid})")
+
+                reason = await self._watch(session)
+                if reason is None:
+                    break
+                if self.down_since is None:
+                    self.down_since = time.monotonic()
+                self.logger.error(f"❌ Bot {reason}, restarting")
+                await self._terminate()
+
+                delay = self._restart_delay()
+                if delay:
+                    self.logger.info(f"Restarting in {delay:g}s")
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+
+        await self._terminate()
+        self.logger.info("🛑 Supervisor stopped")
+
+    def summary(self):
+        return {
+            "pid": self.process.pid if self.process else None,
+            "running": self.process is not None and self.process.returncode is None,
+            "down": self.down_since is not None,
+            "recent_restarts": len(self.restarts),
+            "recoveries": len(self.recoveries),
+            "last_ttr_s": round(self.recoveries[-1], 2) if self.recoveries else None,
+            "mttr_s": round(sum(self.recoveries) / len(self.recoveries), 2) if self.recoveries else None,
+        }
+
+
+def read_targets(path):
+    """URLs from a file, one per line; blank lines and # comments are skipped"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def print_report(report):
+    """Render an SLO report as a table"""
+    print(f"SLO {report['slo'] * 100:g}% - up to {report['samples_per_target']} samples per target")
+    header = f"{'target':<40} {'window':>6} {'n':>6} {'uptime%':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'burn':>6}"
+    print(header)
+    print("-" * len(header))
+
+    def cell(value, width):
+        return f"{'-' if value is None else value:>{width}}"
+
+    for url, data in report["targets"].items():
+        for label, stats in data["windows"].items():
+            print(f"{url[-40:]:<40} {label:>6} {stats['samples']:>6} {cell(stats['uptime_pct'], 8)} "
+                  f"{cell(stats['p50_ms'], 8)} {cell(stats['p95_ms'], 8)} {cell(stats['p99_ms'], 8)} "
+                  f"{cell(stats['burn_rate'], 6)}")
+            url = ""
+
+
+async def query_report(monitor_url, target=None, timeout=10):
+    """Fetch the SLO report from a running monitor"""
+    params = {"target": target} if target else None
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async with session.get(f"{monitor_url.rstrip('/')}/slo", params=params) as response:
+            return response.status, await response.json()
+
+
 def main():
     """Run the bot monitor as a standalone service"""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Discord Bot Monitor')
-    parser.add_argument('--url', default='http://localhost:5000', 
-                       help='Bot URL (default: http://localhost:5000)')
-    parser.add_argument('--interval', type=int, default=300,
-                       help='Ping interval in seconds (default: 300 = 5 minutes)')
-    
+    parser.add_argument('--url', action='append',
+                        help='Bot URL, repeat for several instances (default: http://localhost:5000)')
+    parser.add_argument('--targets-file', help='File with one bot URL per line')
+    parser.add_argument('--interval', type=float, default=300,
+                        help='Ping interval in seconds (default: 300 = 5 minutes)')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-check timeout in seconds (default: 10)')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help='Random schedule shift as a fraction of the interval (default: 0.1)')
+    parser.add_argument('--max-connections', type=int, default=100,
+                        help='Keep-alive connection pool size (default: 100)')
+    parser.add_argument('--windows', default=DEFAULT_WINDOWS,
+                        help=f'Rolling windows to report (default: {DEFAULT_WINDOWS})')
+    parser.add_argument('--slo', type=float, default=99.9, help='Availability objective in percent (default: 99.9)')
+    parser.add_argument('--max-samples', type=int, default=MAX_SAMPLES,
+                        help=f'Samples kept per target (default: {MAX_SAMPLES})')
+    parser.add_argument('--http-port', type=int, help='Serve /slo and /targets on this port')
+    parser.add_argument('--http-host', default='127.0.0.1',
+                        help='Interface for --http-port; use 0.0.0.0 to expose the unauthenticated report '
+                             '(default: 127.0.0.1)')
+    parser.add_argument('--query', metavar='MONITOR_URL',
+                        help='Print the SLO report of a running monitor (e.g. http://localhost:8099) and exit')
+    parser.add_argument('--target', help='With --query, report only this target')
+    parser.add_argument('--json', action='store_true', help='With --query, print raw JSON')
+    parser.add_argument('--supervise', action='store_true',
+                        help='Run the bot as a child process and restart it when it crashes or turns unhealthy')
+    parser.add_argument('--command', help='With --supervise, the command that starts the bot (default: main.py)')
+    parser.add_argument('--check-interval', type=float, default=5,
+                        help='With --supervise, seconds between health checks (default: 5)')
+    parser.add_argument('--failure-threshold', type=int, default=3,
+                        help='With --supervise, failed health checks in a row before a restart (default: 3)')
+    parser.add_argument('--backoff-max', type=float, default=60,
+                        help='With --supervise, longest delay between restarts in seconds (default: 60)')
+
     args = parser.parse_args()
-    
-    monitor = BotMonitor(bot_url=args.url, interval=args.interval)
-    
+
+    if args.supervise:
+        supervisor = BotSupervisor(
+            command=shlex.split(args.command) if args.command else None,
+            health_url=(args.url or ["http://localhost:5000"])[0],
+            check_interval=args.check_interval,
+            timeout=min(args.timeout, args.check_interval),
+            failure_threshold=args.failure_threshold,
+            backoff_max=args.backoff_max
+        )
+        asyncio.run(supervisor.run())
+        return
+
+    if args.query:
+        status, report = asyncio.run(query_report(args.query, args.target, args.timeout))
+        if status != 200 or args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+        raise SystemExit(0 if status == 200 else 1)
+
+    targets = list(args.url or [])
+    if args.targets_file:
+        targets.extend(read_targets(args.targets_file))
+
+    monitor = BotMonitor(
+        targets=targets or None,
+        interval=args.interval,
+        timeout=args.timeout,
+        jitter=args.jitter,
+        max_connections=args.max_connections,
+        windows=args.windows,
+        slo=args.slo / 100,
+        http_port=args.http_port,
+        http_host=args.http_host,
+        max_samples=args.max_samples
+    )
+
     try:
-        monitor.start()
-        
-        # Keep the main thread alive
-        while True:
-            time.sleep(60)
-            
+        asyncio.run(monitor.run())
     except KeyboardInterrupt:
         print("\nShutting down monitor...")
-        monitor.stop()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
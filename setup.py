@@ -17,7 +17,7 @@ def check_python_version():
 
 def create_directories():
     """Create necessary directories"""
-    directories = ['logs', 'handlers', 'utils']
+    directories = ['logs', 'handlers', 'utils', 'data']
     for directory in directories:
         if not os.path.exists(directory):
             os.makedirs(directory)
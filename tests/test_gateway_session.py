@@ -0,0 +1,83 @@
+"""
+Gateway session resume across restarts, against the fake Discord gateway.
+"""
+
+import asyncio
+import json
+
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.harness import BotHarness
+from utils import gateway_session
+
+
+def _cache(bot):
+    guild = bot.guilds[0]
+    return (
+        guild.name,
+        sorted((role.name, role.permissions.value) for role in guild.roles),
+        sorted((channel.name, channel.type.value) for channel in guild.channels),
+        sorted((thread.name, thread.locked, thread.parent_id) for thread in guild.threads),
+        guild.me is not None,
+    )
+
+
+async def _restart(session_path, before_restart=None):
+    """Run the bot, lock a thread, restart it; returns the fake, both caches and the saved session."""
+    fake = FakeDiscord()
+    overrides = {"gateway_session_path": str(session_path)}
+    first = BotHarness(fake, config_overrides=overrides)
+    first.seed(members=20)
+    async with first:
+        thread = await fake.create_thread(first.guild, first.forum, "before restart")
+        await fake.send_user_message(thread, first.moderators[0], "lock")
+        await asyncio.sleep(0.3)
+        cache_before = _cache(first.bot)
+
+    saved = json.loads(session_path.read_text()) if session_path.exists() else None
+    if before_restart:
+        before_restart(fake)
+
+    second = BotHarness(fake, config_overrides=overrides)
+    second.worlds = first.worlds
+    async with second:
+        cache_after = _cache(second.bot)
+        thread = await fake.create_thread(first.guild, first.forum, "after restart")
+        await fake.send_user_message(thread, first.moderators[1], "lock")
+        await asyncio.sleep(0.3)
+        locked_after = fake.channels[thread["id"]]["thread_metadata"]["locked"]
+    return fake, saved, cache_before, cache_after, locked_after
+
+
+def test_restart_resumes_session_with_cached_guilds(tmp_path):
+    fake, saved, cache_before, cache_after, locked_after = asyncio.run(_restart(tmp_path / "session.json"))
+
+    assert fake.identify_count == 1
+    assert fake.resume_count == 1
+    assert cache_after == cache_before
+    assert locked_after
+    # Only the bot's own member is saved, not every member of the guild
+    assert [member["user"]["id"] for member in saved["guilds"][0]["members"]] == [fake.bot_user["id"]]
+
+
+def test_invalid_session_falls_back_to_identify(tmp_path):
+    fake, saved, _, cache_after, locked_after = asyncio.run(
+        _restart(tmp_path / "session.json", before_restart=lambda fake: fake.sessions.clear())
+    )
+
+    assert saved is not None
+    assert fake.resume_count == 0
+    assert fake.identify_count == 2
+    assert cache_after[0] == "Bench Guild"
+    assert locked_after
+
+
+def test_unsupported_discord_version_identifies(tmp_path, monkeypatch):
+    monkeypatch.setattr(gateway_session, "SUPPORTED_VERSIONS", ((1, 0), (1, 9)))
+    assert not gateway_session.install()
+
+    fake, saved, _, _, locked_after = asyncio.run(_restart(tmp_path / "session.json"))
+
+    assert saved is None
+    assert fake.resume_count == 0
+    assert fake.identify_count == 2
+    assert locked_after
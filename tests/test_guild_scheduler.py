@@ -0,0 +1,77 @@
+"""
+Round-robin slot grants and waiter cancellation in the guild scheduler.
+"""
+
+import asyncio
+
+from utils.guild_scheduler import GuildScheduler
+
+
+def test_flooding_guild_does_not_starve_another():
+    async def run():
+        scheduler = GuildScheduler(max_concurrent=2, per_guild=2)
+        served = []
+
+        async def work(guild_id, label):
+            async with scheduler.slot(guild_id):
+                served.append(label)
+                await asyncio.sleep(0.01)
+
+        flood = [asyncio.create_task(work(1, f"flood-{i}")) for i in range(50)]
+        await asyncio.sleep(0)
+        # Guild 1 holds every slot and has 48 more requests queued
+        assert scheduler.running == 2
+        assert scheduler.depth(1) == 48
+
+        quiet = asyncio.create_task(work(2, "quiet"))
+        await asyncio.wait_for(quiet, timeout=1)
+        # Served on the next free slot, not behind the whole flood
+        assert served.index("quiet") <= 3
+        assert scheduler.depth(1) > 40
+
+        await asyncio.gather(*flood)
+        assert scheduler.running == 0
+        assert scheduler.queued_total() == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_hands_on_its_granted_slot():
+    async def run():
+        scheduler = GuildScheduler(max_concurrent=1, per_guild=1)
+        await scheduler.acquire(1)
+        granted = asyncio.create_task(scheduler.acquire(1))
+        behind = asyncio.create_task(scheduler.acquire(2))
+        await asyncio.sleep(0)
+        assert scheduler.queued_total() == 2
+
+        # The release grants the first waiter; cancel it before it gets to run
+        scheduler.release(1)
+        granted.cancel()
+        await asyncio.wait_for(behind, timeout=1)
+        assert granted.cancelled()
+        assert scheduler.running == 1
+        assert scheduler.queued_total() == 0
+
+        scheduler.release(2)
+        assert scheduler.running == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_queued_waiter_leaves_the_queue():
+    async def run():
+        scheduler = GuildScheduler(max_concurrent=1, per_guild=1)
+        await scheduler.acquire(1)
+        waiter = asyncio.create_task(scheduler.acquire(1))
+        await asyncio.sleep(0)
+        assert scheduler.depth(1) == 1
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.depth(1) == 0
+        assert scheduler.queued_total() == 0
+        scheduler.release(1)
+        assert scheduler.running == 0
+
+    asyncio.run(run())
@@ -0,0 +1,102 @@
+"""
+Lock rules compiled into decision tables and evaluated for members.
+"""
+
+from utils.lock_policy import LEGACY_AUTO_DELETE_AFTER, compile_policy, validate_settings
+
+HELPER = 42
+MOD = 7
+ROLE_IDS = {"Helper": HELPER, "Moderator": MOD}
+
+
+def test_deny_wins_over_allow():
+    policy = compile_policy({
+        "authorized_roles": ["Helper"],
+        "lock_rules": [{"roles": ["Helper"], "channels": [1], "allow": False}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({HELPER}, 1) == (False, "denied", None, 0)
+    assert policy.evaluate({HELPER}, 2).allowed
+    # Staff skip role denials
+    assert policy.evaluate({HELPER}, 1, staff=True).allowed
+
+
+def test_deny_without_roles_applies_to_everyone():
+    policy = compile_policy({
+        "authorized_roles": ["Moderator"],
+        "lock_rules": [{"channels": [1], "allow": False}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({MOD}, 1).reason == "denied"
+    assert policy.evaluate({MOD}, 2).allowed
+
+
+def test_channel_grant_limits_role_to_its_channels():
+    policy = compile_policy({
+        "authorized_roles": ["Helper", "Moderator"],
+        "lock_rules": [{"roles": ["Helper"], "channels": [1]}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({HELPER}, 1).allowed
+    assert policy.evaluate({HELPER}, 2).reason == "no_role"
+    assert policy.evaluate({MOD}, 2).allowed
+
+
+def test_channel_grant_by_name_limits_role_granted_by_id():
+    policy = compile_policy({
+        "authorized_roles": [],
+        "authorized_role_ids": [HELPER],
+        "lock_rules": [{"roles": ["Helper"], "channels": [1]}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({HELPER}, 1).allowed
+    assert not policy.evaluate({HELPER}, 2).allowed
+
+
+def test_channel_grant_by_id_limits_role_granted_by_name():
+    policy = compile_policy({
+        "authorized_roles": ["Helper"],
+        "lock_rules": [{"roles": [HELPER], "channels": [1]}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({HELPER}, 1).allowed
+    assert not policy.evaluate({HELPER}, 2).allowed
+
+
+def test_min_thread_age_per_channel_and_guild_wide():
+    policy = compile_policy({
+        "authorized_roles": ["Moderator"],
+        "lock_rules": [{"min_thread_age": 600}, {"channels": [1], "min_thread_age": 60}],
+    }, role_ids=ROLE_IDS)
+    assert policy.evaluate({MOD}, 2, thread_age=300).reason == "too_new"
+    assert policy.evaluate({MOD}, 2, thread_age=900).allowed
+    assert policy.evaluate({MOD}, 1, thread_age=300).allowed
+    # Age limits apply to staff as well
+    assert policy.evaluate({MOD}, 1, staff=True, thread_age=30).reason == "too_new"
+
+
+def test_legacy_auto_delete_channels():
+    policy = compile_policy({"auto_delete_channels": [5]}, authorized_roles=["Moderator"],
+                            auto_delete_channels=[6], role_ids=ROLE_IDS)
+    assert policy.evaluate({MOD}, 5).auto_delete_after == LEGACY_AUTO_DELETE_AFTER
+    assert policy.evaluate({MOD}, 6).auto_delete_after == LEGACY_AUTO_DELETE_AFTER
+    assert policy.evaluate({MOD}, 7).auto_delete_after is None
+
+
+def test_role_names_resolve_to_ids():
+    policy = compile_policy({"authorized_roles": ["Moderator", "Ghost"]}, role_ids=ROLE_IDS)
+    assert policy.by_id
+    assert policy.global_allowed == {MOD}
+    assert policy.unknown_roles == {"Ghost"}
+    assert policy.evaluate({MOD}, 1).allowed
+    assert not policy.evaluate({"Moderator"}, 1).allowed
+
+
+def test_unresolved_policy_matches_names():
+    policy = compile_policy({"authorized_roles": ["Moderator"]})
+    assert not policy.by_id
+    assert policy.evaluate({"Moderator", MOD}, 1).allowed
+    assert not policy.evaluate({"Helper", HELPER}, 1).allowed
+
+
+def test_rule_lists_must_be_lists():
+    errors = validate_settings({"lock_rules": [{"roles": "Helper", "channels": [1]}, {"channels": 1}]})
+    assert errors == ["lock rule #1: roles must be a list", "lock rule #2: channels must be a list"]
+    policy = compile_policy({"lock_rules": [{"roles": "Helper", "channels": [1]}]}, role_ids=ROLE_IDS)
+    assert policy.rule_count == 0
+    assert policy.allowed == {}
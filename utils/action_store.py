@@ -0,0 +1,402 @@
+"""
+SQLite-backed store for moderation actions with batched background writes.
+"""
+
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from utils.moderator_stats import UPSERT_COUNT, day_of, moderator_stats
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thread_actions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    action TEXT NOT NULL,
+    guild_id INTEGER,
+    guild_name TEXT,
+    thread_id INTEGER,
+    thread_name TEXT,
+    moderator_id INTEGER,
+    moderator TEXT,
+    info TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_actions_guild_ts ON thread_actions (guild_id, ts);
+CREATE INDEX IF NOT EXISTS idx_actions_moderator_ts ON thread_actions (moderator_id, ts);
+CREATE INDEX IF NOT EXISTS idx_actions_thread_ts ON thread_actions (thread_id, ts);
+CREATE INDEX IF NOT EXISTS idx_actions_ts ON thread_actions (ts);
+CREATE TABLE IF NOT EXISTS action_counts (
+    guild_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, moderator_id, day, action)
+) WITHOUT ROWID;
+"""
+
+# External-content full-text index over the searchable columns, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE thread_actions_fts USING fts5(
+    thread_name, moderator, info,
+    content='thread_actions', content_rowid='id', tokenize='{tokenizer}'
+);
+CREATE TRIGGER thread_actions_fts_insert AFTER INSERT ON thread_actions BEGIN
+    INSERT INTO thread_actions_fts (rowid, thread_name, moderator, info)
+    VALUES (new.id, new.thread_name, new.moderator, new.info);
+END;
+CREATE TRIGGER thread_actions_fts_delete AFTER DELETE ON thread_actions BEGIN
+    INSERT INTO thread_actions_fts (thread_actions_fts, rowid, thread_name, moderator, info)
+    VALUES ('delete', old.id, old.thread_name, old.moderator, old.info);
+END;
+"""
+
+INSERT_ACTION = """
+INSERT INTO thread_actions (ts, action, guild_id, guild_name, thread_id, thread_name, moderator_id, moderator, info)
+VALUES (:ts, :action, :guild_id, :guild_name, :thread_id, :thread_name, :moderator_id, :moderator, :info)
+"""
+
+ACTION_LOG_LINE = re.compile(
+    r"^(?P<ts>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) UTC \| \[(?P<action>[A-Z_]+)\] "
+    r"Thread '(?P<thread>.*)' by (?P<moderator>\S+) in (?P<guild>.+?)(?: - (?P<info>.*))?$"
+)
+
+SEARCH_COLUMNS = "a.id, a.ts, a.action, a.thread_id, a.thread_name, a.moderator_id, a.moderator, a.info"
+
+# Tries for a batch before its actions are given up on
+COMMIT_ATTEMPTS = 3
+COMMIT_RETRY_DELAY = 0.2
+
+_STOP = object()
+
+
+def parse_action_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse a ``logs/thread_actions.log`` line into an action record."""
+    match = ACTION_LOG_LINE.match(line.rstrip("\n"))
+    if not match:
+        return None
+    ts = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    return {
+        "ts": ts,
+        "action": match["action"],
+        "guild_id": None,
+        "guild_name": match["guild"],
+        "thread_id": None,
+        "thread_name": match["thread"],
+        "moderator_id": None,
+        "moderator": match["moderator"],
+        "info": match["info"],
+    }
+
+
+class ActionStore:
+    """Queues actions from the event loop and commits them in batches from a writer thread."""
+
+    def __init__(self, db_path: str = "data/actions.db", flush_interval: float = 1.0, batch_size: int = 500,
+                 text_log: str = "logs/thread_actions.log"):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.text_log = text_log
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_batch_ms = 0.0
+
+    def configure(self, db_path: str = None, flush_interval: float = None, batch_size: int = None) -> None:
+        """Apply settings from configuration before the store is started."""
+        if db_path:
+            self.db_path = db_path
+        if flush_interval:
+            self.flush_interval = flush_interval
+        if batch_size:
+            self.batch_size = batch_size
+
+    def start(self) -> None:
+        """Open the database and start the writer thread."""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._writer, name="action-store-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, action: Dict[str, Any], log_line: str = None) -> None:
+        """Queue an action for the next batch; never blocks on disk."""
+        self._queue.put((action, log_line))
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far has been committed."""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Commit outstanding actions and stop the writer thread."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        if self._thread:
+            self._thread.join(timeout)
+        self.running = False
+        self.logger.info(f"Action store closed after {self.written} action(s) in {self.batches} batch(es)")
+
+    def connect(self, readonly: bool = True) -> sqlite3.Connection:
+        """Open an extra connection for queries (WAL lets readers run alongside the writer)."""
+        if readonly:
+            connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _ensure_fts(self, connection: sqlite3.Connection) -> None:
+        """Create the full-text index on first run and index rows that predate it."""
+        exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'thread_actions_fts'"
+        ).fetchone()
+        if exists:
+            return
+
+        # Trigram matches substrings of messy names like 'Drew_Leonarrdo' or '<@9687...>'
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                connection.executescript(FTS_SCHEMA.format(tokenizer=tokenizer))
+                break
+            except sqlite3.OperationalError as e:
+                self.logger.warning(f"Full-text index with tokenizer {tokenizer} unavailable: {e}")
+        else:
+            return
+
+        if connection.execute("SELECT 1 FROM thread_actions LIMIT 1").fetchone():
+            started = time.perf_counter()
+            with connection:
+                connection.execute("INSERT INTO thread_actions_fts (thread_actions_fts) VALUES ('rebuild')")
+            self.logger.info(f"Built full-text index in {time.perf_counter() - started:.1f}s")
+
+    def prepare(self) -> None:
+        """Create the schema and backfill from the text log on first run (call off the event loop)."""
+        connection = self._open()
+        try:
+            self._ensure_fts(connection)
+            empty = connection.execute("SELECT 1 FROM thread_actions LIMIT 1").fetchone() is None
+            if empty and self.text_log and os.path.exists(self.text_log):
+                with open(self.text_log, "r", encoding="utf-8", errors="replace") as f:
+                    records = [record for record in map(parse_action_line, f) if record]
+                if records:
+                    with connection:
+                        self._insert(connection, records)
+                    self.logger.info(f"Imported {len(records)} action(s) from {self.text_log}")
+        finally:
+            connection.close()
+
+    def load_counts(self, since_day: int = 0) -> List[Tuple[int, int, int, str, int]]:
+        """Read persisted moderator counters (call off the event loop)."""
+        connection = self._open()
+        try:
+            return connection.execute(
+                "SELECT guild_id, moderator_id, day, action, count FROM action_counts WHERE day >= ?",
+                (since_day,)
+            ).fetchall()
+        finally:
+            connection.close()
+
+    def search(self, guild_id: int, guild_name: str, terms: List[str] = None, since: float = None,
+               until: float = None, actions: List[str] = None, before_id: int = None,
+               limit: int = 10) -> List[sqlite3.Row]:
+        """Newest-first actions in a guild matching every term (call off the event loop).
+
+        Pages are keyed by ``before_id``; time filters are turned into row ID bounds
+        through the ts index so the full-text index only walks the requested window.
+        """
+        connection = self.connect()
+        try:
+            fts = terms and connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'thread_actions_fts'"
+            ).fetchone()
+
+            low_id, high_id = 0, before_id - 1 if before_id else 2 ** 63 - 1
+            if since is not None:
+                row = connection.execute(
+                    "SELECT id FROM thread_actions WHERE ts >= ? ORDER BY ts LIMIT 1", (since,)
+                ).fetchone()
+                if row is None:
+                    return []
+                low_id = row[0]
+            if until is not None:
+                row = connection.execute(
+                    "SELECT id FROM thread_actions WHERE ts < ? ORDER BY ts DESC LIMIT 1", (until,)
+                ).fetchone()
+                if row is None:
+                    return []
+                high_id = min(high_id, row[0])
+
+            # Bound the row IDs on the table that drives the scan so it walks newest-first from there
+            id_column = "thread_actions_fts.rowid" if fts else "a.id"
+            conditions = [
+                f"{id_column} BETWEEN ? AND ?",
+                "(a.guild_id = ? OR (a.guild_id IS NULL AND a.guild_name = ?))",
+            ]
+            params: List[Any] = [low_id, high_id, guild_id, guild_name]
+            if since is not None:
+                conditions.append("a.ts >= ?")
+                params.append(since)
+            if until is not None:
+                conditions.append("a.ts < ?")
+                params.append(until)
+            if actions:
+                conditions.append(f"a.action IN ({', '.join('?' * len(actions))})")
+                params.extend(actions)
+
+            if fts:
+                phrases = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+                sql = (
+                    f"SELECT {SEARCH_COLUMNS} FROM thread_actions_fts "
+                    f"JOIN thread_actions a ON a.id = thread_actions_fts.rowid "
+                    f"WHERE thread_actions_fts MATCH ? AND {' AND '.join(conditions)} "
+                    f"ORDER BY thread_actions_fts.rowid DESC LIMIT ?"
+                )
+                params.insert(0, phrases)
+            else:
+                for term in terms or []:
+                    conditions.append("(a.thread_name LIKE ? OR a.moderator LIKE ? OR a.info LIKE ?)")
+                    params.extend([f"%{term}%"] * 3)
+                sql = (
+                    f"SELECT {SEARCH_COLUMNS} FROM thread_actions a NOT INDEXED "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY a.id DESC LIMIT ?"
+                )
+            params.append(limit)
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def _insert(self, connection: sqlite3.Connection, records: List[Dict[str, Any]]) -> None:
+        """Insert a batch of records and bump their counters inside the caller's transaction."""
+        connection.executemany(INSERT_ACTION, records)
+        connection.executemany(UPSERT_COUNT, [
+            (record["guild_id"], record["moderator_id"], day_of(record["ts"]), record["action"])
+            for record in records
+            if record["guild_id"] is not None and record["moderator_id"] is not None
+        ])
+
+    def _writer(self) -> None:
+        try:
+            connection = self._open()
+        except Exception as e:
+            self.logger.error(f"Failed to open action store {self.db_path}: {e}")
+            self.running = False
+            self._drain_to_text_log()
+            return
+        self.logger.info(f"Action store started at {self.db_path}")
+
+        pending: List[Dict[str, Any]] = []
+        lines: List[str] = []
+        waiters: List[threading.Event] = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    action, log_line = item
+                    pending.append(action)
+                    if log_line:
+                        lines.append(log_line)
+            except queue.Empty:
+                pass
+
+            due = time.monotonic() >= deadline
+            if pending and (due or stopping or waiters or len(pending) >= self.batch_size):
+                self._commit(connection, pending, lines)
+                pending, lines = [], []
+            if due or not pending:
+                deadline = time.monotonic() + self.flush_interval
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+        connection.close()
+
+    def _drain_to_text_log(self) -> None:
+        """Keep already queued actions in the text log when the database is unavailable."""
+        lines = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is not _STOP and item[1]:
+                lines.append(item[1])
+        if lines and self.text_log:
+            with open(self.text_log, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def _commit(self, connection: sqlite3.Connection, pending: List[Dict[str, Any]], lines: List[str]) -> None:
+        started = time.perf_counter()
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                with connection:
+                    self._insert(connection, pending)
+                self.written += len(pending)
+                self.batches += 1
+                break
+            except Exception as e:
+                if attempt < COMMIT_ATTEMPTS:
+                    self.logger.warning(f"Retrying {len(pending)} action(s) for {self.db_path}: {e}")
+                    time.sleep(COMMIT_RETRY_DELAY * attempt)
+                    continue
+                self.logger.error(f"Failed to write {len(pending)} action(s) to {self.db_path}: {e}")
+                # Take them back out of the counters, which would otherwise disagree with action_counts
+                moderator_stats.forget(pending)
+                self.dropped += len(pending)
+
+        if lines and self.text_log:
+            try:
+                os.makedirs(os.path.dirname(self.text_log) or ".", exist_ok=True)
+                with open(self.text_log, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except Exception as e:
+                self.logger.error(f"Failed to write to thread actions log: {e}")
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        """Writer throughput counters."""
+        return {
+            "running": self.running,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "last_batch_ms": round(self.last_batch_ms, 2),
+        }
+
+
+# Shared store used by log_thread_action
+action_store = ActionStore()
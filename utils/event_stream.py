@@ -0,0 +1,144 @@
+"""
+Server-sent event fan-out for the live dashboard.
+
+Each event is serialized once into an SSE frame and appended to a bounded ring; every
+connected dashboard reads the same frames from the ring, so a hundred open dashboards
+cost one ``json.dumps`` per event rather than a hundred.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Actions pushed to dashboards (the failure variants included)
+STREAMED_ACTIONS = ("LOCK", "UNLOCK", "DELETE", "AUTO_DELETE")
+
+# Rolling counter windows in seconds
+COUNTER_WINDOWS = {"1h": 3600, "24h": 86400}
+
+
+class EventBroadcaster:
+    """A ring of pre-serialized SSE frames plus rolling per-action counters."""
+
+    def __init__(self, capacity: int = 1024, replay: int = 50, keepalive: float = 15.0):
+        self.capacity = capacity
+        self.replay = replay
+        self.keepalive = keepalive
+
+        self._frames: Deque[Tuple[int, bytes]] = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._sequence = 0
+
+        # Per-minute action counts, oldest first, covering the longest counter window
+        self._minutes: Deque[Tuple[int, Counter]] = deque(maxlen=max(COUNTER_WINDOWS.values()) // 60)
+        self._counter_task: Optional[asyncio.Task] = None
+
+        self.subscribers = 0
+        self.published = 0
+
+    def _append(self, event: str, data: Dict[str, Any]) -> None:
+        with self._condition:
+            self._sequence += 1
+            frame = f"id: {self._sequence}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            self._frames.append((self._sequence, frame.encode("utf-8")))
+            self.published += 1
+            self._condition.notify_all()
+
+    def publish_action(self, entry: Dict[str, Any]) -> None:
+        """Push a thread action to every dashboard and count it."""
+        action = entry.get("action", "")
+        if not action.startswith(STREAMED_ACTIONS):
+            return
+
+        minute = int(entry.get("ts") or time.time()) // 60
+        with self._condition:
+            if not self._minutes or self._minutes[-1][0] != minute:
+                self._minutes.append((minute, Counter()))
+            self._minutes[-1][1][action] += 1
+
+        self._append("action", entry)
+
+    def counters(self, now: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+        """Action counts over each rolling window."""
+        current = int(now or time.time()) // 60
+        result = {}
+        for label, seconds in COUNTER_WINDOWS.items():
+            since = current - seconds // 60
+            totals: Counter = Counter()
+            with self._condition:
+                for minute, counts in self._minutes:
+                    if minute > since:
+                        totals.update(counts)
+            result[label] = dict(totals)
+        return result
+
+    def publish_counters(self) -> None:
+        """Push the rolling counters; skipped while nobody is watching."""
+        if self.subscribers:
+            self._append("counters", {"ts": time.time(), "counters": self.counters()})
+
+    def start(self, counter_interval: float = 5.0) -> None:
+        """Push counters every ``counter_interval`` seconds from the running loop."""
+        if self._counter_task is None or self._counter_task.done():
+            self._counter_task = asyncio.get_running_loop().create_task(self._push_counters(counter_interval))
+
+    def stop(self) -> None:
+        if self._counter_task:
+            self._counter_task.cancel()
+            self._counter_task = None
+
+    async def _push_counters(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.publish_counters()
+
+    def frames_after(self, last_id: int) -> Tuple[List[bytes], int, bool]:
+        """Frames newer than ``last_id``, the newest ID, and whether older frames were missed (call locked)."""
+        frames = self._frames
+        if not frames or frames[-1][0] <= last_id:
+            return [], last_id, False
+        oldest = frames[0][0]
+        missed = last_id and last_id < oldest - 1
+        start = max(0, last_id - oldest + 1)
+        selected = [frame for _, frame in itertools.islice(frames, start, None)]
+        return selected, frames[-1][0], bool(missed)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Iterator[bytes]:
+        """Generator of SSE frames for one client; blocks between events, with keepalive comments."""
+        with self._condition:
+            self.subscribers += 1
+            # An ID ahead of the sequence comes from before a restart: start over from the ring
+            restarted = last_event_id is not None and last_event_id > self._sequence
+            if last_event_id is None or restarted:
+                last_event_id = max(0, self._sequence - self.replay)
+        try:
+            yield b"retry: 3000\n\n"
+            yield (f"event: counters\ndata: {json.dumps({'ts': time.time(), 'counters': self.counters()})}\n\n"
+                   .encode("utf-8"))
+            if restarted:
+                yield b"event: gap\ndata: {}\n\n"
+            while True:
+                with self._condition:
+                    if self._sequence <= last_event_id:
+                        self._condition.wait(timeout=self.keepalive)
+                    frames, last_event_id, missed = self.frames_after(last_event_id)
+                if missed:
+                    yield b"event: gap\ndata: {}\n\n"
+                if frames:
+                    yield b"".join(frames)
+                else:
+                    yield b": keepalive\n\n"
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"subscribers": self.subscribers, "published": self.published, "buffered": len(self._frames)}
+
+
+# Shared broadcaster fed by log_thread_action and read by the web interface
+event_stream = EventBroadcaster()
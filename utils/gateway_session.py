@@ -0,0 +1,289 @@
+"""
+Gateway session persistence so a restarted process can RESUME instead of IDENTIFY.
+
+At shutdown the session ID, last sequence number, resume URL and a GUILD_CREATE-shaped
+copy of the guild cache are saved. On the next start the cache is seeded from that copy
+and the first connection sends RESUME; Discord then replays only the events missed
+while the process was down. If the session is no longer valid Discord answers with
+INVALID_SESSION and discord.py falls back to a normal IDENTIFY.
+
+Resuming across processes leans on discord.py internals (the socket factory, the cache
+seeding and ready hooks), so it is only enabled on the discord.py releases it has been
+checked against; on any other release the bot identifies as usual.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import discord
+import discord.client
+import discord.state
+import yarl
+from discord.gateway import DiscordWebSocket
+
+logger = logging.getLogger(__name__)
+
+# Oldest and newest discord.py (major, minor) releases the internals below were checked against
+SUPPORTED_VERSIONS = ((2, 5), (2, 7))
+
+_ORIGINAL_WEBSOCKET = discord.client.DiscordWebSocket
+
+
+class ResumingWebSocket(DiscordWebSocket):
+    """Gateway socket that resumes a saved session and keeps it resumable on shutdown.
+
+    It also notes when it last received anything (heartbeat ACKs included) and when it
+    last received a dispatched event, for the health snapshot.
+    """
+
+    last_received: float = 0.0
+    last_event: float = 0.0
+
+    @classmethod
+    async def from_client(cls, client, **kwargs):
+        saved = getattr(client, "saved_gateway_session", None)
+        if saved and kwargs.get("initial"):
+            client.saved_gateway_session = None
+            kwargs.update(
+                resume=True,
+                session=saved["session_id"],
+                sequence=saved["sequence"],
+                gateway=yarl.URL(saved["resume_url"])
+            )
+            logger.info(f"Resuming gateway session {saved['session_id'][:8]}… at sequence {saved['sequence']}")
+            try:
+                return await super().from_client(client, **kwargs)
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # discord.py cannot retry a failed first connection, so identify from scratch
+                logger.warning(f"Resume gateway unreachable ({e}); identifying instead")
+                kwargs.update(resume=False, session=None, sequence=None, gateway=None)
+        return await super().from_client(client, **kwargs)
+
+    async def received_message(self, msg, /) -> None:
+        sequence = self.sequence
+        self.last_received = time.monotonic()
+        await super().received_message(msg)
+        # Only dispatched events carry a sequence number
+        if self.sequence != sequence:
+            self.last_event = self.last_received
+
+    async def close(self, code: int = 4000) -> None:
+        # Closing with 1000 tells Discord to invalidate the session
+        if code == 1000 and getattr(self, "keep_session", False):
+            code = 4000
+        await super().close(code=code)
+
+
+def supported() -> bool:
+    """Whether this discord.py release has the internals resuming relies on."""
+    version = (discord.version_info.major, discord.version_info.minor)
+    if not SUPPORTED_VERSIONS[0] <= version <= SUPPORTED_VERSIONS[1]:
+        return False
+    parameters = inspect.signature(DiscordWebSocket.from_client).parameters
+    return (
+        _ORIGINAL_WEBSOCKET is DiscordWebSocket
+        and all(name in parameters for name in ("initial", "gateway", "session", "sequence", "resume"))
+        and callable(getattr(discord.state.ConnectionState, "_add_guild_from_data", None))
+        and callable(getattr(discord.state.ConnectionState, "call_handlers", None))
+    )
+
+
+def install() -> bool:
+    """Make discord.py create gateway sockets through ResumingWebSocket; False if it can't."""
+    if not supported():
+        logger.warning(
+            f"Gateway resume is not supported on discord.py {discord.__version__}; the bot will identify on every start"
+        )
+        return False
+    discord.client.DiscordWebSocket = ResumingWebSocket
+    return True
+
+
+def uninstall() -> None:
+    """Restore discord.py's own gateway socket."""
+    discord.client.DiscordWebSocket = _ORIGINAL_WEBSOCKET
+
+
+def seed_cache(client: discord.Client, guilds: List[Dict[str, Any]]) -> bool:
+    """Fill the client's guild cache from saved GUILD_CREATE payloads; False if that failed.
+
+    A failure leaves a partial cache behind, which the READY of a normal IDENTIFY clears.
+    """
+    try:
+        for guild_data in guilds:
+            client._connection._add_guild_from_data(guild_data)
+    except Exception as e:
+        logger.error(f"Could not restore the saved guild cache ({e}); identifying instead")
+        return False
+    return True
+
+
+def mark_ready(client: discord.Client) -> None:
+    """Run discord.py's own READY handling (what ``wait_until_ready`` waits on) for a resumed session."""
+    client._connection.call_handlers("ready")
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _overwrite(target, overwrite: discord.PermissionOverwrite) -> Dict[str, Any]:
+    allow, deny = overwrite.pair()
+    is_role = isinstance(target, discord.Role) or getattr(target, "type", None) is discord.Role
+    return {"id": str(target.id), "type": 0 if is_role else 1, "allow": str(allow.value), "deny": str(deny.value)}
+
+
+def _member(member: discord.Member) -> Dict[str, Any]:
+    return {
+        "user": {
+            "id": str(member.id),
+            "username": member.name,
+            "discriminator": member.discriminator,
+            "global_name": member.global_name,
+            "avatar": None,
+            "bot": member.bot,
+        },
+        "roles": [str(role.id) for role in member.roles if not role.is_default()],
+        "nick": member.nick,
+        "joined_at": _iso(member.joined_at),
+        "deaf": False,
+        "mute": False,
+        "flags": member.flags.value,
+    }
+
+
+def serialize_guild(guild: discord.Guild) -> Dict[str, Any]:
+    """A GUILD_CREATE-shaped payload with what the bot needs from the cache."""
+    channels = []
+    for channel in guild.channels:
+        data = {
+            "id": str(channel.id),
+            "type": channel.type.value,
+            "name": channel.name,
+            "position": channel.position,
+            "parent_id": str(channel.category_id) if channel.category_id else None,
+            "permission_overwrites": [_overwrite(target, overwrite) for target, overwrite in channel.overwrites.items()],
+            "nsfw": getattr(channel, "nsfw", False),
+            "flags": channel.flags.value if hasattr(channel, "flags") else 0,
+        }
+        if isinstance(channel, (discord.TextChannel, discord.ForumChannel)):
+            data["topic"] = channel.topic
+            data["rate_limit_per_user"] = channel.slowmode_delay
+        if isinstance(channel, discord.ForumChannel):
+            data["available_tags"] = [
+                {"id": str(tag.id), "name": tag.name, "moderated": tag.moderated,
+                 "emoji_id": None, "emoji_name": None}
+                for tag in channel.available_tags
+            ]
+            data["default_reaction_emoji"] = None
+        channels.append(data)
+
+    threads = [
+        {
+            "id": str(thread.id),
+            "guild_id": str(guild.id),
+            "parent_id": str(thread.parent_id),
+            "owner_id": str(thread.owner_id) if thread.owner_id else None,
+            "name": thread.name,
+            "type": thread.type.value,
+            "message_count": thread.message_count,
+            "member_count": thread.member_count,
+            "rate_limit_per_user": thread.slowmode_delay,
+            "flags": thread.flags.value,
+            "applied_tags": [str(tag.id) for tag in thread.applied_tags],
+            "thread_metadata": {
+                "archived": thread.archived,
+                "auto_archive_duration": thread.auto_archive_duration,
+                "archive_timestamp": _iso(thread.archive_timestamp),
+                "locked": thread.locked,
+                "invitable": thread.invitable,
+                "create_timestamp": _iso(thread.created_at),
+            },
+        }
+        for thread in guild.threads
+    ]
+
+    # Only the bot's own member is kept (permission checks need it); message events carry
+    # their author's member, and saving every member of every guild would make the file huge
+    members = [_member(guild.me)] if guild.me else []
+
+    return {
+        "id": str(guild.id),
+        "name": guild.name,
+        "owner_id": str(guild.owner_id) if guild.owner_id else None,
+        "unavailable": False,
+        "large": guild.large,
+        "member_count": guild.member_count,
+        "features": list(guild.features),
+        "emojis": [],
+        "stickers": [],
+        "roles": [
+            {
+                "id": str(role.id),
+                "name": role.name,
+                "permissions": str(role.permissions.value),
+                "position": role.position,
+                "color": role.color.value,
+                "hoist": role.hoist,
+                "managed": role.managed,
+                "mentionable": role.mentionable,
+                "flags": 0,
+            }
+            for role in guild.roles
+        ],
+        "channels": channels,
+        "threads": threads,
+        "members": members,
+    }
+
+
+def save_session(path: str, ws: DiscordWebSocket, user_id: int, guilds: List[discord.Guild]) -> bool:
+    """Persist a resumable session; returns False when there is nothing to resume."""
+    if not ws or not ws.session_id or ws.sequence is None:
+        return False
+
+    state = {
+        "session_id": ws.session_id,
+        "sequence": ws.sequence,
+        "resume_url": str(ws.gateway),
+        "user_id": user_id,
+        "saved_at": time.time(),
+        "guilds": [serialize_guild(guild) for guild in guilds if not guild.unavailable],
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temp_path, path)
+    return True
+
+
+def load_session(path: str, user_id: int, max_age: float) -> Optional[Dict[str, Any]]:
+    """Read and remove a saved session; sessions too old to resume or for another bot are dropped."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable gateway session {path}: {e}")
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    age = time.time() - state.get("saved_at", 0)
+    if state.get("user_id") != user_id:
+        return None
+    if age > max_age:
+        logger.info(f"Gateway session is {age:.0f}s old; identifying instead of resuming")
+        return None
+    return state
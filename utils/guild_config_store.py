@@ -0,0 +1,293 @@
+"""
+Per-guild configuration records in SQLite, loaded on first use and cached with LRU eviction.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_configs (
+    guild_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class PreconditionFailed(Exception):
+    """Raised when a conditional write finds records changed since their ETags were read."""
+
+    def __init__(self, conflicts: Dict[str, str]):
+        super().__init__(f"{len(conflicts)} guild record(s) changed")
+        # Guild ID -> the record's current ETag
+        self.conflicts = conflicts
+
+
+def record_etag(record: Dict[str, Any]) -> str:
+    """Strong ETag for a record: a hash of its canonical JSON (quoted, as HTTP expects)."""
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f'"{hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:20]}"'
+
+
+class GuildConfigStore:
+    """One JSON record per guild; reads are cached, writes touch only the changed guild.
+
+    Each thread uses its own SQLite connection, so with WAL a batch written from the web
+    thread never blocks reads on the event loop. ``_cache_lock`` only ever guards the
+    in-memory dictionaries and is never held across a query.
+    """
+
+    def __init__(self, db_path: str = "data/guild_configs.db", cache_size: int = 1024):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+
+        # Guild ID -> record; guilds without a record are cached as empty dicts
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Derived per-guild objects (e.g. compiled lock policies), dropped with their record
+        self._compiled: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        # Serialises writers, so a conditional batch checks and writes as one step
+        self._write_lock = threading.Lock()
+        # Bumped whenever records are written, so a read that raced a write isn't cached
+        self._generation = 0
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+            with self._cache_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _remember(self, guild_id: str, record: Dict[str, Any]) -> None:
+        self._cache[guild_id] = record
+        self._cache.move_to_end(guild_id)
+        self._compiled.pop(guild_id, None)
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            self._compiled.pop(evicted, None)
+            self.evictions += 1
+
+    def _remember_read(self, guild_id: str, record: Dict[str, Any], generation: int) -> Dict[str, Any]:
+        """Cache a record read from disk unless a write landed since; call with ``_cache_lock`` held."""
+        cached = self._cache.get(guild_id)
+        if cached is not None:
+            return cached
+        if generation == self._generation:
+            self._remember(guild_id, record)
+        return record
+
+    def get(self, guild_id) -> Dict[str, Any]:
+        """The guild's record (empty when it has none). Treat the result as read-only."""
+        guild_id = str(guild_id)
+        with self._cache_lock:
+            record = self._cache.get(guild_id)
+            if record is not None:
+                self._cache.move_to_end(guild_id)
+                self.hits += 1
+                return record
+            self.misses += 1
+            generation = self._generation
+
+        row = self._connect().execute(
+            "SELECT data FROM guild_configs WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+        record = json.loads(row[0]) if row else {}
+        with self._cache_lock:
+            return self._remember_read(guild_id, record, generation)
+
+    def get_compiled(self, guild_id, compiler: Callable[[Dict[str, Any]], Any]) -> Any:
+        """``compiler(record)`` for the guild, computed once per cached record."""
+        guild_id = str(guild_id)
+        compiled = self._compiled.get(guild_id)
+        if compiled is None:
+            record = self.get(guild_id)
+            compiled = compiler(record)
+            with self._cache_lock:
+                if self._cache.get(guild_id) is record:
+                    self._compiled[guild_id] = compiled
+        return compiled
+
+    def invalidate_compiled(self, guild_id=None) -> None:
+        """Forget derived objects for one guild, or all of them after a global setting changed."""
+        with self._cache_lock:
+            if guild_id is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop(str(guild_id), None)
+
+    def is_compiled(self, guild_id) -> bool:
+        return str(guild_id) in self._compiled
+
+    def put(self, guild_id, record: Dict[str, Any]) -> None:
+        """Replace one guild's record."""
+        with self._write_lock:
+            self._write(str(guild_id), record)
+
+    def _write(self, guild_id: str, record: Dict[str, Any]) -> None:
+        """Write one record; call with ``_write_lock`` held."""
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT INTO guild_configs (guild_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (guild_id, json.dumps(record, ensure_ascii=False), time.time())
+            )
+        with self._cache_lock:
+            self._generation += 1
+            self._remember(guild_id, record)
+
+    def update(self, guild_id, **changes) -> Dict[str, Any]:
+        """Merge ``changes`` into one guild's record and write it back."""
+        with self._write_lock:
+            record = dict(self.get(guild_id))
+            record.update(changes)
+            self._write(str(guild_id), record)
+        return record
+
+    def is_empty(self) -> bool:
+        """Whether no guild has a stored record yet."""
+        return self._connect().execute("SELECT 1 FROM guild_configs LIMIT 1").fetchone() is None
+
+    def preload(self, guild_ids: Iterable) -> int:
+        """Load many guilds into the cache with one query per chunk; returns how many were read."""
+        pending = [str(guild_id) for guild_id in guild_ids]
+        loaded = 0
+        for start in range(0, len(pending), 500):
+            chunk = pending[start:start + 500]
+            with self._cache_lock:
+                generation = self._generation
+            rows = dict(self._connect().execute(
+                f"SELECT guild_id, data FROM guild_configs WHERE guild_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+            records = {guild_id: json.loads(rows[guild_id]) if guild_id in rows else {} for guild_id in chunk}
+            with self._cache_lock:
+                for guild_id, record in records.items():
+                    if guild_id not in self._cache and generation == self._generation:
+                        self._remember(guild_id, record)
+                        loaded += 1
+        return loaded
+
+    def read_many(self, guild_ids: Optional[Iterable] = None) -> Dict[str, Dict[str, Any]]:
+        """Records for many guilds (every stored guild when ``guild_ids`` is None), leaving the cache as is."""
+        connection = self._connect()
+        if guild_ids is None:
+            rows = connection.execute("SELECT guild_id, data FROM guild_configs").fetchall()
+            return {guild_id: json.loads(data) for guild_id, data in rows}
+
+        records: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        with self._cache_lock:
+            for guild_id in map(str, guild_ids):
+                if guild_id in self._cache:
+                    records[guild_id] = self._cache[guild_id]
+                else:
+                    pending.append(guild_id)
+        for start in range(0, len(pending), 500):
+            chunk = pending[start:start + 500]
+            rows = dict(connection.execute(
+                f"SELECT guild_id, data FROM guild_configs WHERE guild_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall())
+            for guild_id in chunk:
+                records[guild_id] = json.loads(rows[guild_id]) if guild_id in rows else {}
+        return records
+
+    def replace_many(self, records: Dict[Any, Dict[str, Any]],
+                     expected: Optional[Dict[Any, str]] = None) -> Dict[str, str]:
+        """Replace many guilds' records in one transaction; returns their new ETags.
+
+        ``expected`` maps guild IDs to the ETags the caller last read. If any stored record
+        no longer matches, nothing is written and PreconditionFailed lists the conflicts.
+        """
+        records = {str(guild_id): record for guild_id, record in records.items()}
+        expected = {str(guild_id): etag for guild_id, etag in (expected or {}).items()}
+        with self._write_lock:
+            connection = self._connect()
+            with connection:
+                if expected:
+                    conflicts = {}
+                    for guild_id, etag in expected.items():
+                        row = connection.execute(
+                            "SELECT data FROM guild_configs WHERE guild_id = ?", (guild_id,)
+                        ).fetchone()
+                        current = record_etag(json.loads(row[0]) if row else {})
+                        if etag != "*" and etag != current:
+                            conflicts[guild_id] = current
+                    if conflicts:
+                        raise PreconditionFailed(conflicts)
+
+                now = time.time()
+                connection.executemany(
+                    "INSERT INTO guild_configs (guild_id, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (guild_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                    [(guild_id, json.dumps(record, ensure_ascii=False), now) for guild_id, record in records.items()]
+                )
+            # The batch is committed; swap the cached records in all at once
+            with self._cache_lock:
+                self._generation += 1
+                for guild_id, record in records.items():
+                    self._remember(guild_id, record)
+        return {guild_id: record_etag(record) for guild_id, record in records.items()}
+
+    def import_records(self, records: Dict[str, Dict[str, Any]]) -> int:
+        """Merge records into the store in one transaction; keys already stored win."""
+        with self._write_lock:
+            connection = self._connect()
+            with connection:
+                for guild_id, record in records.items():
+                    row = connection.execute(
+                        "SELECT data FROM guild_configs WHERE guild_id = ?", (str(guild_id),)
+                    ).fetchone()
+                    merged = dict(record)
+                    if row:
+                        merged.update(json.loads(row[0]))
+                    connection.execute(
+                        "INSERT OR REPLACE INTO guild_configs (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                        (str(guild_id), json.dumps(merged, ensure_ascii=False), time.time())
+                    )
+            with self._cache_lock:
+                self._generation += 1
+                for guild_id in records:
+                    self._cache.pop(str(guild_id), None)
+                    self._compiled.pop(str(guild_id), None)
+        return len(records)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache effectiveness counters."""
+        return {
+            "cached": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._write_lock, self._cache_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            # Threads open fresh connections if the store is used again
+            self._local = threading.local()
@@ -0,0 +1,177 @@
+"""
+Fair scheduling of lock and delete work across guilds.
+
+Work asks for a slot in its guild before touching Discord. Each guild may hold only a
+few slots at once and the bot only so many in total; when slots are short, waiting
+guilds are served round-robin, one slot per guild per turn. A guild flooding the bot
+with requests builds up its own queue while other guilds keep getting their turns.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from utils.tracing import span
+
+
+class GuildQueue:
+    """Waiters and wait-time statistics for one guild."""
+
+    __slots__ = ("waiters", "running", "in_ring", "granted", "queued", "total_wait", "max_wait", "recent_wait")
+
+    def __init__(self):
+        self.waiters: Deque[Tuple[asyncio.Future, float]] = deque()
+        self.running = 0
+        # Whether the guild is in the scheduler's round-robin ring
+        self.in_ring = False
+
+        self.granted = 0
+        # Grants that had to wait for a slot
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # Moving average of recent waits, so an old burst fades out
+        self.recent_wait = 0.0
+
+    def to_dict(self, guild_id: int) -> Dict[str, Any]:
+        return {
+            "guild_id": guild_id,
+            "depth": len(self.waiters),
+            "running": self.running,
+            "granted": self.granted,
+            "queued": self.queued,
+            "avg_wait_ms": round(self.total_wait / self.granted * 1000, 2) if self.granted else 0.0,
+            "recent_wait_ms": round(self.recent_wait * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class GuildScheduler:
+    """Per-guild slot limits under a global limit, granted round-robin; used from the event loop only."""
+
+    def __init__(self, max_concurrent: int = 64, per_guild: int = 8):
+        self.max_concurrent = max_concurrent
+        self.per_guild = per_guild
+
+        self.running = 0
+        # Waiters across all guilds, kept as a running count for cheap load checks
+        self.waiting = 0
+        self._queues: Dict[int, GuildQueue] = {}
+        # Guilds with waiters, in the order they are served
+        self._ring: Deque[int] = deque()
+
+    def configure(self, max_concurrent: int = None, per_guild: int = None) -> None:
+        if max_concurrent:
+            self.max_concurrent = max(1, max_concurrent)
+        if per_guild:
+            self.per_guild = max(1, per_guild)
+
+    def _queue(self, guild_id: int) -> GuildQueue:
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = GuildQueue()
+        return queue
+
+    @contextlib.asynccontextmanager
+    async def slot(self, guild_id: int):
+        """Hold one of the guild's slots for the body of the ``async with``."""
+        async with span("guild_queue"):
+            await self.acquire(guild_id)
+        try:
+            yield
+        finally:
+            self.release(guild_id)
+
+    async def acquire(self, guild_id: int) -> None:
+        queue = self._queue(guild_id)
+        if not queue.waiters and queue.running < self.per_guild and self.running < self.max_concurrent:
+            self._grant(queue, 0.0)
+            return
+
+        entry = (asyncio.get_running_loop().create_future(), time.monotonic())
+        queue.waiters.append(entry)
+        self.waiting += 1
+        self._schedule(guild_id, queue)
+        try:
+            await entry[0]
+        except asyncio.CancelledError:
+            if entry[0].cancelled():
+                with contextlib.suppress(ValueError):
+                    queue.waiters.remove(entry)
+                    self.waiting -= 1
+            else:
+                # Granted just as the waiter was cancelled: hand the slot on
+                self.release(guild_id)
+            raise
+
+    def release(self, guild_id: int) -> None:
+        queue = self._queues[guild_id]
+        queue.running -= 1
+        self.running -= 1
+        if queue.waiters:
+            self._schedule(guild_id, queue)
+        self._pump()
+
+    def _schedule(self, guild_id: int, queue: GuildQueue) -> None:
+        if not queue.in_ring:
+            queue.in_ring = True
+            self._ring.append(guild_id)
+
+    def _grant(self, queue: GuildQueue, waited: float) -> None:
+        queue.running += 1
+        self.running += 1
+        queue.granted += 1
+        if waited:
+            queue.queued += 1
+            queue.total_wait += waited
+            queue.max_wait = max(queue.max_wait, waited)
+        queue.recent_wait = queue.recent_wait * 0.9 + waited * 0.1
+
+    def _pump(self) -> None:
+        """Grant free slots to waiting guilds, one per guild per pass around the ring."""
+        now = time.monotonic()
+        while self.running < self.max_concurrent and self._ring:
+            guild_id = self._ring.popleft()
+            queue = self._queues[guild_id]
+            while queue.waiters and queue.waiters[0][0].done():
+                queue.waiters.popleft()
+                self.waiting -= 1
+            if not queue.waiters or queue.running >= self.per_guild:
+                # Rejoins the ring when one of its slots is released
+                queue.in_ring = False
+                continue
+
+            future, enqueued_at = queue.waiters.popleft()
+            self.waiting -= 1
+            self._grant(queue, now - enqueued_at)
+            future.set_result(None)
+            if queue.waiters:
+                self._ring.append(guild_id)
+            else:
+                queue.in_ring = False
+
+    def depth(self, guild_id: int) -> int:
+        queue = self._queues.get(guild_id)
+        return len(queue.waiters) if queue else 0
+
+    def queued_total(self) -> int:
+        return self.waiting
+
+    def stats(self, limit: int = 20) -> Dict[str, Any]:
+        """Totals plus the guilds with the deepest queues and longest recent waits."""
+        guilds: List[Dict[str, Any]] = [queue.to_dict(guild_id) for guild_id, queue in list(self._queues.items())]
+        guilds.sort(key=lambda item: (item["depth"], item["recent_wait_ms"]), reverse=True)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "per_guild": self.per_guild,
+            "running": self.running,
+            "queued": sum(item["depth"] for item in guilds),
+            "guilds_waiting": sum(1 for item in guilds if item["depth"]),
+            "guilds": guilds[:limit],
+        }
+
+
+# Shared scheduler for lock and delete work, read by the web interface
+guild_scheduler = GuildScheduler()
@@ -0,0 +1,87 @@
+"""
+Health snapshot published from the event loop and judged by the web interface.
+
+The bot replaces ``health.snapshot`` with a fresh dict a few times per second. Readers on
+other threads just take the current reference, so ``/health`` never waits on the loop;
+a snapshot that stops being refreshed is itself the sign of a wedged loop.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Snapshot field -> config key of its upper limit (0 disables a check)
+THRESHOLDS = {
+    "snapshot_age_s": "health_max_snapshot_age_s",
+    "gateway_latency_ms": "health_max_gateway_latency_ms",
+    "heartbeat_age_s": "health_max_heartbeat_age_s",
+    "last_event_age_s": "health_max_event_age_s",
+    "loop_lag_ms": "health_max_loop_lag_ms",
+    "action_queue": "health_max_action_queue",
+}
+
+
+class HealthPublisher:
+    """Builds the health snapshot on the loop and evaluates it anywhere."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.limits: Dict[str, float] = {}
+        self.logger = logging.getLogger(__name__)
+
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def configure(self, interval: float = None, limits: Dict[str, float] = None) -> None:
+        if interval:
+            self.interval = interval
+        if limits is not None:
+            self.limits = {field: value for field, value in limits.items() if value}
+
+    def start(self, collect: Callable[[], Dict[str, Any]]) -> None:
+        """Publish ``collect()`` every interval on the running loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._publish(collect))
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.snapshot = None
+
+    async def _publish(self, collect: Callable[[], Dict[str, Any]]) -> None:
+        while True:
+            try:
+                snapshot = collect()
+                snapshot["published_at"] = time.time()
+                snapshot["_published_mono"] = time.monotonic()
+                self.snapshot = snapshot
+            except Exception as e:
+                self.logger.error(f"Failed to collect health snapshot: {e}")
+            await asyncio.sleep(self.interval)
+
+    def evaluate(self) -> Tuple[bool, Dict[str, Any]]:
+        """(healthy, report) for the current snapshot; lock-free and safe from any thread."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            return False, {"health": "starting", "failing": ["no_snapshot"]}
+
+        values = dict(snapshot)
+        values["snapshot_age_s"] = round(time.monotonic() - values.pop("_published_mono"), 3)
+
+        failing: List[str] = []
+        if not values.get("gateway_connected"):
+            failing.append("gateway_disconnected")
+        for field, limit in self.limits.items():
+            value = values.get(field)
+            if value is not None and value > limit:
+                failing.append(f"{field}>{limit:g}")
+
+        values["health"] = "ok" if not failing else "unhealthy"
+        values["failing"] = failing
+        return not failing, values
+
+
+# Shared publisher used by the bot and the web interface
+health = HealthPublisher()
@@ -0,0 +1,229 @@
+"""
+Instrumentation for discord.py's REST client: per-route latency histograms, rate-limit
+buckets, retries and connection reuse.
+
+Logical calls are timed by wrapping ``HTTPClient.request`` (that time includes rate-limit
+waits and retries); the individual attempts underneath are seen through an aiohttp
+``TraceConfig`` passed to the client as ``http_trace``.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from utils.tracing import span
+
+# Upper bounds of the latency histogram buckets in milliseconds; the last bucket is open
+BUCKET_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_current_call: contextvars.ContextVar[Optional["CallRecord"]] = contextvars.ContextVar("current_http_call",
+                                                                                        default=None)
+
+
+class CallRecord:
+    """What happened underneath one ``HTTPClient.request`` call."""
+
+    __slots__ = ("attempts", "reused", "opened", "status", "rate_limited", "bucket", "remaining", "reset_after")
+
+    def __init__(self):
+        self.attempts = 0
+        self.reused = 0
+        self.opened = 0
+        self.status: Optional[int] = None
+        self.rate_limited = 0
+        self.bucket: Optional[str] = None
+        self.remaining: Optional[int] = None
+        self.reset_after: Optional[float] = None
+
+
+class RouteStats:
+    """Latency histogram and counters for one route template."""
+
+    __slots__ = ("calls", "errors", "retries", "rate_limited", "total_ms", "max_ms", "histogram", "statuses")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.statuses: Dict[int, int] = {}
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        if not self.calls:
+            return None
+        rank = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def to_dict(self, route: str) -> Dict[str, Any]:
+        return {
+            "route": route,
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "total_ms": round(self.total_ms, 2),
+            "statuses": dict(self.statuses),
+            "histogram": dict(zip([f"<={bound}" for bound in BUCKET_BOUNDS_MS] + ["more"], self.histogram)),
+        }
+
+
+class HttpMetrics:
+    """Aggregates REST call metrics; updated on the event loop, read from anywhere."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: Dict[str, RouteStats] = {}
+        # Rate-limit bucket hash -> last seen limit, remaining and reset
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.global_rate_limits = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig to pass to the client as ``http_trace``."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        trace_config.on_connection_create_end.append(self._on_connection_created)
+        return trace_config
+
+    def install(self, http) -> None:
+        """Time every logical request made through ``http`` (a discord.py HTTPClient)."""
+        original = http.request
+
+        async def request(route, **kwargs):
+            return await self.call(original, route, **kwargs)
+
+        http.request = request
+
+    async def call(self, request, route, **kwargs):
+        record = CallRecord()
+        token = _current_call.set(record)
+        started = time.perf_counter()
+        error = False
+        try:
+            with span("http", route=route.key) as http_span:
+                try:
+                    return await request(route, **kwargs)
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    http_span.annotate(
+                        status=record.status,
+                        attempts=record.attempts,
+                        reused=record.reused,
+                        remaining=record.remaining,
+                    )
+        finally:
+            _current_call.reset(token)
+            self._record(route.key, (time.perf_counter() - started) * 1000, record, error)
+
+    def _record(self, key: str, elapsed_ms: float, record: CallRecord, error: bool) -> None:
+        with self._lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.retries += max(0, record.attempts - 1)
+            stats.rate_limited += record.rate_limited
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.histogram[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+            if record.status is not None:
+                stats.statuses[record.status] = stats.statuses.get(record.status, 0) + 1
+
+    async def _on_request_start(self, session, context, params) -> None:
+        record = _current_call.get()
+        if record is not None:
+            record.attempts += 1
+
+    async def _on_request_end(self, session, context, params) -> None:
+        record = _current_call.get()
+        if record is None:
+            return
+        response = params.response
+        headers = response.headers
+        record.status = response.status
+        if response.status == 429:
+            record.rate_limited += 1
+            if headers.get("X-RateLimit-Global"):
+                self.global_rate_limits += 1
+
+        bucket = headers.get("X-RateLimit-Bucket")
+        if bucket:
+            try:
+                remaining = int(headers.get("X-RateLimit-Remaining", 0))
+                reset_after = float(headers.get("X-RateLimit-Reset-After", 0))
+                limit = int(headers.get("X-RateLimit-Limit", 0))
+            except ValueError:
+                return
+            record.bucket, record.remaining, record.reset_after = bucket, remaining, reset_after
+            with self._lock:
+                self.buckets[bucket] = {
+                    "limit": limit,
+                    "remaining": remaining,
+                    "reset_after": reset_after,
+                    "seen_at": time.time(),
+                    "route": f"{params.method} {params.url.path}",
+                }
+
+    async def _on_connection_reused(self, session, context, params) -> None:
+        self.connections_reused += 1
+        record = _current_call.get()
+        if record is not None:
+            record.reused += 1
+
+    async def _on_connection_created(self, session, context, params) -> None:
+        self.connections_opened += 1
+        record = _current_call.get()
+        if record is not None:
+            record.opened += 1
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        """Slowest routes by total time, the emptiest rate-limit buckets and connection reuse."""
+        now = time.time()
+        with self._lock:
+            routes = [stats.to_dict(route) for route, stats in self.routes.items()]
+            buckets = [
+                {"bucket": bucket, **state, "reset_in": round(max(0.0, state["reset_after"] - (now - state["seen_at"])), 3)}
+                for bucket, state in self.buckets.items()
+            ]
+        routes.sort(key=lambda item: item["total_ms"], reverse=True)
+        buckets.sort(key=lambda item: (item["remaining"], -item["seen_at"]))
+        opened, reused = self.connections_opened, self.connections_reused
+        return {
+            "calls": sum(item["calls"] for item in routes),
+            "routes": routes[:limit],
+            "buckets": buckets[:limit],
+            "connections": {
+                "opened": opened,
+                "reused": reused,
+                "reuse_ratio": round(reused / (opened + reused), 3) if opened + reused else None,
+            },
+            "global_rate_limits": self.global_rate_limits,
+        }
+
+
+# Shared metrics for the bot's HTTP client and the web interface
+http_metrics = HttpMetrics()
@@ -0,0 +1,126 @@
+"""
+Load shedding for low-priority Discord calls while the bot is saturated.
+
+Pressure is judged from the sampled event-loop lag and the depth of the guild work
+queues. Under pressure, courtesy notices and progress updates are dropped, and timed-out
+button edits are deferred until the pressure has passed. Lock and delete work is never
+shed. Pressure starts at the configured limits and ends only once both signals fall below
+half of them, so shedding doesn't flap around a limit.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from utils.guild_scheduler import guild_scheduler
+from utils.performance import performance_monitor
+
+
+class LoadShedder:
+    """Decides, per low-priority call, whether to run it now, defer it or drop it."""
+
+    def __init__(self, max_lag_ms: float = 500, max_queue_depth: int = 200, deferred_max: int = 500,
+                 deferred_interval: float = 1.0):
+        self.max_lag = max_lag_ms / 1000
+        self.max_queue_depth = max_queue_depth
+        self.deferred_interval = deferred_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.under_pressure = False
+        self.pressure_since: Optional[float] = None
+        self.pressure_episodes = 0
+
+        # Deferred calls, oldest first; the oldest are dropped when the queue is full
+        self._deferred: Deque[Tuple[str, Callable[[], Awaitable[Any]]]] = deque(maxlen=deferred_max)
+        self._task: Optional[asyncio.Task] = None
+
+        self.shed: Counter = Counter()
+        self.deferred: Counter = Counter()
+        self.dropped_deferred: Counter = Counter()
+
+    def configure(self, max_lag_ms: float = None, max_queue_depth: int = None, deferred_max: int = None) -> None:
+        if max_lag_ms:
+            self.max_lag = max_lag_ms / 1000
+        if max_queue_depth:
+            self.max_queue_depth = max_queue_depth
+        if deferred_max:
+            self._deferred = deque(self._deferred, maxlen=deferred_max)
+
+    def pressure(self) -> bool:
+        """Whether the bot is saturated, with hysteresis."""
+        lag = performance_monitor.current_lag
+        depth = guild_scheduler.waiting
+        if not self.under_pressure:
+            if lag >= self.max_lag or depth >= self.max_queue_depth:
+                self.under_pressure = True
+                self.pressure_since = time.monotonic()
+                self.pressure_episodes += 1
+                self.logger.warning(
+                    f"Shedding low-priority work (loop lag {lag * 1000:.0f}ms, {depth} queued lock/delete operation(s))"
+                )
+        elif lag < self.max_lag / 2 and depth < self.max_queue_depth / 2:
+            self.under_pressure = False
+            self.logger.info(
+                f"Load back to normal after {time.monotonic() - self.pressure_since:.1f}s; "
+                f"shed so far: {dict(self.shed)}"
+            )
+            self.pressure_since = None
+        return self.under_pressure
+
+    def should_shed(self, kind: str) -> bool:
+        """True (and counted) when a droppable call of this kind should be skipped."""
+        if self.pressure():
+            self.shed[kind] += 1
+            return True
+        return False
+
+    async def run_or_defer(self, kind: str, call: Callable[[], Awaitable[Any]]) -> None:
+        """Await ``call()`` now, or queue it to run once the pressure has passed."""
+        if not self.pressure():
+            await call()
+            return
+        if len(self._deferred) == self._deferred.maxlen:
+            self.dropped_deferred[self._deferred[0][0]] += 1
+        self._deferred.append((kind, call))
+        self.deferred[kind] += 1
+
+    def start(self) -> None:
+        """Replay deferred calls from the running loop whenever the pressure is off."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._replay())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for kind, _ in self._deferred:
+            self.dropped_deferred[kind] += 1
+        self._deferred.clear()
+
+    async def _replay(self) -> None:
+        while True:
+            await asyncio.sleep(self.deferred_interval)
+            # Checking every tick also ends an episode when nothing else asks
+            while not self.pressure() and self._deferred:
+                kind, call = self._deferred.popleft()
+                try:
+                    await call()
+                except Exception as e:
+                    self.logger.debug(f"Deferred {kind} call failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "under_pressure": self.under_pressure,
+            "pressure_for_s": round(time.monotonic() - self.pressure_since, 1) if self.pressure_since else 0.0,
+            "pressure_episodes": self.pressure_episodes,
+            "shed": dict(self.shed),
+            "deferred": dict(self.deferred),
+            "deferred_pending": len(self._deferred),
+            "dropped_deferred": dict(self.dropped_deferred),
+        }
+
+
+# Shared policy for the bot's low-priority calls
+load_shedder = LoadShedder()
@@ -0,0 +1,212 @@
+"""
+Declarative lock rules compiled into a per-guild decision table.
+
+Rules live under ``lock_rules`` in a guild's settings, for example::
+
+    {"roles": ["Helper"], "channels": [1284896757662224604]}
+    {"min_thread_age": 600}
+    {"channels": [1284896757662224604], "auto_delete_after": 5}
+    {"roles": ["Trial Mod"], "channels": [123], "allow": false}
+
+``roles`` holds role names or IDs and ``channels`` holds the parent channel IDs of
+threads; leaving either out means "any". A role that is granted in specific channels
+may lock only there, even if it is also listed in ``authorized_roles``.
+
+When compiled with the guild's roles, role names are resolved to IDs up front so a
+member is matched on role IDs alone; names no role has are reported and dropped.
+"""
+
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Stands for "every member" in deny rules without roles
+EVERYONE = "@everyone"
+
+RULE_KEYS = {"roles", "channels", "allow", "min_thread_age", "auto_delete_after"}
+
+# Legacy auto_delete_channels delete this many seconds after locking
+LEGACY_AUTO_DELETE_AFTER = 5
+
+
+class LockDecision(NamedTuple):
+    """Outcome of evaluating a lock request."""
+    allowed: bool
+    reason: Optional[str] = None
+    auto_delete_after: Optional[float] = None
+    min_thread_age: float = 0
+
+
+class CompiledPolicy:
+    """Decision table for one guild; evaluation is a handful of dict and set lookups."""
+
+    __slots__ = ("allowed", "global_allowed", "denied", "global_denied", "min_thread_age", "auto_delete_after",
+                 "rule_count", "by_id", "unknown_roles")
+
+    def __init__(self):
+        self.allowed: Dict[int, FrozenSet] = {}
+        self.global_allowed: FrozenSet = frozenset()
+        self.denied: Dict[int, FrozenSet] = {}
+        self.global_denied: FrozenSet = frozenset()
+        self.min_thread_age: Dict[Optional[int], float] = {}
+        self.auto_delete_after: Dict[int, float] = {}
+        self.rule_count = 0
+        # Set when role names were resolved: callers pass role IDs only
+        self.by_id = False
+        self.unknown_roles: FrozenSet[str] = frozenset()
+
+    def evaluate(self, role_keys: Set, channel_id: Optional[int], staff: bool = False,
+                 thread_age: Optional[float] = None) -> LockDecision:
+        """Decide a lock for a member holding ``role_keys`` (role IDs, plus names unless ``by_id``) in ``channel_id``.
+
+        ``staff`` members (administrator or manage_threads) skip role grants and denials;
+        thread age limits and auto-delete apply to everyone.
+        """
+        auto_delete_after = self.auto_delete_after.get(channel_id)
+        min_age = self.min_thread_age.get(channel_id, self.min_thread_age.get(None, 0))
+
+        if not staff:
+            denied = self.denied.get(channel_id)
+            if (denied and (EVERYONE in denied or not role_keys.isdisjoint(denied))) or (
+                    self.global_denied and (EVERYONE in self.global_denied
+                                            or not role_keys.isdisjoint(self.global_denied))):
+                return LockDecision(False, "denied", auto_delete_after, min_age)
+
+            allowed = self.allowed.get(channel_id)
+            if not ((allowed and not role_keys.isdisjoint(allowed))
+                    or not role_keys.isdisjoint(self.global_allowed)):
+                return LockDecision(False, "no_role", auto_delete_after, min_age)
+
+        if min_age and thread_age is not None and thread_age < min_age:
+            return LockDecision(False, "too_new", auto_delete_after, min_age)
+
+        return LockDecision(True, None, auto_delete_after, min_age)
+
+
+def _ids(values: Iterable) -> List[int]:
+    return [int(value) for value in values]
+
+
+def _role_keys(values: Iterable) -> List:
+    """Role IDs stay integers (also when written as digit strings); anything else is a role name."""
+    return [int(value) if str(value).isdigit() else str(value) for value in values]
+
+
+def _resolve(keys: Set, role_ids: Dict[str, int], unknown: Set[str]) -> FrozenSet:
+    resolved = set()
+    for key in keys:
+        if isinstance(key, int) or key == EVERYONE:
+            resolved.add(key)
+        elif key in role_ids:
+            resolved.add(role_ids[key])
+        else:
+            unknown.add(key)
+    return frozenset(resolved)
+
+
+def _parse_rule(rule: Any):
+    """(roles, channels, allow, min_thread_age, auto_delete_after) of one rule; raises ValueError/TypeError."""
+    if not isinstance(rule, dict):
+        raise ValueError("rule must be an object")
+    if set(rule) - RULE_KEYS:
+        raise ValueError(f"unknown keys {sorted(set(rule) - RULE_KEYS)}")
+    for key in ("roles", "channels"):
+        if not isinstance(rule.get(key, []), list):
+            raise ValueError(f"{key} must be a list")
+    roles = _role_keys(rule.get("roles", []))
+    channels = _ids(rule.get("channels", []))
+    allow = bool(rule.get("allow", True))
+    min_age = float(rule["min_thread_age"]) if "min_thread_age" in rule else None
+    auto_delete_after = float(rule["auto_delete_after"]) if "auto_delete_after" in rule else None
+    if auto_delete_after is not None and not channels:
+        raise ValueError("auto_delete_after needs channels")
+    return roles, channels, allow, min_age, auto_delete_after
+
+
+def validate_settings(settings: Any) -> List[str]:
+    """Problems that ``compile_policy`` would log and skip, for rejecting settings up front."""
+    if not isinstance(settings, dict):
+        return ["settings must be an object"]
+
+    errors = []
+    for key in ("authorized_roles", "authorized_role_ids", "auto_delete_channels", "lock_rules"):
+        if key in settings and not isinstance(settings[key], list):
+            errors.append(f"{key} must be a list")
+    if errors:
+        return errors
+
+    if not all(isinstance(role, str) for role in settings.get("authorized_roles", [])):
+        errors.append("authorized_roles must hold role names")
+    for key in ("authorized_role_ids", "auto_delete_channels"):
+        if not all(str(value).isdigit() for value in settings.get(key, [])):
+            errors.append(f"{key} must hold IDs")
+    for index, rule in enumerate(settings.get("lock_rules", [])):
+        try:
+            _parse_rule(rule)
+        except (TypeError, ValueError) as e:
+            errors.append(f"lock rule #{index + 1}: {e}")
+    return errors
+
+
+def compile_policy(settings: Dict[str, Any], authorized_roles: Iterable[str] = (),
+                   auto_delete_channels: Iterable[int] = (),
+                   role_ids: Optional[Dict[str, int]] = None) -> CompiledPolicy:
+    """Compile a guild's settings into a decision table.
+
+    ``authorized_roles`` and ``authorized_role_ids`` become guild-wide grants and
+    ``auto_delete_channels`` become auto-delete rules, so existing configs keep working.
+    Invalid rules are logged and skipped. With ``role_ids`` (the guild's role name -> ID
+    map) the table holds role IDs only.
+    """
+    policy = CompiledPolicy()
+    allowed: Dict[int, Set] = {}
+    denied: Dict[int, Set] = {}
+    global_allowed: Set = set(_role_keys(settings.get("authorized_roles", authorized_roles)))
+    global_allowed.update(_role_keys(settings.get("authorized_role_ids", [])))
+    global_denied: Set = set()
+
+    for channel_id in list(auto_delete_channels) + list(settings.get("auto_delete_channels", [])):
+        policy.auto_delete_after[int(channel_id)] = LEGACY_AUTO_DELETE_AFTER
+
+    restricted: Set = set()
+    for index, rule in enumerate(settings.get("lock_rules", [])):
+        try:
+            roles, channels, allow, min_age, auto_delete_after = _parse_rule(rule)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping invalid lock rule #{index + 1}: {e}")
+            continue
+
+        if roles or not allow:
+            if allow:
+                restricted.update(roles if channels else [])
+            for channel_id in channels or [None]:
+                target = (allowed if allow else denied).setdefault(channel_id, set())
+                target.update(roles or [EVERYONE])
+        if min_age is not None:
+            for channel_id in channels or [None]:
+                policy.min_thread_age[channel_id] = min_age
+        if auto_delete_after is not None:
+            for channel_id in channels:
+                policy.auto_delete_after[channel_id] = auto_delete_after
+        policy.rule_count += 1
+
+    # Roles granted per channel may lock only in those channels
+    global_allowed.update(allowed.pop(None, set()))
+    global_denied.update(denied.pop(None, set()))
+    if role_ids is None:
+        policy.global_allowed = frozenset(global_allowed - restricted)
+        policy.global_denied = frozenset(global_denied)
+        policy.allowed = {channel_id: frozenset(roles) for channel_id, roles in allowed.items()}
+        policy.denied = {channel_id: frozenset(roles) for channel_id, roles in denied.items()}
+        return policy
+
+    unknown: Set[str] = set()
+    # Subtract as IDs, so a restriction holds however the role is spelled in each place
+    policy.global_allowed = _resolve(global_allowed, role_ids, unknown) - _resolve(restricted, role_ids, unknown)
+    policy.global_denied = _resolve(global_denied, role_ids, unknown)
+    policy.allowed = {channel_id: _resolve(roles, role_ids, unknown) for channel_id, roles in allowed.items()}
+    policy.denied = {channel_id: _resolve(roles, role_ids, unknown) for channel_id, roles in denied.items()}
+    policy.by_id = True
+    policy.unknown_roles = frozenset(unknown)
+    return policy
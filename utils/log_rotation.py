@@ -0,0 +1,188 @@
+"""
+Size- and time-based log rotation with background compression and a disk budget.
+"""
+
+import glob
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+
+class LogCompressor:
+    """Gzips rotated log files and enforces the disk budget from a background thread."""
+
+    def __init__(self, base_path: str, disk_budget_bytes: int):
+        self.base_path = base_path
+        self.disk_budget_bytes = disk_budget_bytes
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-compressor", daemon=True)
+        self._thread.start()
+
+        # Pick up files rotated by a previous run that exited before compressing them
+        for path in self.archives():
+            if not path.endswith(".gz"):
+                self.submit(path)
+
+    def submit(self, path: Optional[str] = None) -> None:
+        """Queue a rotated file for compression (or just a budget check when ``path`` is None)."""
+        self._queue.put(path)
+
+    def archives(self):
+        """Rotated files for this log, oldest first."""
+        paths = [path for path in glob.glob(f"{glob.escape(self.base_path)}.*") if not path.endswith(".tmp")]
+        return sorted(paths, key=self._age)
+
+    @staticmethod
+    def _age(path: str):
+        try:
+            return (os.path.getmtime(path), path)
+        except OSError:
+            return (0.0, path)
+
+    def _run(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                if path:
+                    self._compress(path)
+                self.enforce_budget()
+            except Exception as e:
+                # Never let housekeeping kill the thread; the next rotation will retry
+                sys.stderr.write(f"Log compression failed for {path}: {e}\n")
+
+    def _compress(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+
+        size = os.path.getsize(path)
+        if shutil.disk_usage(os.path.dirname(path) or ".").free < size:
+            # Compressing needs room for the copy; make space first
+            self.enforce_budget(self.disk_budget_bytes // 2)
+            if shutil.disk_usage(os.path.dirname(path) or ".").free < size:
+                os.remove(path)
+                return
+
+        temp_path = f"{path}.gz.tmp"
+        try:
+            with open(path, "rb") as source, gzip.open(temp_path, "wb", compresslevel=6) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            os.replace(temp_path, f"{path}.gz")
+            os.remove(path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def enforce_budget(self, budget_bytes: Optional[int] = None) -> int:
+        """Delete the oldest archives until the log and its archives fit the budget; returns bytes freed."""
+        budget_bytes = self.disk_budget_bytes if budget_bytes is None else budget_bytes
+        archives = []
+        for path in self.archives():
+            try:
+                archives.append((path, os.path.getsize(path)))
+            except OSError:
+                continue
+
+        try:
+            total = os.path.getsize(self.base_path)
+        except OSError:
+            total = 0
+        total += sum(size for _, size in archives)
+
+        freed = 0
+        for path, size in archives:
+            if total <= budget_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+        return freed
+
+
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """Rotates on size or age, hands rotated files to a LogCompressor and survives a full disk.
+
+    Meant to run behind a QueueListener so rotation never happens on the event loop.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 10 * 1024 * 1024, interval_hours: float = 24,
+                 disk_budget_bytes: int = 100 * 1024 * 1024, disk_error_backoff: float = 30.0):
+        super().__init__(filename, mode="a", encoding="utf-8", delay=False)
+        self.max_bytes = max_bytes
+        self.interval = interval_hours * 3600
+        self.disk_error_backoff = disk_error_backoff
+        self.rollover_at = time.time() + self.interval
+        self.compressor = LogCompressor(self.baseFilename, disk_budget_bytes)
+
+        self.dropped = 0
+        self._paused_until = 0.0
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes and self.stream is not None:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        rotated = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(f"{rotated}.gz"):
+            rotated = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, rotated)
+            self.compressor.submit(rotated)
+        self.rollover_at = time.time() + self.interval
+        self.stream = self._open()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._paused_until:
+            if time.monotonic() < self._paused_until:
+                self.dropped += 1
+                return
+            self._paused_until = 0.0
+            if self.dropped:
+                notice = logging.makeLogRecord({
+                    "name": __name__,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Dropped {self.dropped} log record(s) while the disk was full",
+                })
+                self.dropped = 0
+                super().emit(notice)
+        super().emit(record)
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        error = sys.exc_info()[1]
+        if not isinstance(error, OSError):
+            super().handleError(record)
+            return
+
+        # Out of space (or similar): stop writing for a while, free what we can and reopen later
+        self.dropped += 1
+        self._paused_until = time.monotonic() + self.disk_error_backoff
+        sys.stderr.write(f"Log file {self.baseFilename} unwritable ({error}); pausing file logging\n")
+        try:
+            if self.stream:
+                self.stream.close()
+        except OSError:
+            pass
+        self.stream = None
+        self.compressor.enforce_budget(self.compressor.disk_budget_bytes // 2)
@@ -2,56 +2,87 @@
 Logging utilities for the Discord Thread Lock Bot.
 """
 
+import atexit
 import logging
 import os
-from datetime import datetime
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
 from typing import Optional
+from utils.action_store import action_store
+from utils.log_rotation import CompressingRotatingFileHandler
+from utils.moderator_stats import moderator_stats
+from utils.event_stream import event_stream
+from utils.tracing import span
 
 def setup_logger(log_level: str = "INFO", log_file: str = "bot.log") -> None:
-    """Set up logging configuration."""
+    """Set up logging configuration.
+
+    Records are handed to a queue and written by a listener thread, so rotating,
+    compressing or a slow disk never stalls the event loop.
+    """
     # Create logs directory if it doesn't exist
     os.makedirs("logs", exist_ok=True)
     
     # Configure logging format
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     date_format = "%Y-%m-%d %H:%M:%S"
+    formatter = logging.Formatter(log_format, datefmt=date_format)
     
     # Get log level from environment or use default
     level = getattr(logging, os.getenv("LOG_LEVEL", log_level).upper(), logging.INFO)
     
+    # Rotate at LOG_MAX_MB or every LOG_ROTATE_HOURS, keeping bot.log and its archives within LOG_DISK_BUDGET_MB
+    file_handler = CompressingRotatingFileHandler(
+        f"logs/{log_file}",
+        max_bytes=int(float(os.getenv("LOG_MAX_MB", "10")) * 1024 * 1024),
+        interval_hours=float(os.getenv("LOG_ROTATE_HOURS", "24")),
+        disk_budget_bytes=int(float(os.getenv("LOG_DISK_BUDGET_MB", "100")) * 1024 * 1024)
+    )
+    console_handler = logging.StreamHandler()
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
     # Configure root logger
     logging.basicConfig(
         level=level,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            logging.FileHandler(f"logs/{log_file}", encoding='utf-8'),
-            logging.StreamHandler()
-        ]
+        handlers=[QueueHandler(log_queue)]
     )
     
     # Set discord.py logging level to WARNING to reduce noise
     logging.getLogger("discord").setLevel(logging.WARNING)
     logging.getLogger("discord.http").setLevel(logging.WARNING)
+    
+    # Werkzeug logs a development server banner on every start and a line per request
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 def log_thread_action(action: str, thread_name: str, moderator: str, guild_name: str, 
-                     additional_info: Optional[str] = None) -> None:
-    """Log thread actions to both file and console."""
+                     additional_info: Optional[str] = None, guild_id: Optional[int] = None,
+                     thread_id: Optional[int] = None, moderator_id: Optional[int] = None) -> None:
+    """Log thread actions to the console, the action store and the thread actions log."""
     logger = logging.getLogger("thread_actions")
     
     # Create action log entry
-    timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    now = datetime.now(timezone.utc)
+    timestamp = now.strftime("%Y-%m-%d %H:%M:%S UTC")
     log_entry = {
-        "timestamp": timestamp,
+        "ts": now.timestamp(),
         "action": action,
+        "guild_id": guild_id,
+        "guild_name": guild_name,
+        "thread_id": thread_id,
         "thread_name": thread_name,
+        "moderator_id": moderator_id,
         "moderator": moderator,
-        "guild": guild_name
+        "info": additional_info
     }
     
-    if additional_info:
-        log_entry["info"] = additional_info
-    
     # Format log message
     log_message = f"[{action}] Thread '{thread_name}' by {moderator} in {guild_name}"
     if additional_info:
@@ -59,7 +90,16 @@ def log_thread_action(action: str, thread_name: str, moderator: str, guild_name:
     
     logger.info(log_message)
     
-    # Also write to specific thread actions log
+    # Keep per-moderator counters current for !lockstats and push the action to live dashboards
+    moderator_stats.record(log_entry)
+    event_stream.publish_action(log_entry)
+    
+    # Hand the entry to the store's writer thread so the event loop never waits on disk
+    if action_store.running:
+        action_store.record(log_entry, f"{timestamp} | {log_message}\n")
+        return
+    
+    # Store not running (e.g. standalone scripts): write the thread actions log directly
     try:
         os.makedirs("logs", exist_ok=True)
         with open("logs/thread_actions.log", "a", encoding="utf-8") as f:
@@ -72,7 +112,7 @@ def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 class ThreadActionLogger:
-    """Context manager for thread action logging."""
+    """Context manager for thread action logging, usable with ``with`` or ``async with``."""
     
     def __init__(self, action: str, thread_name: str, moderator: str, guild_name: str):
         self.action = action
@@ -80,16 +120,21 @@ class ThreadActionLogger:
         self.moderator = moderator
         self.guild_name = guild_name
         self.logger = logging.getLogger(__name__)
-        self.start_time = None
+        self.start_ns = None
+        self.span = None
     
     def __enter__(self):
-        self.start_time = datetime.utcnow()
+        self.start_ns = time.perf_counter_ns()
         self.logger.info(f"Starting {self.action} for thread '{self.thread_name}'")
+        
+        # Record the action as a stage of the active trace, if any
+        self.span = span(self.action.lower(), thread_name=self.thread_name)
+        self.span.__enter__()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        end_time = datetime.utcnow()
-        duration = (end_time - self.start_time).total_seconds()
+        self.span.__exit__(exc_type, exc_val, exc_tb)
+        duration = (time.perf_counter_ns() - self.start_ns) / 1_000_000_000
         
         if exc_type is None:
             # Success
@@ -110,3 +155,9 @@ class ThreadActionLogger:
                 self.guild_name,
                 f"Error: {exc_val}"
             )
+    
+    async def __aenter__(self):
+        return self.__enter__()
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__exit__(exc_type, exc_val, exc_tb)
@@ -0,0 +1,131 @@
+"""
+Incrementally maintained per-day, per-moderator, per-guild action counters.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+SECONDS_PER_DAY = 86400
+
+UPSERT_COUNT = """
+INSERT INTO action_counts (guild_id, moderator_id, day, action, count)
+VALUES (?, ?, ?, ?, 1)
+ON CONFLICT (guild_id, moderator_id, day, action) DO UPDATE SET count = count + 1
+"""
+
+PERIODS = {"today": 1, "day": 1, "week": 7, "month": 30, "year": 365}
+PERIOD_PATTERN = re.compile(r"^(\d{1,3})d$")
+
+
+def parse_period(period: str) -> Optional[int]:
+    """Turn 'today', 'week', 'month', 'year' or 'Nd' into a number of days."""
+    period = (period or "week").lower()
+    if period in PERIODS:
+        return PERIODS[period]
+    match = PERIOD_PATTERN.match(period)
+    if match and 0 < int(match.group(1)) <= 365:
+        return int(match.group(1))
+    return None
+
+
+def day_of(ts: float) -> int:
+    """UTC day number for a timestamp."""
+    return int(ts // SECONDS_PER_DAY)
+
+
+class ModeratorStats:
+    """Action counts per guild, UTC day and moderator, updated as each action is logged."""
+
+    def __init__(self, retention_days: int = 400):
+        self.retention_days = retention_days
+        self.logger = logging.getLogger(__name__)
+        # guild_id -> day -> moderator_id -> action -> count
+        self._counts: Dict[int, Dict[int, Dict[int, Dict[str, int]]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        )
+        self.names: Dict[int, str] = {}
+        self._pruned_day = day_of(time.time())
+        # record() runs on the event loop, forget() on the action store's writer thread
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """Count one logged action; entries without guild or moderator IDs are ignored."""
+        guild_id = entry.get("guild_id")
+        moderator_id = entry.get("moderator_id")
+        if guild_id is None or moderator_id is None:
+            return
+
+        day = day_of(entry["ts"])
+        with self._lock:
+            self._counts[guild_id][day][moderator_id][entry["action"]] += 1
+        if entry.get("moderator"):
+            self.names[moderator_id] = entry["moderator"]
+
+        if day > self._pruned_day:
+            self._prune(day)
+
+    def forget(self, entries: List[Dict[str, Any]]) -> None:
+        """Undo ``record`` for entries that never reached the database."""
+        with self._lock:
+            for entry in entries:
+                if entry.get("guild_id") is None or entry.get("moderator_id") is None:
+                    continue
+                # Look up without the defaultdicts, so nothing is created while totals are read
+                actions = self._counts.get(entry["guild_id"], {}).get(day_of(entry["ts"]), {}).get(
+                    entry["moderator_id"], {})
+                if actions.get(entry["action"], 0) > 0:
+                    actions[entry["action"]] -= 1
+
+    def _prune(self, today: int) -> None:
+        """Forget days that fell out of the retention window."""
+        cutoff = today - self.retention_days
+        for days in self._counts.values():
+            for day in [day for day in days if day < cutoff]:
+                del days[day]
+        self._pruned_day = today
+
+    def load(self, rows: List[Tuple[int, int, int, str, int]]) -> None:
+        """Add persisted (guild_id, moderator_id, day, action, count) rows to the counters."""
+        cutoff = day_of(time.time()) - self.retention_days
+        for guild_id, moderator_id, day, action, count in rows:
+            if day >= cutoff:
+                self._counts[guild_id][day][moderator_id][action] += count
+
+    @property
+    def oldest_day(self) -> int:
+        """First UTC day kept in memory."""
+        return day_of(time.time()) - self.retention_days
+
+    def _days(self, days: int, now: float = None) -> range:
+        today = day_of(now if now is not None else time.time())
+        return range(today - days + 1, today + 1)
+
+    def moderator_totals(self, guild_id: int, moderator_id: int, days: int) -> Dict[str, int]:
+        """Per-action totals for one moderator over the last ``days`` UTC days."""
+        totals: Dict[str, int] = defaultdict(int)
+        guild_days = self._counts.get(guild_id, {})
+        for day in self._days(days):
+            for action, count in guild_days.get(day, {}).get(moderator_id, {}).items():
+                if count:
+                    totals[action] += count
+        return dict(totals)
+
+    def guild_totals(self, guild_id: int, days: int) -> Dict[int, Dict[str, int]]:
+        """Per-moderator, per-action totals for a guild over the last ``days`` UTC days."""
+        totals: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        guild_days = self._counts.get(guild_id, {})
+        for day in self._days(days):
+            for moderator_id, actions in guild_days.get(day, {}).items():
+                for action, count in actions.items():
+                    # Counts taken back by forget() stay behind as zeros
+                    if count:
+                        totals[moderator_id][action] += count
+        return {moderator_id: dict(actions) for moderator_id, actions in totals.items()}
+
+
+# Shared counters updated by log_thread_action
+moderator_stats = ModeratorStats()
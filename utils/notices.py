@@ -0,0 +1,212 @@
+"""
+Short-lived notices ("already locked", "no permission", ...) with one sweeper for cleanup.
+
+Repeated notices to one user in one thread update a single message instead of posting
+new ones; the repeat count is written into it at most once per sweep. Expired notices
+are deleted by a single sweeper task, one bulk delete per channel where the bot may
+manage messages, instead of a sleeping task and a DELETE per notice.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from utils.load_shedding import load_shedder
+
+# Discord's bulk delete takes at most this many messages per call
+BULK_DELETE_LIMIT = 100
+
+
+class Notice:
+    """One posted notice and the repeats folded into it."""
+
+    __slots__ = ("channel", "text", "count", "message", "created_at", "expires_at", "dirty")
+
+    def __init__(self, channel, text: str, now: float, ttl: float):
+        self.channel = channel
+        self.text = text
+        self.count = 1
+        self.message: Optional[discord.Message] = None
+        self.created_at = now
+        self.expires_at = now + ttl
+        # Set when the text or count changed since the message was last written
+        self.dirty = False
+
+    def render(self) -> str:
+        return self.text if self.count == 1 else f"{self.text} (×{self.count})"
+
+
+class NoticeBoard:
+    """Posts, folds and sweeps notices; used from the event loop only."""
+
+    def __init__(self, ttl: float = 5.0, sweep_interval: float = 1.0, max_lifetime: float = 60.0):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        # A notice kept alive by repeats is still removed after this long
+        self.max_lifetime = max_lifetime
+        self.logger = logging.getLogger(__name__)
+
+        self._notices: Dict[Tuple[int, int], Notice] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._suppressed_listeners: List[Callable[[int, str], None]] = []
+
+        self.sent = 0
+        self.folded = 0
+        self.edited = 0
+        self.deleted = 0
+        self.bulk_deletes = 0
+        self.single_deletes = 0
+        self.failed = 0
+
+    def configure(self, ttl: float = None, sweep_interval: float = None) -> None:
+        if ttl:
+            self.ttl = ttl
+            self.max_lifetime = max(self.max_lifetime, ttl * 12)
+        if sweep_interval:
+            self.sweep_interval = sweep_interval
+
+    def on_suppressed(self, callback: Callable[[int, str], None]) -> None:
+        """Register ``callback(channel_id, "folded" | "shed")`` for notices that post no new message."""
+        self._suppressed_listeners.append(callback)
+
+    def _suppressed(self, channel_id: int, outcome: str) -> None:
+        for callback in self._suppressed_listeners:
+            callback(channel_id, outcome)
+
+    async def post(self, channel, user_id: int, text: str, shed_kind: str = None) -> None:
+        """Show ``text`` to a user in a channel for ``ttl`` seconds, folding repeats into one message.
+
+        With ``shed_kind``, the notice is dropped (and counted under that kind) while the
+        bot is shedding load.
+        """
+        if shed_kind and load_shedder.should_shed(shed_kind):
+            self._suppressed(channel.id, "shed")
+            return
+
+        now = time.monotonic()
+        key = (channel.id, user_id)
+        notice = self._notices.get(key)
+        if notice is not None:
+            notice.count = notice.count + 1 if notice.text == text else 1
+            notice.text = text
+            notice.expires_at = min(now + self.ttl, notice.created_at + self.max_lifetime)
+            notice.dirty = True
+            self.folded += 1
+            self._suppressed(channel.id, "folded")
+            return
+
+        notice = self._notices[key] = Notice(channel, text, now, self.ttl)
+        try:
+            notice.message = await channel.send(text)
+            self.sent += 1
+        except discord.HTTPException as e:
+            self._notices.pop(key, None)
+            self.failed += 1
+            self.logger.warning(f"Could not send notice in {getattr(channel, 'name', channel.id)}: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.logger.error(f"Notice sweep failed: {e}")
+
+    async def sweep(self, flush: bool = False) -> int:
+        """Write folded repeats and delete expired notices (all of them with ``flush``); returns deletions."""
+        now = time.monotonic()
+        expired: Dict[int, List[Notice]] = {}
+        for key, notice in list(self._notices.items()):
+            if notice.message is None:
+                continue  # still being sent
+            if flush or notice.expires_at <= now:
+                del self._notices[key]
+                expired.setdefault(notice.channel.id, []).append(notice)
+            elif notice.dirty and not load_shedder.should_shed("notice_edit"):
+                notice.dirty = False
+                try:
+                    await notice.message.edit(content=notice.render())
+                    self.edited += 1
+                except discord.HTTPException:
+                    pass
+
+        deleted = 0
+        for notices in expired.values():
+            deleted += await self._delete(notices[0].channel, [notice.message for notice in notices])
+        return deleted
+
+    async def _delete(self, channel, messages: List[discord.Message]) -> int:
+        """Delete a channel's expired notices, in bulk when there are several and the bot may."""
+        deleted = 0
+        if len(messages) > 1 and self._can_bulk_delete(channel):
+            remaining = []
+            for start in range(0, len(messages), BULK_DELETE_LIMIT):
+                chunk = messages[start:start + BULK_DELETE_LIMIT]
+                if len(chunk) == 1:
+                    remaining.extend(chunk)
+                    continue
+                try:
+                    await channel.delete_messages(chunk)
+                    self.bulk_deletes += 1
+                    deleted += len(chunk)
+                except discord.NotFound:
+                    # Bulk delete fails as a whole if one message is gone; delete the rest singly
+                    remaining.extend(chunk)
+                except discord.HTTPException as e:
+                    self.logger.debug(f"Bulk delete of notices failed in {channel.id}: {e}")
+                    remaining.extend(chunk)
+            messages = remaining
+
+        for message in messages:
+            try:
+                await message.delete()
+                self.single_deletes += 1
+                deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                self.failed += 1
+        self.deleted += deleted
+        return deleted
+
+    @staticmethod
+    def _can_bulk_delete(channel) -> bool:
+        guild = getattr(channel, "guild", None)
+        if guild is None or guild.me is None:
+            return False
+        try:
+            return channel.permissions_for(guild.me).manage_messages
+        except Exception:
+            return False
+
+    async def flush(self) -> int:
+        """Delete every outstanding notice now (used at shutdown)."""
+        return await self.sweep(flush=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._notices),
+            "sent": self.sent,
+            "folded": self.folded,
+            "edited": self.edited,
+            "deleted": self.deleted,
+            "bulk_deletes": self.bulk_deletes,
+            "single_deletes": self.single_deletes,
+            "failed": self.failed,
+        }
+
+
+# Shared notice board for the bot's courtesy messages
+notices = NoticeBoard()
@@ -0,0 +1,204 @@
+"""
+Event-loop lag sampling and slow handler detection for the Discord Thread Lock Bot.
+"""
+
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PerformanceMonitor:
+    """Samples event-loop lag and times bot handlers against a slow threshold."""
+
+    def __init__(self, slow_threshold: float = 0.25, sample_interval: float = 0.5):
+        self.slow_threshold = slow_threshold
+        self.sample_interval = sample_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.current_lag = 0.0
+        self.max_lag = 0.0
+        self.lag_samples = 0
+
+        self._handler_stats: Dict[str, Dict[str, Any]] = {}
+        self._stall_sites: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.perf_counter()
+        self._sampler_task: Optional[asyncio.Task] = None
+        self._watchdog_thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def configure(self, slow_threshold_ms: int = None, sample_interval_ms: int = None) -> None:
+        """Apply thresholds from configuration."""
+        if slow_threshold_ms:
+            self.slow_threshold = slow_threshold_ms / 1000
+        if sample_interval_ms:
+            self.sample_interval = sample_interval_ms / 1000
+
+    def start(self) -> None:
+        """Start the lag sampler and the stall watchdog on the running loop."""
+        if self._running:
+            return
+
+        self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._sampler_task = self._loop.create_task(self._sample_lag())
+        self._watchdog_thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._watchdog_thread.start()
+        self.logger.info(
+            f"Performance monitor started (slow threshold {self.slow_threshold * 1000:.0f}ms, "
+            f"sampling every {self.sample_interval * 1000:.0f}ms)"
+        )
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._running = False
+        if self._sampler_task:
+            self._sampler_task.cancel()
+            self._sampler_task = None
+
+    async def _sample_lag(self):
+        """Measure how late the loop wakes us up compared to the requested interval."""
+        while self._running:
+            started = time.perf_counter()
+            await asyncio.sleep(self.sample_interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.sample_interval)
+
+            self._last_tick = now
+            self.current_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.lag_samples += 1
+
+    def _watchdog(self):
+        """Capture the loop thread's stack whenever the loop stops ticking."""
+        reported_tick = None
+        poll = max(self.slow_threshold / 2, 0.01)
+
+        while self._running:
+            time.sleep(poll)
+            last_tick = self._last_tick
+            stalled = time.perf_counter() - last_tick - self.sample_interval
+            if stalled < self.slow_threshold or reported_tick == last_tick:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+
+            reported_tick = last_tick
+            stack = traceback.extract_stack(frame)
+            site = f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}" if stack else "unknown"
+            formatted = "".join(traceback.format_list(stack))
+            self.logger.warning(f"Event loop blocked for {stalled * 1000:.0f}ms at {site}\n{formatted}")
+
+            with self._lock:
+                entry = self._stall_sites.setdefault(site, {"count": 0, "max_ms": 0.0, "stack": ""})
+                entry["count"] += 1
+                entry["max_ms"] = max(entry["max_ms"], stalled * 1000)
+                entry["stack"] = formatted
+
+    def record(self, name: str, duration: float, stack: Optional[str] = None) -> None:
+        """Record one handler invocation and log it if it was slow."""
+        slow = duration >= self.slow_threshold
+
+        with self._lock:
+            entry = self._handler_stats.setdefault(
+                name, {"calls": 0, "slow_calls": 0, "total_ms": 0.0, "max_ms": 0.0, "last_slow_stack": None}
+            )
+            entry["calls"] += 1
+            entry["total_ms"] += duration * 1000
+            entry["max_ms"] = max(entry["max_ms"], duration * 1000)
+            if slow:
+                entry["slow_calls"] += 1
+                entry["last_slow_stack"] = stack
+
+        if slow:
+            self.logger.warning(
+                f"Slow handler {name} took {duration * 1000:.0f}ms "
+                f"(threshold {self.slow_threshold * 1000:.0f}ms)" + (f"\n{stack}" if stack else "")
+            )
+
+    def _capture_task_stack(self, task: asyncio.Task, holder: List[str]) -> None:
+        """Remember where a still-running handler is suspended once it crosses the threshold."""
+        if task.done():
+            return
+
+        # Follow the await chain down to the innermost suspended coroutine
+        summary = traceback.StackSummary()
+        awaitable = task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            summary.append(traceback.FrameSummary(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        holder.append("".join(summary.format()))
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing an async handler under the given name."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                task = asyncio.current_task()
+                stack_holder: List[str] = []
+                probe = loop.call_later(self.slow_threshold, self._capture_task_stack, task, stack_holder)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    probe.cancel()
+                    self.record(name, time.perf_counter() - started, stack_holder[0] if stack_holder else None)
+            return wrapper
+        return decorator
+
+    def summary(self, limit: int = 10) -> Dict[str, Any]:
+        """Summarize loop lag and the slowest handlers and stall sites."""
+        with self._lock:
+            handlers = [
+                {
+                    "name": name,
+                    "calls": stats["calls"],
+                    "slow_calls": stats["slow_calls"],
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 2),
+                    "total_ms": round(stats["total_ms"], 2),
+                    "last_slow_stack": stats["last_slow_stack"],
+                }
+                for name, stats in self._handler_stats.items()
+            ]
+            stalls = [
+                {"site": site, "count": stats["count"], "max_ms": round(stats["max_ms"], 2), "stack": stats["stack"]}
+                for site, stats in self._stall_sites.items()
+            ]
+
+        handlers.sort(key=lambda item: (item["slow_calls"], item["max_ms"]), reverse=True)
+        stalls.sort(key=lambda item: (item["count"], item["max_ms"]), reverse=True)
+
+        return {
+            "loop_lag_ms": round(self.current_lag * 1000, 2),
+            "max_loop_lag_ms": round(self.max_lag * 1000, 2),
+            "lag_samples": self.lag_samples,
+            "slow_threshold_ms": round(self.slow_threshold * 1000, 2),
+            "top_handlers": handlers[:limit],
+            "top_stall_sites": stalls[:limit],
+        }
+
+
+# Shared monitor used by the bot, the handlers and the web interface
+performance_monitor = PerformanceMonitor()
+
+
+def timed_handler(name: str) -> Callable:
+    """Time an async handler with the shared performance monitor."""
+    return performance_monitor.timed(name)
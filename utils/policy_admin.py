@@ -0,0 +1,129 @@
+"""
+Bulk reads and conditional replacement of guild settings for the web interface.
+
+A batch is validated as a whole, written in one transaction and then recompiled once per
+guild on the bot's loop, instead of a chat command and a write per role per guild.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from utils.guild_config_store import PreconditionFailed, record_etag
+from utils.lock_policy import validate_settings
+
+
+class PolicyError(Exception):
+    """A batch that was rejected before anything was written."""
+
+    def __init__(self, errors: Dict[str, List[str]]):
+        super().__init__(f"{len(errors)} invalid entr{'y' if len(errors) == 1 else 'ies'}")
+        self.errors = errors
+
+
+class PolicyUnavailable(Exception):
+    """Raised when no bot config is attached, e.g. while the bot shuts down."""
+
+
+def collection_etag(etags: Dict[str, str]) -> str:
+    """ETag for a set of records: a hash of their guild IDs and ETags."""
+    digest = hashlib.sha1()
+    for guild_id in sorted(etags):
+        digest.update(f"{guild_id}={etags[guild_id]};".encode("utf-8"))
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+class PolicyAdmin:
+    """Reads and replaces guild records on behalf of the web thread."""
+
+    def __init__(self):
+        self.config = None
+        self.max_batch = 1000
+        self.logger = logging.getLogger(__name__)
+
+        self._recompile: Optional[Callable[[List[int]], None]] = None
+        # One batch at a time, so recompiles are scheduled in write order
+        self._write_lock = threading.Lock()
+
+        self.batches = 0
+        self.guilds_written = 0
+        self.conflicts = 0
+
+    def attach(self, config, recompile: Callable[[List[int]], None], max_batch: int = 1000) -> None:
+        """Serve ``config``'s guild store; ``recompile(guild_ids)`` is called after every write, from any thread."""
+        self.config = config
+        self._recompile = recompile
+        self.max_batch = max_batch
+
+    def detach(self) -> None:
+        self.config = None
+        self._recompile = None
+
+    def _attached(self):
+        """The attached config, taken once so a concurrent ``detach()`` can't clear it mid-request."""
+        config = self.config
+        if config is None:
+            raise PolicyUnavailable()
+        return config
+
+    def read(self, guild_ids: Optional[Iterable] = None) -> Dict[str, Dict[str, Any]]:
+        """Guild ID -> {"settings", "etag"}; every guild with a record when ``guild_ids`` is None."""
+        records = self._attached().guilds.read_many(guild_ids)
+        return {guild_id: {"settings": record, "etag": record_etag(record)} for guild_id, record in records.items()}
+
+    def replace(self, entries: Dict[str, Any]) -> Dict[str, str]:
+        """Replace whole guild records; returns their new ETags.
+
+        Each entry is ``{"settings": {...}, "etag": "..."}``. With an ``etag`` (``"*"`` for
+        any), the write only happens if the stored record still has it; a guild without a
+        record has the ETag of ``{}``. Raises PolicyError, PreconditionFailed or
+        PolicyUnavailable and then writes nothing.
+        """
+        config = self._attached()
+        recompile = self._recompile
+        if not isinstance(entries, dict) or not entries:
+            raise PolicyError({"guilds": ["expected an object of guild ID -> entry"]})
+        if len(entries) > self.max_batch:
+            raise PolicyError({"guilds": [f"at most {self.max_batch} guilds per batch"]})
+
+        errors: Dict[str, List[str]] = {}
+        records: Dict[str, Dict[str, Any]] = {}
+        expected: Dict[str, str] = {}
+        for guild_id, entry in entries.items():
+            if not str(guild_id).isdigit():
+                errors[str(guild_id)] = ["guild ID must be numeric"]
+                continue
+            if not isinstance(entry, dict) or "settings" not in entry:
+                errors[guild_id] = ["entry must be an object with settings"]
+                continue
+            problems = validate_settings(entry["settings"])
+            if problems:
+                errors[guild_id] = problems
+                continue
+            records[guild_id] = entry["settings"]
+            if entry.get("etag"):
+                expected[guild_id] = entry["etag"]
+        if errors:
+            raise PolicyError(errors)
+
+        with self._write_lock:
+            try:
+                etags = config.guilds.replace_many(records, expected)
+            except PreconditionFailed:
+                self.conflicts += 1
+                raise
+            self.batches += 1
+            self.guilds_written += len(records)
+            if recompile:
+                recompile([int(guild_id) for guild_id in records])
+
+        self.logger.info(f"Replaced settings for {len(records)} guild(s) through the admin API")
+        return etags
+
+    def stats(self) -> Dict[str, int]:
+        return {"batches": self.batches, "guilds_written": self.guilds_written, "conflicts": self.conflicts}
+
+
+# Shared between the bot, which attaches its config, and the web interface
+policy_admin = PolicyAdmin()
@@ -0,0 +1,48 @@
+"""
+Warm-restart snapshot: in-memory work written at shutdown and picked up on the next start.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+SNAPSHOT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def save_snapshot(path: str, state: Dict[str, Any]) -> None:
+    """Atomically write ``state`` to ``path``."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "written_at": time.time(), **state}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path: str, max_age: float = 86400) -> Optional[Dict[str, Any]]:
+    """Read and remove the snapshot so it is applied once; stale or unreadable snapshots are ignored."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Ignoring unreadable snapshot {path}: {e}")
+        state = None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    if not state or state.get("version") != SNAPSHOT_VERSION:
+        return None
+    if time.time() - state.get("written_at", 0) > max_age:
+        logger.warning(f"Ignoring snapshot {path} written more than {max_age:.0f}s ago")
+        return None
+    return state
@@ -0,0 +1,202 @@
+"""
+Archives a thread's message history to a gzipped JSONL file before the thread is deleted.
+
+History is streamed a page at a time and each page is compressed and written off the
+event loop, so memory stays bounded however long the thread is. Every guild has a disk
+cap: one archive is cut short when it alone would exceed it, and the guild's oldest
+archives are removed to make room for a new one.
+"""
+
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from utils.tracing import span
+
+# Messages per page; discord.py fetches history 100 at a time
+PAGE_SIZE = 100
+
+
+class ArchiveFailed(Exception):
+    """Raised when a thread could not be archived, so it must not be deleted."""
+
+
+def message_record(message: discord.Message) -> Dict[str, Any]:
+    """One JSONL line for a message."""
+    return {
+        "type": "message",
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "created_at": message.created_at.isoformat(),
+        "edited_at": message.edited_at.isoformat() if message.edited_at else None,
+        "content": message.content,
+        "attachments": [attachment.url for attachment in message.attachments],
+        "embeds": len(message.embeds),
+        "reference": message.reference.message_id if message.reference else None,
+    }
+
+
+class ArchiveWriter:
+    """A gzipped JSONL file written through a temporary name; used from a worker thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._raw = open(self.temp_path, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+
+    @property
+    def compressed_bytes(self) -> int:
+        return self._raw.tell()
+
+    def write(self, lines: List[bytes]) -> int:
+        """Append lines and return the compressed size so far (flushed, so it is accurate)."""
+        self._gzip.write(b"".join(lines))
+        self._gzip.flush(zlib.Z_SYNC_FLUSH)
+        return self.compressed_bytes
+
+    def commit(self) -> int:
+        self._gzip.close()
+        self._raw.close()
+        os.replace(self.temp_path, self.path)
+        return os.path.getsize(self.path)
+
+    def abort(self) -> None:
+        try:
+            self._gzip.close()
+            self._raw.close()
+        except OSError:
+            pass
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class ThreadArchiver:
+    """Writes thread archives under ``base_dir/<guild_id>/`` within a per-guild byte cap."""
+
+    def __init__(self, base_dir: str = "data/archives", max_bytes_per_guild: int = 100 * 1024 * 1024,
+                 concurrency: int = 2):
+        self.base_dir = base_dir
+        self.max_bytes_per_guild = max_bytes_per_guild
+        self.logger = logging.getLogger(__name__)
+
+        # Deleting many threads at once must not turn into that many history downloads at once
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        self.archived = 0
+        self.truncated = 0
+        self.failed = 0
+
+    def guild_dir(self, guild_id: int) -> str:
+        return os.path.join(self.base_dir, str(guild_id))
+
+    def archives(self, guild_id: int) -> List[str]:
+        """The guild's archives, oldest first."""
+        paths = glob.glob(os.path.join(glob.escape(self.guild_dir(guild_id)), "*.jsonl.gz"))
+        return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+    def enforce_cap(self, guild_id: int, keep: Optional[str] = None) -> int:
+        """Delete the guild's oldest archives (never ``keep``) until it fits the cap; returns bytes freed."""
+        archives = []
+        for path in self.archives(guild_id):
+            try:
+                archives.append((path, os.path.getsize(path)))
+            except OSError:
+                continue
+
+        total = sum(size for _, size in archives)
+        freed = 0
+        for path, size in archives:
+            if total <= self.max_bytes_per_guild:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            freed += size
+        return freed
+
+    async def archive(self, thread: discord.Thread) -> Optional[str]:
+        """Stream the thread's history to disk; returns the archive path, or None if it failed."""
+        async with self._semaphore:
+            async with span("thread_archive"):
+                return await self._archive(thread)
+
+    async def _archive(self, thread: discord.Thread) -> Optional[str]:
+        path = os.path.join(self.guild_dir(thread.guild.id), f"{thread.id}-{int(time.time())}.jsonl.gz")
+        header = {
+            "type": "thread",
+            "id": thread.id,
+            "name": thread.name,
+            "guild_id": thread.guild.id,
+            "parent_id": thread.parent_id,
+            "owner_id": thread.owner_id,
+            "created_at": thread.created_at.isoformat() if thread.created_at else None,
+            "archived_at": time.time(),
+        }
+
+        try:
+            writer = await asyncio.to_thread(ArchiveWriter, path)
+        except OSError as e:
+            self.failed += 1
+            self.logger.error(f"Cannot create archive for thread '{thread.name}': {e}")
+            return None
+
+        written = 0
+        truncated = False
+        page = [self._line(header)]
+        try:
+            async for message in thread.history(limit=None, oldest_first=True):
+                page.append(self._line(message_record(message)))
+                written += 1
+                if len(page) >= PAGE_SIZE:
+                    size = await asyncio.to_thread(writer.write, page)
+                    page = []
+                    if size >= self.max_bytes_per_guild:
+                        truncated = True
+                        break
+
+            if truncated:
+                page.append(self._line({"type": "truncated", "messages_written": written}))
+            await asyncio.to_thread(writer.write, page)
+            await asyncio.to_thread(writer.commit)
+        except (discord.HTTPException, OSError) as e:
+            await asyncio.to_thread(writer.abort)
+            self.failed += 1
+            self.logger.error(f"Failed to archive thread '{thread.name}': {e}")
+            return None
+        except BaseException:
+            # Cancelled mid-stream: drop the partial file without awaiting anything more
+            writer.abort()
+            raise
+
+        freed = await asyncio.to_thread(self.enforce_cap, thread.guild.id, path)
+        self.archived += 1
+        if truncated:
+            self.truncated += 1
+            self.logger.warning(f"Archive of thread '{thread.name}' cut short at the guild cap ({written} messages)")
+        if freed:
+            self.logger.info(f"Removed {freed} bytes of old archives in {thread.guild.name}")
+        return path
+
+    @staticmethod
+    def _line(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    def stats(self) -> Dict[str, int]:
+        return {"archived": self.archived, "truncated": self.truncated, "failed": self.failed}
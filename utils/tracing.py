@@ -0,0 +1,209 @@
+"""
+Stage-level tracing for the thread lock pipeline.
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Span:
+    """A single timed stage inside a trace."""
+
+    __slots__ = ("trace", "name", "attrs", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: "Trace", name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def annotate(self, **attrs) -> None:
+        """Attach attributes known only once the stage has run."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_val}"
+        self.trace.spans.append(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "offset_ms": round((self.start_ns - self.trace.start_ns) / 1_000_000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class _NullSpan:
+    """Span used when no trace is active; costs nothing."""
+
+    def annotate(self, **attrs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """A traced operation made up of ordered spans."""
+
+    def __init__(self, tracer: "Tracer", trace_id: int, name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.name = name
+        self.attrs = attrs
+        self.spans: List[Span] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self.discarded = False
+        self._token = None
+
+    def span(self, name: str, **attrs) -> Span:
+        """Open a span for one stage of this trace."""
+        return Span(self, name, attrs)
+
+    def annotate(self, **attrs) -> None:
+        """Attach extra attributes to the trace."""
+        self.attrs.update(attrs)
+
+    def discard(self) -> None:
+        """Drop this trace instead of recording it (e.g. the message was not a trigger)."""
+        self.discarded = True
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end_ns = time.perf_counter_ns()
+        _current_trace.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc_val}"
+        if not self.discarded:
+            self.tracer.record(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S.%f UTC"),
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+            "spans": [span.to_dict() for span in sorted(self.spans, key=lambda item: item.start_ns)],
+        }
+
+
+class Tracer:
+    """Creates traces and keeps the most recent completed ones in a ring buffer."""
+
+    def __init__(self, capacity: int = 256):
+        self.logger = logging.getLogger(__name__)
+        self._ids = itertools.count(1)
+        self.completed: deque = deque(maxlen=capacity)
+
+    def configure(self, capacity: int = None) -> None:
+        """Resize the ring buffer, keeping the newest traces."""
+        if capacity and capacity != self.completed.maxlen:
+            self.completed = deque(self.completed, maxlen=capacity)
+
+    def trace(self, name: str, **attrs) -> Trace:
+        """Start a trace; use as ``async with tracer.trace(...)``."""
+        return Trace(self, next(self._ids), name, attrs)
+
+    def record(self, trace: Trace) -> None:
+        """Store a completed trace."""
+        self.completed.append(trace)
+
+    def recent(self, limit: int = None, name: str = None) -> List[Dict[str, Any]]:
+        """Return completed traces, newest first."""
+        # list() copies the deque atomically, so the web thread can read while the bot appends
+        traces = [trace for trace in reversed(list(self.completed)) if name is None or trace.name == name]
+        if limit:
+            traces = traces[:limit]
+        return [trace.to_dict() for trace in traces]
+
+    def dump(self, path: str = None) -> str:
+        """Write the ring buffer to a JSON file and return its path."""
+        if path is None:
+            path = f"logs/traces_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.json"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.recent(), f, indent=2, ensure_ascii=False)
+        self.logger.info(f"Dumped {len(self.completed)} trace(s) to {path}")
+        return path
+
+
+# Shared tracer used by the bot, the handlers and the web interface
+tracer = Tracer()
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace active in the current task, if any."""
+    return _current_trace.get()
+
+
+def span(name: str, **attrs):
+    """Open a span in the current trace, or a no-op span when nothing is being traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, attrs)
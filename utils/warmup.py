@@ -0,0 +1,124 @@
+"""
+One-time startup warm-up: per-guild lock policies, role name resolution and bot permission checks.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import discord
+
+
+class GuildWarmup:
+    """Warms guilds in batches in the background; a guild can take lock requests once it is warm.
+
+    A trigger in a guild the background pass hasn't reached yet warms that guild on the
+    spot, so nothing waits for the whole pass.
+    """
+
+    def __init__(self, bot, batch_size: int = 200, progress_interval: float = 5.0):
+        self.bot = bot
+        self.batch_size = max(1, batch_size)
+        self.progress_interval = progress_interval
+        self.logger = logging.getLogger(__name__)
+
+        self.warm: Set[int] = set()
+        self.missing_permissions: Dict[int, List[str]] = {}
+        self.unknown_roles: Dict[int, List[str]] = {}
+
+        self.total = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_warm(self, guild_id: int) -> bool:
+        return guild_id in self.warm
+
+    def warm_guild(self, guild: discord.Guild) -> None:
+        """Compile the guild's policy against its roles and check the bot's permissions there."""
+        config = self.bot.config
+        config.guilds.invalidate_compiled(guild.id)
+        policy = config.get_lock_policy(guild.id, guild.roles)
+        if policy.unknown_roles:
+            self.unknown_roles[guild.id] = sorted(policy.unknown_roles)
+            self.logger.debug(f"Roles not found in {guild.name}: {sorted(policy.unknown_roles)}")
+        else:
+            self.unknown_roles.pop(guild.id, None)
+
+        if guild.me is not None:
+            missing = self.bot.permission_handler.check_bot_permissions(guild, guild.me)["missing"]
+            if missing:
+                self.missing_permissions[guild.id] = missing
+            else:
+                self.missing_permissions.pop(guild.id, None)
+        self.warm.add(guild.id)
+
+    def invalidate(self, guild: discord.Guild) -> None:
+        """Re-warm a guild whose roles changed."""
+        if guild.id in self.warm:
+            self.warm.discard(guild.id)
+            self.warm_guild(guild)
+
+    def forget(self, guild_id: int) -> None:
+        self.warm.discard(guild_id)
+        self.missing_permissions.pop(guild_id, None)
+        self.unknown_roles.pop(guild_id, None)
+
+    def start(self, guilds: Iterable[discord.Guild]) -> None:
+        """Warm every guild not yet warm; a pass already running is left alone."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(list(guilds)))
+
+    async def run(self, guilds: List[discord.Guild]) -> None:
+        pending = [guild for guild in guilds if guild.id not in self.warm]
+        if not pending:
+            return
+
+        store = self.bot.config.guilds
+        self.total = len(self.warm) + len(pending)
+        self.started_at = time.time()
+        self.finished_at = None
+        last_report = time.monotonic()
+
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        # Records for the next batch are read off the loop while the current one compiles
+        preload = asyncio.create_task(asyncio.to_thread(store.preload, [guild.id for guild in batches[0]]))
+        for index, batch in enumerate(batches):
+            try:
+                await preload
+            except Exception as e:
+                self.logger.error(f"Failed to preload guild settings: {e}")
+            if index + 1 < len(batches):
+                next_ids = [guild.id for guild in batches[index + 1]]
+                preload = asyncio.create_task(asyncio.to_thread(store.preload, next_ids))
+
+            for guild in batch:
+                if guild.id in self.warm or self.bot.get_guild(guild.id) is None:
+                    continue
+                try:
+                    self.warm_guild(guild)
+                except Exception as e:
+                    self.logger.error(f"Failed to warm up guild {guild.id}: {e}")
+            await asyncio.sleep(0)
+
+            if time.monotonic() - last_report >= self.progress_interval:
+                last_report = time.monotonic()
+                self.logger.info(f"Warm-up: {len(self.warm)}/{self.total} guild(s) ready")
+
+        self.finished_at = time.time()
+        self.logger.info(
+            f"Warm-up finished: {len(self.warm)} guild(s) in {self.finished_at - self.started_at:.2f}s, "
+            f"{len(self.missing_permissions)} missing bot permissions, "
+            f"{len(self.unknown_roles)} with unknown role names"
+        )
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "warm": len(self.warm),
+            "total": self.total,
+            "done": self.finished_at is not None,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+            "missing_permissions": len(self.missing_permissions),
+            "unknown_roles": len(self.unknown_roles),
+        }